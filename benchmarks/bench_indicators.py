@@ -0,0 +1,50 @@
+"""
+Time the vectorized src.indicators functions against their loop versions in benchmarks.legacy_indicators.
+
+    python -m benchmarks.bench_indicators --bars 5000
+"""
+import argparse
+
+import pandas as pd
+
+from benchmarks import legacy_indicators
+from benchmarks.bench_ta import random_ohlcv, timeit
+from src import indicators
+
+# name -> arguments after the price frame
+CASES = {
+    'trix': (15,),
+    'average_directional_movement_index': (14, 20),
+    'vortex_indicator': (14,),
+    'relative_strength_index': (14,),
+    'money_flow_index': (14,),
+    'on_balance_volume': (10,),
+    'ultimate_oscillator': (),
+}
+
+
+def run(bars: int, repeat: int = 3, names: list = None) -> pd.DataFrame:
+    ohlc = random_ohlcv(bars)
+    legacy_ohlc = ohlc.reset_index(drop=True).rename(columns=str.capitalize)
+    rows = []
+    for name in names or CASES:
+        args = CASES[name]
+        legacy_seconds = timeit(lambda df: getattr(legacy_indicators, name)(df, *args), legacy_ohlc, 1)
+        current_seconds = timeit(lambda df: getattr(indicators, name)(df, *args), ohlc, repeat)
+        rows.append({
+            'indicator': name,
+            'legacy_seconds': round(legacy_seconds, 4),
+            'seconds': round(current_seconds, 4),
+            'speedup': round(legacy_seconds / current_seconds, 1),
+            'bars_per_second': round(bars / current_seconds),
+        })
+    return pd.DataFrame(rows).set_index('indicator')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark vectorized src.indicators against the loop versions')
+    parser.add_argument('--bars', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('names', nargs='*', help=f'indicators to run, default to all of {list(CASES)}')
+    args = parser.parse_args()
+    print(run(args.bars, args.repeat, args.names).to_string())
@@ -0,0 +1,49 @@
+"""
+Time candle parsing of src.pricer against the per candle version in benchmarks.legacy_pricer.
+
+    python -m benchmarks.bench_pricer --candles 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import legacy_pricer
+from src.pricer import candles_to_df
+
+
+def random_candles(candles: int, seed: int = 42) -> list:
+    """
+    Raw S5 candles in the format returned by Oanda
+    """
+    rng = np.random.default_rng(seed)
+    close = 1.3 + np.cumsum(rng.normal(0, 1e-4, candles))
+    times = pd.date_range('2020-01-01', periods=candles, freq='5S').strftime('%Y-%m-%dT%H:%M:%S.000000000Z')
+    return [
+        {'complete': True, 'volume': 1, 'time': t, 'mid': {'o': f'{c:.5f}', 'h': f'{c + 2e-4:.5f}', 'l': f'{c - 2e-4:.5f}', 'c': f'{c:.5f}'}}
+        for t, c in zip(times, close)
+    ]
+
+
+def run(candles: int, repeat: int = 3) -> pd.DataFrame:
+    raw = random_candles(candles)
+    rows = []
+    for name, func, times in (('legacy', legacy_pricer.to_df, 1), ('vectorized', candles_to_df, repeat)):
+        best = np.inf
+        for _ in range(times):
+            started = time.perf_counter()
+            func(raw)
+            best = min(best, time.perf_counter() - started)
+        rows.append({'parser': name, 'seconds': round(best, 4), 'candles_per_second': round(candles / best)})
+    result = pd.DataFrame(rows).set_index('parser')
+    result['speedup'] = (result.loc['legacy', 'seconds'] / result['seconds']).round(1)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark vectorized candle parsing against the per candle version')
+    parser.add_argument('--candles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.candles, args.repeat).to_string())
@@ -0,0 +1,81 @@
+"""
+Time the vectorized TA indicators against their row by row versions in benchmarks.legacy_ta.
+
+    python -m benchmarks.bench_ta --bars 20000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import legacy_ta
+from src.finta.ta import TA
+
+# name -> (legacy implementation, current implementation)
+CASES = {
+    'DMI': (legacy_ta.DMI, TA.DMI),
+    'ADX': (legacy_ta.ADX, TA.ADX),
+    'MFI': (legacy_ta.MFI, TA.MFI),
+    'SQZMI': (legacy_ta.SQZMI, TA.SQZMI),
+    'FVE': (legacy_ta.FVE, TA.FVE),
+    'VFI': (legacy_ta.VFI, TA.VFI),
+    'KAMA': (legacy_ta.KAMA, TA.KAMA),
+    'SAR': (legacy_ta.SAR, TA.SAR),
+    'UO': (legacy_ta.UO, TA.UO),
+    'WMA': (legacy_ta.WMA, TA.WMA),
+    'HMA': (legacy_ta.HMA, TA.HMA),
+    'IFT_RSI': (legacy_ta.IFT_RSI, TA.IFT_RSI),
+}
+
+
+def random_ohlcv(bars: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random walk ohlcv prices on an hourly index
+    """
+    rng = np.random.default_rng(seed)
+    close = 1.3 + np.cumsum(rng.normal(0, 0.001, bars))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0008, (2, bars)))
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread[0],
+        'low': np.minimum(open_, close) - spread[1],
+        'close': close,
+        'volume': rng.integers(1, 5000, bars).astype(float),
+    }, index=pd.date_range('2020-01-01', periods=bars, freq='H'))
+
+
+def timeit(func, ohlc: pd.DataFrame, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(ohlc.copy())
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(bars: int, repeat: int = 3, names: list = None) -> pd.DataFrame:
+    ohlc = random_ohlcv(bars)
+    rows = []
+    for name in names or CASES:
+        legacy, current = CASES[name]
+        legacy_seconds = timeit(legacy, ohlc, 1)
+        current_seconds = timeit(current, ohlc, repeat)
+        rows.append({
+            'indicator': name,
+            'legacy_seconds': round(legacy_seconds, 4),
+            'seconds': round(current_seconds, 4),
+            'speedup': round(legacy_seconds / current_seconds, 1),
+            'bars_per_second': round(bars / current_seconds),
+        })
+    return pd.DataFrame(rows).set_index('indicator')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark vectorized TA indicators against the row by row versions')
+    parser.add_argument('--bars', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('names', nargs='*', help=f'indicators to run, default to all of {list(CASES)}')
+    args = parser.parse_args()
+    print(run(args.bars, args.repeat, args.names).to_string())
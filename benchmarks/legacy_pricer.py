@@ -0,0 +1,23 @@
+"""
+Candle parsing of src.pricer as it was before being vectorized: one dateutil parse and one dict per candle,
+then drop_duplicates over all columns.
+Kept as the reference for parity tests and as the baseline of the benchmarks.
+"""
+import pandas as pd
+from dateutil import parser
+
+
+def transform(raw_data):
+    return [
+        {
+            'time': parser.parse(el.get('time')),
+            'open': float(el['mid']['o']),
+            'high': float(el['mid']['h']),
+            'low': float(el['mid']['l']),
+            'close': float(el['mid']['c'])
+        } for el in raw_data
+    ]
+
+
+def to_df(raw_data) -> pd.DataFrame:
+    return pd.DataFrame(transform(raw_data)).drop_duplicates().set_index('time').sort_index()
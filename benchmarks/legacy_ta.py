@@ -0,0 +1,363 @@
+"""
+Row by row implementations of TA indicators as they were before being vectorized.
+Kept as the reference for parity tests and as the baseline of the benchmarks, not to be used in strategies.
+"""
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from src.finta.ta import TA
+
+
+def DMI(ohlc: DataFrame, period: int = 14, adjust: bool = True) -> DataFrame:
+    ohlc = ohlc.copy()
+    ohlc["up_move"] = ohlc["high"].diff()
+    ohlc["down_move"] = -ohlc["low"].diff()
+
+    # positive Dmi
+    def _dmp(row):
+        if row["up_move"] > row["down_move"] and row["up_move"] > 0:
+            return row["up_move"]
+        else:
+            return 0
+
+    # negative Dmi
+    def _dmn(row):
+        if row["down_move"] > row["up_move"] and row["down_move"] > 0:
+            return row["down_move"]
+        else:
+            return 0
+
+    ohlc["plus"] = ohlc.apply(_dmp, axis=1)
+    ohlc["minus"] = ohlc.apply(_dmn, axis=1)
+
+    diplus = pd.Series(
+        100
+        * (ohlc["plus"] / TA.ATR(ohlc, period))
+        .ewm(span=period, adjust=adjust)
+        .mean(),
+        name="DI+",
+    )
+    diminus = pd.Series(
+        100
+        * (ohlc["minus"] / TA.ATR(ohlc, period))
+        .ewm(span=period, adjust=adjust)
+        .mean(),
+        name="DI-",
+    )
+
+    return pd.concat([diplus, diminus], axis=1)
+
+
+def ADX(ohlc: DataFrame, period: int = 14, adjust: bool = True) -> Series:
+    dmi = DMI(ohlc, period, adjust)
+    return pd.Series(
+        100
+        * (abs(dmi["DI+"] - dmi["DI-"]) / (dmi["DI+"] + dmi["DI-"]))
+        .ewm(alpha=1 / period, adjust=adjust)
+        .mean(),
+        name="{0} period ADX.".format(period),
+    )
+
+
+def MFI(ohlc: DataFrame, period: int = 14) -> Series:
+    tp = TA.TP(ohlc)
+    rmf = pd.Series(tp * ohlc["volume"], name="rmf")  ## Real Money Flow
+    _mf = pd.concat([tp, rmf], axis=1)
+    _mf["delta"] = _mf["TP"].diff()
+
+    def pos(row):
+        if row["delta"] > 0:
+            return row["rmf"]
+        else:
+            return 0
+
+    def neg(row):
+        if row["delta"] < 0:
+            return row["rmf"]
+        else:
+            return 0
+
+    _mf["neg"] = _mf.apply(neg, axis=1)
+    _mf["pos"] = _mf.apply(pos, axis=1)
+
+    mfratio = pd.Series(
+        _mf["pos"].rolling(window=period).sum()
+        / _mf["neg"].rolling(window=period).sum()
+    )
+
+    return pd.Series(
+        100 - (100 / (1 + mfratio)), name="{0} period MFI".format(period)
+    )
+
+
+def SQZMI(ohlc: DataFrame, period: int = 20, MA: Series = None) -> DataFrame:
+    if not isinstance(MA, pd.core.series.Series):
+        ma = pd.Series(TA.SMA(ohlc, period))
+    else:
+        ma = None
+
+    bb = TA.BBANDS(ohlc, period=period, MA=ma)
+    kc = TA.KC(ohlc, period=period, kc_mult=1.5)
+    comb = pd.concat([bb, kc], axis=1)
+
+    def sqz_on(row):
+        if row["BB_LOWER"] > row["KC_LOWER"] and row["BB_UPPER"] < row["KC_UPPER"]:
+            return True
+        else:
+            return False
+
+    comb["SQZ"] = comb.apply(sqz_on, axis=1)
+
+    return pd.Series(comb["SQZ"], name="{0} period SQZMI".format(period))
+
+
+def FVE(ohlc: DataFrame, period: int = 22, factor: int = 0.3) -> Series:
+    hl2 = (ohlc["high"] + ohlc["low"]) / 2
+    tp = TA.TP(ohlc)
+    smav = ohlc["volume"].rolling(window=period).mean()
+    mf = pd.Series((ohlc["close"] - hl2 + tp.diff()), name="mf")
+
+    _mf = pd.concat([ohlc["close"], ohlc["volume"], mf], axis=1)
+
+    def vol_shift(row):
+
+        if row["mf"] > factor * row["close"] / 100:
+            return row["volume"]
+        elif row["mf"] < -factor * row["close"] / 100:
+            return -row["volume"]
+        else:
+            return 0
+
+    _mf["vol_shift"] = _mf.apply(vol_shift, axis=1)
+    _sum = _mf["vol_shift"].rolling(window=period).sum()
+
+    return pd.Series((_sum / smav) / period * 100)
+
+
+def VFI(
+        ohlc: DataFrame,
+        period: int = 130,
+        smoothing_factor: int = 3,
+        factor: int = 0.2,
+        vfactor: int = 2.5,
+        adjust: bool = True,
+) -> Series:
+    typical = TA.TP(ohlc)
+    # historical interday volatility and cutoff
+    inter = typical.apply(np.log).diff()
+    # stdev of linear1
+    vinter = inter.rolling(window=30).std()
+    cutoff = pd.Series(factor * vinter * ohlc["close"], name="cutoff")
+    price_change = pd.Series(typical.diff(), name="pc")  # price change
+    mav = pd.Series(
+        ohlc["volume"].rolling(center=False, window=period).mean(), name="mav",
+    )
+
+    _va = pd.concat([ohlc["volume"], mav.shift()], axis=1)
+    _mp = pd.concat([price_change, cutoff], axis=1)
+    _mp.fillna(value=0, inplace=True)
+
+    def _vol_added(row):
+        """ Determine the maximum volume to be added"""
+
+        if row["volume"] > vfactor * row["mav"]:
+            return vfactor * row["mav"]
+        else:
+            return row["volume"]
+
+    added_vol = _va.apply(_vol_added, axis=1)
+
+    def _multiplier(row):
+        """
+        Determine whether the volume is up volume (multiplier +1) or
+        down volume (multiplier -1). If price change is smaller than cutoff
+        do not count volume (multipler 0).
+        """
+        if row["pc"] > row["cutoff"]:
+            return 1
+        elif row["pc"] < 0 - row["cutoff"]:
+            return -1
+        else:
+            return 0
+
+    multiplier = _mp.apply(_multiplier, axis=1)
+    raw_sum = (multiplier * added_vol).rolling(window=period).sum()
+    raw_value = raw_sum / mav.shift()
+
+    vfi = pd.Series(
+        raw_value.ewm(
+            ignore_na=False,
+            min_periods=smoothing_factor - 1,
+            span=smoothing_factor,
+            adjust=adjust,
+        ).mean(),
+        name="VFI",
+    )
+
+    return vfi
+
+
+def KAMA(
+        ohlc: DataFrame,
+        er: int = 10,
+        ema_fast: int = 2,
+        ema_slow: int = 30,
+        period: int = 20,
+) -> Series:
+
+    er = TA.ER(ohlc, er)
+    fast_alpha = 2 / (ema_fast + 1)
+    slow_alpha = 2 / (ema_slow + 1)
+    sc = pd.Series(
+        (er * (fast_alpha - slow_alpha) + slow_alpha) ** 2,
+        name="smoothing_constant",
+    )  ## smoothing constant
+
+    sma = pd.Series(
+        ohlc["close"].rolling(period).mean(), name="SMA"
+    )  ## first KAMA is SMA
+    kama = []
+    # Current KAMA = Prior KAMA + smoothing_constant * (Price - Prior KAMA)
+    for s, ma, price in zip(
+            sc.iteritems(), sma.shift().iteritems(), ohlc["close"].iteritems()
+    ):
+        try:
+            kama.append(kama[-1] + s[1] * (price[1] - kama[-1]))
+        except (IndexError, TypeError):
+            if pd.notnull(ma[1]):
+                kama.append(ma[1] + s[1] * (price[1] - ma[1]))
+            else:
+                kama.append(None)
+
+    sma["KAMA"] = pd.Series(
+        kama, index=sma.index, name="{0} period KAMA.".format(period)
+    )  ## apply the kama list to existing index
+    return sma["KAMA"]
+
+
+def SAR(ohlc: DataFrame, af: int = 0.02, amax: int = 0.2) -> Series:
+    high, low = ohlc.high, ohlc.low
+
+    # Starting values
+    sig0, xpt0, af0 = True, high[0], af
+    _sar = [low[0] - (high - low).std()]
+
+    for i in range(1, len(ohlc)):
+        sig1, xpt1, af1 = sig0, xpt0, af0
+
+        lmin = min(low[i - 1], low[i])
+        lmax = max(high[i - 1], high[i])
+
+        if sig1:
+            sig0 = low[i] > _sar[-1]
+            xpt0 = max(lmax, xpt1)
+        else:
+            sig0 = high[i] >= _sar[-1]
+            xpt0 = min(lmin, xpt1)
+
+        if sig0 == sig1:
+            sari = _sar[-1] + (xpt1 - _sar[-1]) * af1
+            af0 = min(amax, af1 + af)
+
+            if sig0:
+                af0 = af0 if xpt0 > xpt1 else af1
+                sari = min(sari, lmin)
+            else:
+                af0 = af0 if xpt0 < xpt1 else af1
+                sari = max(sari, lmax)
+        else:
+            af0 = af
+            sari = xpt0
+
+        _sar.append(sari)
+
+    return pd.Series(_sar, index=ohlc.index)
+
+
+def UO(ohlc: DataFrame) -> Series:
+
+    k = []  # current low or past close
+    for row, _row in zip(ohlc.itertuples(), ohlc.shift(1).itertuples()):
+        k.append(min(row.low, _row.close))
+    bp = pd.Series(ohlc["close"] - k, name="bp")  # Buying pressure
+
+    Average7 = bp.rolling(window=7).sum() / TA.TR(ohlc).rolling(window=7).sum()
+    Average14 = bp.rolling(window=14).sum() / TA.TR(ohlc).rolling(window=14).sum()
+    Average28 = bp.rolling(window=28).sum() / TA.TR(ohlc).rolling(window=28).sum()
+
+    return pd.Series(
+        (100 * ((4 * Average7) + (2 * Average14) + Average28)) / (4 + 2 + 1)
+    )
+
+
+def WMA(ohlc: DataFrame, period: int = 9, column: str = "close") -> Series:
+    d = (period * (period + 1)) / 2  # denominator
+    _weights = pd.Series(np.arange(1, period + 1))
+    weights = _weights.iloc[::-1]  # reverse the series
+
+    def linear(w):
+        def _compute(x):
+            return (w * x).sum() / d
+
+        return _compute
+
+    close_ = ohlc["close"].rolling(period, min_periods=period)
+    wma = close_.apply(linear(weights), raw=True)
+
+    return pd.Series(wma, name="{0} period WMA.".format(period))
+
+
+def HMA(ohlc: DataFrame, period: int = 16) -> Series:
+    import math
+
+    ohlc = ohlc.copy()
+
+    half_length = int(period / 2)
+    sqrt_length = int(math.sqrt(period))
+
+    wmaf = WMA(ohlc, period=half_length)
+    wmas = WMA(ohlc, period=period)
+    ohlc["deltawma"] = 2 * wmaf - wmas
+    hma = WMA(ohlc, column="deltawma", period=sqrt_length)
+
+    return pd.Series(hma, name="{0} period HMA.".format(period))
+
+
+def IFT_RSI(
+        ohlc: DataFrame, rsi_period: int = 14, wma_period: int = 9
+) -> Series:
+    v1 = pd.Series(0.1 * (TA.RSI(ohlc, rsi_period) - 50), name="v1")
+
+    ### v2 = WMA(wma_period) of v1
+    d = (wma_period * (wma_period + 1)) / 2  # denominator
+    rev = v1.iloc[::-1]  # reverse the series
+    wma = []
+
+    def _chunks(series, period):  # split into chunks of n elements
+        for i in enumerate(series):
+            c = rev.iloc[i[0]: i[0] + period]
+            if len(c) != period:
+                yield None
+            else:
+                yield c
+
+    def _wma(chunk, period):  # calculate wma for each chunk
+        w = []
+        for price, i in zip(chunk.iloc[::-1].items(), range(period + 1)[1:]):
+            w.append(price[1] * i / d)
+        return sum(w)
+
+    for i in _chunks(rev, wma_period):
+        try:
+            wma.append(_wma(i, wma_period))
+        except:
+            wma.append(None)
+
+    wma.reverse()  ##reverse the wma list to match the Series
+
+    v1["v2"] = pd.Series(wma, index=v1.index)
+    fish = pd.Series(
+        ((2 * v1["v2"]) - 1) ** 2 / ((2 * v1["v2"]) + 1) ** 2, name="IFT_RSI"
+    )
+    return fish
@@ -1,6 +1,8 @@
 from functools import reduce
 from itertools import groupby
+from typing import Tuple
 
+import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 
@@ -21,7 +23,7 @@ class BackTester:
     def run(self, price_feed: pd.DataFrame, orders: list, print_stats=True, output_csv=False, suffix='') -> pd.DataFrame:
         """
         bask testing strategies
-        :param price_feed: Price feed DataFrame
+        :param price_feed: Price feed DataFrame, an optional half_spread column fills at bid and ask prices, see fill_orders
         :param orders: list of Orders
         :param print_stats: bool, printout stats
         :param output_csv: bool, output csv
@@ -32,28 +34,7 @@ class BackTester:
         performance = []
         for time, ohlc in price_dict.items():
             for o in orders:
-                should_take_action = o.is_open and time >= o.last_update
-                if should_take_action:
-                    # Fill pending orders
-                    if o.is_pending:
-                        if o.is_long:
-                            if ohlc['high'] > o.entry:  # buy order filled
-                                o.fill(time)
-                        elif o.is_short:
-                            if ohlc['low'] < o.entry:  # sell order filled
-                                o.fill(time)
-                    # Close filled orders
-                    if o.is_filled:
-                        if o.is_long:
-                            if ohlc['low'] <= o.sl:
-                                o.close_with_loss(time)
-                            elif ohlc['high'] > o.tp:
-                                o.close_with_win(time)
-                        elif o.is_short:
-                            if ohlc['high'] >= o.sl:
-                                o.close_with_loss(time)
-                            elif ohlc['low'] < o.tp:
-                                o.close_with_win(time)
+                process_order(o, time, ohlc['high'], ohlc['low'], ohlc.get('half_spread', 0.))
 
             position = sum(o.pnl for o in orders) * self.lot_size + self.initial_cash  # 1 standard lot = 100,000
             performance.append({
@@ -69,6 +50,52 @@ class BackTester:
 
         return pd.DataFrame(performance).set_index('time')
 
+    def run_vectorized(self, price_feed: pd.DataFrame, orders: list, print_stats=True, output_csv=False, suffix='') -> pd.DataFrame:
+        """
+        Same as run, but fills and exits are resolved by the array based engine in fill_orders.
+        Orders are updated in place, so stats and csv output work the same way.
+        :param price_feed: Price feed DataFrame, index sorted ascending, an optional half_spread column fills at bid and ask prices
+        :param orders: list of Orders
+        :param print_stats: bool, printout stats
+        :param output_csv: bool, output csv
+        :param suffix: used for chart plotting in order to differentiate strategy with different parameters
+        :return: pd.DataFrame
+        """
+        times = price_feed.index
+        open_orders = [o for o in orders if o.is_open]
+        closed_pnl = sum(o.pnl for o in orders if not o.is_open)
+        fill_idx, close_idx, outcome = fill_orders(
+            high=price_feed['high'].to_numpy(dtype=np.float64),
+            low=price_feed['low'].to_numpy(dtype=np.float64),
+            start=times.searchsorted([o.last_update for o in open_orders], side='left'),
+            is_long=np.array([o.is_long for o in open_orders], dtype=bool),
+            entry=_to_float_array([o.entry for o in open_orders]),
+            sl=_to_float_array([o.sl for o in open_orders]),
+            tp=_to_float_array([o.tp for o in open_orders]),
+            is_pending=np.array([o.is_pending for o in open_orders], dtype=bool),
+            half_spread=price_feed['half_spread'].to_numpy(dtype=np.float64) if 'half_spread' in price_feed else None
+        )
+
+        pnl = np.zeros(len(times))
+        for o, filled_at, closed_at, result in zip(open_orders, fill_idx, close_idx, outcome):
+            if o.is_pending and filled_at >= 0:
+                o.fill(times[filled_at])
+            if result == 1:
+                o.close_with_win(times[closed_at])
+            elif result == -1:
+                o.close_with_loss(times[closed_at])
+            if result:
+                pnl[closed_at] += o.pnl
+
+        if print_stats:
+            self.print_stats(orders)
+
+        if output_csv:
+            self.output_csv(orders)
+
+        position = (np.cumsum(pnl) + closed_pnl) * self.lot_size + self.initial_cash  # 1 standard lot = 100,000
+        return pd.DataFrame({'time': times, f'pnl{suffix}': position}).set_index('time')
+
     @staticmethod
     def print_stats(orders) -> dict:
         wl_grps = list({k: list(g)} for k, g in groupby(orders, key=lambda x: x.outcome == 'win'))
@@ -139,3 +166,121 @@ class BackTester:
         plt.title(f'Performance of {self.strategy}')
         plt.legend()
         plt.show()
+
+
+def process_order(o, time, high: float, low: float, half_spread: float = 0.):
+    """
+    Fill and close a single order against one bar, in place
+    :param o: Order
+    :param time: bar time, orders last updated after it are skipped
+    :param high: bar high
+    :param low: bar low
+    :param half_spread: half the bid/ask spread of the bar, longs buy at mid + half_spread and sell at mid - half_spread
+    """
+    should_take_action = o.is_open and time >= o.last_update
+    if should_take_action:
+        half_spread = 0. if np.isnan(half_spread) else half_spread
+        # Fill pending orders
+        if o.is_pending:
+            if o.is_long:
+                if high + half_spread > o.entry:  # buy order filled
+                    o.fill(time)
+            elif o.is_short:
+                if low - half_spread < o.entry:  # sell order filled
+                    o.fill(time)
+        # Close filled orders
+        if o.is_filled:
+            if o.is_long:
+                if low - half_spread <= o.sl:
+                    o.close_with_loss(time)
+                elif high - half_spread > o.tp:
+                    o.close_with_win(time)
+            elif o.is_short:
+                if high + half_spread >= o.sl:
+                    o.close_with_loss(time)
+                elif low + half_spread < o.tp:
+                    o.close_with_win(time)
+
+
+def fill_orders(high: np.ndarray, low: np.ndarray, start: np.ndarray, is_long: np.ndarray, entry: np.ndarray, sl: np.ndarray, tp: np.ndarray,
+                is_pending: np.ndarray = None, block: int = 64, half_spread: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Array based fill engine, follows the same rules as BackTester.run:
+        pending long fills when high > entry, pending short fills when low < entry
+        filled long loses when low <= sl, otherwise wins when high > tp
+        filled short loses when high >= sl, otherwise wins when low < tp
+    With half_spread, high and low are mid prices and orders trade at the bid and ask: longs fill on the ask high
+    and exit on the bid low and bid high, shorts fill on the bid low and exit on the ask high and ask low.
+    An order is checked from its start bar and can be filled and closed on the same bar.
+    Each order scans forward in growing blocks, so short lived orders do not pay for the whole history.
+    :param high: high prices, one per bar
+    :param low: low prices, one per bar
+    :param start: index of the first bar each order is checked against
+    :param is_long: bool per order
+    :param entry: entry price per order
+    :param sl: stop loss per order, NaN for none
+    :param tp: take profit per order, NaN for none
+    :param is_pending: bool per order, defaults to all pending
+    :param block: initial number of bars scanned at once
+    :param half_spread: half the bid/ask spread per bar, e.g. from read_price_df(price='MBA'), defaults to trading at mid
+    :return: tuple of arrays per order: fill bar index, close bar index (-1 if never) and outcome (1 win, -1 loss, 0 open)
+    """
+    n_orders = len(start)
+    if is_pending is None:
+        is_pending = np.ones(n_orders, dtype=bool)
+    fill_idx = np.full(n_orders, -1, dtype=np.int64)
+    close_idx = np.full(n_orders, -1, dtype=np.int64)
+    outcome = np.zeros(n_orders, dtype=np.int8)
+    if half_spread is None:
+        ask_high = bid_high = high
+        ask_low = bid_low = low
+    else:
+        half_spread = np.nan_to_num(half_spread)
+        ask_high, bid_high = high + half_spread, high - half_spread
+        ask_low, bid_low = low + half_spread, low - half_spread
+
+    for k in range(n_orders):
+        if is_pending[k]:
+            if is_long[k]:
+                filled_at = _first_index(start[k], block, ask_high, entry[k], np.greater)
+            else:
+                filled_at = _first_index(start[k], block, bid_low, entry[k], np.less)
+        else:
+            filled_at = start[k] if start[k] < len(high) else -1
+        if filled_at < 0:
+            continue
+        fill_idx[k] = filled_at
+
+        if is_long[k]:
+            closed_at = _first_index(filled_at, block, bid_low, sl[k], np.less_equal, bid_high, tp[k], np.greater)
+            hit_sl = closed_at >= 0 and bid_low[closed_at] <= sl[k]
+        else:
+            closed_at = _first_index(filled_at, block, ask_high, sl[k], np.greater_equal, ask_low, tp[k], np.less)
+            hit_sl = closed_at >= 0 and ask_high[closed_at] >= sl[k]
+        if closed_at >= 0:
+            close_idx[k] = closed_at
+            outcome[k] = -1 if hit_sl else 1
+
+    return fill_idx, close_idx, outcome
+
+
+def _first_index(start, block, values, threshold, op, other_values=None, other_threshold=np.nan, other_op=None) -> int:
+    """
+    Index of the first bar from start where op(values, threshold) or other_op(other_values, other_threshold) holds, -1 if none
+    """
+    n = len(values)
+    while start < n:
+        stop = min(start + block, n)
+        hits = op(values[start:stop], threshold)
+        if other_op is not None:
+            hits |= other_op(other_values[start:stop], other_threshold)
+        found = np.flatnonzero(hits)
+        if found.size:
+            return start + int(found[0])
+        start = stop
+        block *= 2
+    return -1
+
+
+def _to_float_array(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
@@ -0,0 +1,152 @@
+"""
+Local SQLite store of candles keyed by (instrument, granularity, price component).
+Besides the candles, the store records which time ranges have been downloaded, so ranges without candles,
+e.g. weekends, are not downloaded again and read_price_df only has to fetch the gaps.
+Times are stored as UTC epoch seconds, ranges are half open [start, end).
+Bid/ask components, e.g. MBA, are stored as mid prices plus the half spread, see pricer.transform.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'candles.sqlite')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS candles ('
+    'instrument TEXT NOT NULL, granularity TEXT NOT NULL, component TEXT NOT NULL, time INTEGER NOT NULL,'
+    'open REAL, high REAL, low REAL, close REAL, half_spread REAL,'
+    'PRIMARY KEY (instrument, granularity, component, time)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS coverage ('
+    'instrument TEXT NOT NULL, granularity TEXT NOT NULL, component TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL)',
+)
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+SPREAD_COLUMN = 'half_spread'
+
+
+def to_epoch(dt) -> int:
+    """
+    Epoch seconds of a datetime, naive datetimes are taken as UTC like in the Oanda queries
+    """
+    ts = pd.Timestamp(dt)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return ts.value // 10 ** 9
+
+
+def from_epoch(seconds: int) -> datetime:
+    """
+    Naive UTC datetime of epoch seconds
+    """
+    return pd.Timestamp(seconds, unit='s').to_pydatetime()
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Merge overlapping and adjacent ranges
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: int, end: int, covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Parts of [start, end) not covered by the sorted, merged ranges
+    """
+    gaps = []
+    for s, e in covered:
+        if e <= start or s >= end:
+            continue
+        if s > start:
+            gaps.append((start, s))
+        start = max(start, e)
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+
+class CandleStore(object):
+    """
+    Candles and downloaded ranges in one SQLite file, safe to share between threads and processes
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        :param path: SQLite file, created if it does not exist
+        """
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            # stores created before bid/ask support
+            if SPREAD_COLUMN not in [row[1] for row in conn.execute('PRAGMA table_info(candles)')]:
+                conn.execute(f'ALTER TABLE candles ADD COLUMN {SPREAD_COLUMN} REAL')
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per call, SQLite serialises the writers
+        return sqlite3.connect(self.path, timeout=30)
+
+    def coverage(self, instrument: str, granularity: str, component: str = 'M') -> List[Tuple[int, int]]:
+        """
+        :return: sorted list of downloaded [start, end) ranges in epoch seconds
+        """
+        with closing(self._connect()) as conn:
+            return self._coverage(conn, instrument, granularity, component)
+
+    @staticmethod
+    def _coverage(conn: sqlite3.Connection, instrument: str, granularity: str, component: str) -> List[Tuple[int, int]]:
+        rows = conn.execute('SELECT start, end FROM coverage WHERE instrument=? AND granularity=? AND component=? ORDER BY start',
+                            (instrument, granularity, component)).fetchall()
+        return [tuple(r) for r in rows]
+
+    def missing(self, instrument: str, granularity: str, start: datetime, end: datetime, component: str = 'M') -> List[Tuple[datetime, datetime]]:
+        """
+        :return: list of the (start, end) ranges of [start, end) which have not been downloaded yet, as naive UTC datetimes
+        """
+        gaps = subtract_ranges(to_epoch(start), to_epoch(end), self.coverage(instrument, granularity, component))
+        return [(from_epoch(s), from_epoch(e)) for s, e in gaps]
+
+    def save(self, instrument: str, granularity: str, prices: pd.DataFrame, start: datetime, end: datetime, component: str = 'M'):
+        """
+        Store the candles downloaded for [start, end) and mark the range as covered, existing candles are replaced
+        :param prices: price DataFrame indexed by time with an optional half_spread column, see pricer.candles_to_df
+        """
+        times = pd.DatetimeIndex(prices.index)
+        times = times.tz_localize('UTC') if times.tz is None else times.tz_convert('UTC')
+        spreads = prices[SPREAD_COLUMN].astype(float).tolist() if SPREAD_COLUMN in prices else [None] * len(prices)
+        rows = zip([instrument] * len(prices), [granularity] * len(prices), [component] * len(prices),
+                   (times.asi8 // 10 ** 9).tolist(), *(prices[c].tolist() for c in PRICE_COLUMNS), spreads)
+        with closing(self._connect()) as conn, conn:
+            # read and rewrite the coverage in one write transaction so concurrent saves do not lose ranges
+            conn.execute('BEGIN IMMEDIATE')
+            covered = merge_ranges(self._coverage(conn, instrument, granularity, component) + [(to_epoch(start), to_epoch(end))])
+            conn.executemany('INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            conn.execute('DELETE FROM coverage WHERE instrument=? AND granularity=? AND component=?', (instrument, granularity, component))
+            conn.executemany('INSERT INTO coverage VALUES (?, ?, ?, ?, ?)', [(instrument, granularity, component, s, e) for s, e in covered])
+
+    def load(self, instrument: str, granularity: str, start: datetime, end: datetime = None, component: str = 'M') -> pd.DataFrame:
+        """
+        :return: stored candles of [start, end) as a price DataFrame indexed by UTC time,
+                 with a float32 half_spread column for components with bid and ask prices
+        """
+        query = 'SELECT time, open, high, low, close, half_spread FROM candles WHERE instrument=? AND granularity=? AND component=? AND time>=?'
+        params = [instrument, granularity, component, to_epoch(start)]
+        if end is not None:
+            query += ' AND time<?'
+            params.append(to_epoch(end))
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(query + ' ORDER BY time', conn, params=params)
+        df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
+        df = df.set_index('time').astype(float)
+        if 'B' in component and 'A' in component:
+            return df.astype({SPREAD_COLUMN: np.float32})
+        return df.drop(columns=SPREAD_COLUMN)
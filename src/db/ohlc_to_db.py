@@ -2,7 +2,8 @@ import sqlite3
 from datetime import datetime
 from sqlite3 import Error
 import pandas as pd
-from src.pricer import read_price_df
+from src.db.sinks import SqliteSink, consume
+from src.pricer import iter_price_chunks, read_price_df
 
 DB_FILE_PATH = 'db.sqlite'
 
@@ -59,12 +60,24 @@ def insert_df_to_table(data: pd.DataFrame, table_name: str):
 
 
 def read_price(start_date: datetime, end_date: datetime, instrument: str = 'GBP_USD') -> pd.DataFrame:
-    price_df = read_price_df(instrument=instrument, granularity='S5', start=start_date, end=end_date, max_count=4000)
+    price_df = read_price_df(instrument=instrument, granularity='S5', start=start_date, end=end_date)
     price_df.reset_index(level=0, inplace=True)
-    price_df['time'] = price_df['time'].apply(lambda x: x.strftime('%Y-%m-%d %H:%M:%S'))
+    price_df['time'] = price_df['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
     return price_df
 
 
+def stream_price_to_db(start_date: datetime, end_date: datetime, instrument: str = 'GBP_USD', db_file: str = DB_FILE_PATH) -> int:
+    """
+    Download S5 candles window by window into the {ccy_pair}_ohlc table, memory does not grow with the date range
+    :return: number of candles written
+    """
+    table_name = f"{instrument.lower().replace('_', '')}_ohlc"
+    with SqliteSink(db_file, table_name) as sink:
+        rows = consume(iter_price_chunks(instrument=instrument, granularity='S5', start=start_date, end=end_date), sink)
+    print(f'SQL insert process finished, {rows} candles written to {table_name}')
+    return rows
+
+
 def get_column_names_from_db_table(sql_cursor, table_name):
     """
     Scrape the column names from a database table to a list
@@ -90,6 +103,5 @@ if __name__ == '__main__':
     start = datetime(2015, 1, 1, 0, 0, 0)
     to = datetime(2020, 7, 31, 23, 59, 59)
 
-    df = read_price(start_date=start, end_date=to, instrument=ccy_pair)
     # pattern: currency_pair _ ohlc
-    insert_df_to_table(data=df, table_name=f"{ccy_pair.lower().replace('_', '')}_ohlc")
+    stream_price_to_db(start_date=start, end_date=to, instrument=ccy_pair)
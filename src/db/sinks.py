@@ -0,0 +1,170 @@
+"""
+Sinks writing streams of price chunks, e.g. from pricer.iter_price_chunks, incrementally to storage.
+Only the current chunk is held in memory, so writing years of S5 candles needs as much memory as a few windows.
+
+    with SqliteSink('db.sqlite', 'usdjpy_ohlc') as sink:
+        consume(iter_price_chunks('USD_JPY', 'S5', start, end), sink)
+
+Every sink takes price DataFrames indexed by time with open, high, low and close columns and the optional half_spread
+column of bid/ask prices, see pricer.transform. Chunks with other columns are rejected rather than silently truncated.
+Compact chunks, see pricer.compact_prices, are indexed by int64 epoch seconds and are stored like the others.
+"""
+import os
+import shutil
+import sqlite3
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed by ParquetSink
+    pa = pq = None
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+SPREAD_COLUMN = 'half_spread'
+
+
+def stored_columns(chunk: pd.DataFrame) -> list:
+    """
+    :return: price columns of the chunk to store, half_spread included when present
+    :raise ValueError: if the chunk has columns the sinks can not store
+    """
+    unknown = [c for c in chunk.columns if c not in PRICE_COLUMNS and c != SPREAD_COLUMN]
+    if unknown:
+        raise ValueError(f'Can not store columns {unknown}, expected {PRICE_COLUMNS} and optionally {SPREAD_COLUMN}')
+    return PRICE_COLUMNS + [SPREAD_COLUMN] if SPREAD_COLUMN in chunk.columns else list(PRICE_COLUMNS)
+
+
+def chunk_times(chunk: pd.DataFrame) -> pd.DatetimeIndex:
+    """
+    :return: UTC times of the chunk, naive times are taken as UTC and an integer index as epoch seconds
+    """
+    if pd.api.types.is_integer_dtype(chunk.index):
+        return pd.to_datetime(chunk.index, unit='s', utc=True)
+    times = pd.DatetimeIndex(chunk.index)
+    return times.tz_localize('UTC') if times.tz is None else times.tz_convert('UTC')
+
+
+class Sink(object):
+    """
+    Base class of the sinks, usable as a context manager which closes the sink on exit
+    """
+
+    def write(self, chunk: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def consume(chunks: Iterable[pd.DataFrame], *sinks: Sink) -> int:
+    """
+    Write every chunk to all sinks
+    :return: number of rows written
+    """
+    rows = 0
+    for chunk in chunks:
+        for sink in sinks:
+            sink.write(chunk)
+        rows += len(chunk)
+    return rows
+
+
+class SqliteSink(Sink):
+    """
+    Insert chunks into a table with the layout of db.ohlc_to_db: time as 'YYYY-mm-dd HH:MM:SS' UTC text primary key
+    and decimal prices. A nullable half_spread column is added to the table by the first chunk carrying one.
+    Rows with an existing time are replaced, each chunk is committed on its own.
+    """
+
+    def __init__(self, path: str, table: str):
+        self.table = table
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                          '(time VARCHAR NOT NULL PRIMARY KEY, open DECIMAL, high DECIMAL, low DECIMAL, close DECIMAL)')
+
+    def write(self, chunk: pd.DataFrame):
+        columns = stored_columns(chunk)
+        if SPREAD_COLUMN in columns and SPREAD_COLUMN not in [row[1] for row in self.conn.execute(f'PRAGMA table_info({self.table})')]:
+            with self.conn:
+                self.conn.execute(f'ALTER TABLE {self.table} ADD COLUMN {SPREAD_COLUMN} DECIMAL')
+        rows = zip(chunk_times(chunk).strftime('%Y-%m-%d %H:%M:%S'), *(chunk[c].astype(float).tolist() for c in columns))
+        with self.conn:
+            self.conn.executemany(f'INSERT OR REPLACE INTO {self.table} (time, {", ".join(columns)}) '
+                                  f'VALUES ({", ".join("?" * (len(columns) + 1))})', rows)
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetSink(Sink):
+    """
+    Append chunks as row groups of one Parquet file, time is stored as a UTC timestamp column. Requires pyarrow.
+    """
+
+    def __init__(self, path: str):
+        if pq is None:
+            raise ImportError('ParquetSink requires pyarrow, pip install pyarrow')
+        self.path = path
+        self.writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        table = pa.Table.from_pandas(chunk.reset_index(), preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class NpySink(Sink):
+    """
+    One .npy file per column in a directory: time as int64 epoch seconds, the prices as dtype and half_spread as float32
+    when the chunks have one. Data is appended to raw files while streaming, the .npy headers are written on close once
+    the length is known. All chunks must have the same columns.
+    """
+
+    def __init__(self, directory: str, dtype=np.float64):
+        self.directory = directory
+        self.dtypes = dict({'time': np.dtype(np.int64)}, **{c: np.dtype(dtype) for c in PRICE_COLUMNS})
+        self.rows = 0
+        os.makedirs(directory, exist_ok=True)
+        self.files = {c: open(self._path(c) + '.part', 'wb') for c in self.dtypes}
+        self.columns = None  # price columns of the first chunk
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f'{column}.npy')
+
+    def write(self, chunk: pd.DataFrame):
+        columns = stored_columns(chunk)
+        if self.columns is None:
+            self.columns = columns
+            if SPREAD_COLUMN in columns:
+                self.dtypes[SPREAD_COLUMN] = np.dtype(np.float32)
+                self.files[SPREAD_COLUMN] = open(self._path(SPREAD_COLUMN) + '.part', 'wb')
+        elif columns != self.columns:
+            raise ValueError(f'Chunk columns {columns} differ from the columns {self.columns} of the previous chunks')
+        self.files['time'].write((chunk_times(chunk).asi8 // 10 ** 9).astype(self.dtypes['time']).tobytes())
+        for c in columns:
+            self.files[c].write(chunk[c].to_numpy(dtype=self.dtypes[c]).tobytes())
+        self.rows += len(chunk)
+
+    def close(self):
+        for column, part in self.files.items():
+            part.close()
+            with open(self._path(column), 'wb') as out, open(part.name, 'rb') as data:
+                header = {'descr': np.lib.format.dtype_to_descr(self.dtypes[column]), 'fortran_order': False, 'shape': (self.rows,)}
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(data, out)
+            os.remove(part.name)
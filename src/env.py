@@ -1,12 +1,18 @@
 import configparser
 import logging
 import os
+import threading
+from typing import Dict
 
 from oandapyV20 import API
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(format='%(asctime)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# max connections kept open per host, override with pool_size in the [oanda] section of the config
+DEFAULT_POOL_SIZE = 10
+
 
 class Env(object):
     """
@@ -17,11 +23,57 @@ class Env(object):
         self.config = configparser.ConfigParser()
         # Default to practice environment
         self.env = 'practice'
+        self._clients = {}
+        self._lock = threading.Lock()
         self.load_config(self.env)
 
     @property
-    def api(self):
-        return API(environment=self.env, access_token=self.config['oanda']['access_token'])
+    def api(self) -> API:
+        """
+        Client of the current environment. It is created once per environment and access token and shared by all
+        threads, so its connections are kept alive and reused across requests
+        """
+        token = self.config['oanda']['access_token']
+        with self._lock:
+            key = (self.env, token)
+            if key not in self._clients:
+                self._clients[key] = self._create_client(token)
+            return self._clients[key]
+
+    def _create_client(self, token: str) -> API:
+        pool_size = self.config['oanda'].getint('pool_size', DEFAULT_POOL_SIZE)
+        client = API(environment=self.env, access_token=token)
+        # one pool for the api and one for the stream host, the spare ones avoid evicting pools and their counters
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        client.client.mount('https://', adapter)
+        client.client.mount('http://', adapter)
+        logger.info(f'Created {self.env} API client with a pool of {pool_size} connections per host')
+        return client
+
+    def connection_metrics(self) -> Dict[str, int]:
+        """
+        :return: dict of requests sent, connections opened and requests reusing an open connection, over all clients
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+        sent = opened = 0
+        for client in clients:
+            pools = client.client.get_adapter('https://').poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    sent += pool.num_requests
+                    opened += pool.num_connections
+        return {'requests': sent, 'opened': opened, 'reused': sent - opened}
+
+    def close(self):
+        """
+        Close the connections of all clients
+        """
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
 
     def get_account(self, name: str) -> str:
         # Oanda by default have 2 accounts: primary and mt4
@@ -0,0 +1,352 @@
+"""
+Feature graph for indicator computation.
+
+Callers ask for named features, e.g. atr_14, rsi_14, last_20_high or ema_55, instead of calling indicators directly.
+A feature declares the features it depends on, so shared inputs such as true range or ATR are computed once
+and reused: adx_14, di_plus_14 and atr_14 all share a single atr_14 node.
+Every node is computed at most once per FeatureEngine, i.e. per (instrument, granularity, range) when engines are
+obtained from feature_engine(), and can optionally be persisted to disk as .npy files.
+compute_features and build_features fan the same features out over many instruments on a thread or process pool.
+
+Supported names:
+    open, high, low, close, volume   price columns
+    tp, tr                           typical price, true range
+    sma_{n}, ema_{n}, smma_{n}       moving averages of close
+    atr_{n}                          rolling mean of true range, same as TA.ATR
+    rsi_{n}                          same as TA.RSI
+    dm_plus, dm_minus                directional moves
+    di_plus_{n}, di_minus_{n}        same as TA.DMI
+    adx_{n}                          same as TA.ADX
+    macd_{fast}_{slow}               MACD line, same as TA.MACD
+    macd_signal_{fast}_{slow}_{n}    MACD signal line
+    bb_upper_{n}, bb_lower_{n}       Bollinger bands with 2 standard deviations, same as TA.BBANDS
+    std_{n}                          rolling standard deviation of close
+    last_{n}_high, last_{n}_low      highest high and lowest low of the last n bars
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.finta import core
+from src.pricer import read_price_df
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# (pattern, dependencies of a match, compute from the match and the dependency arrays)
+_DEFINITIONS = []
+
+
+def feature(pattern: str, depends: Callable[..., List[str]]):
+    """
+    Register a feature definition
+    :param pattern: regex of the feature names, groups are passed to depends and to the decorated function as ints
+    :param depends: function of the groups returning the names of the features it depends on
+    """
+
+    def decorator(func):
+        _DEFINITIONS.append((re.compile(f'^{pattern}$'), depends, func))
+        return func
+
+    return decorator
+
+
+@feature('tp', lambda: ['high', 'low', 'close'])
+def _tp(high, low, close, dtype):
+    return core.typical_price(high, low, close, dtype=dtype)
+
+
+@feature('tr', lambda: ['high', 'low', 'close'])
+def _tr(high, low, close, dtype):
+    return core.true_range(high, low, close, dtype=dtype)
+
+
+@feature(r'sma_(\d+)', lambda n: ['close'])
+def _sma(n, close, dtype):
+    return core.sma(close, n, dtype=dtype)
+
+
+@feature(r'ema_(\d+)', lambda n: ['close'])
+def _ema(n, close, dtype):
+    return core.ewm(close, span=n, dtype=dtype)
+
+
+@feature(r'smma_(\d+)', lambda n: ['close'])
+def _smma(n, close, dtype):
+    return core.ewm(close, alpha=1 / n, dtype=dtype)
+
+
+@feature(r'std_(\d+)', lambda n: ['close'])
+def _std(n, close, dtype):
+    return core.rolling_std(close, n, dtype=dtype)
+
+
+@feature(r'atr_(\d+)', lambda n: ['tr'])
+def _atr(n, tr, dtype):
+    return core.sma(tr, n, dtype=dtype)
+
+
+@feature(r'rsi_(\d+)', lambda n: ['close'])
+def _rsi(n, close, dtype):
+    return core.rsi(close, n, dtype=dtype)
+
+
+@feature('dm_plus', lambda: ['high', 'low'])
+def _dm_plus(high, low, dtype):
+    return core.directional_moves(high, low)[0].astype(dtype, copy=False)
+
+
+@feature('dm_minus', lambda: ['high', 'low'])
+def _dm_minus(high, low, dtype):
+    return core.directional_moves(high, low)[1].astype(dtype, copy=False)
+
+
+@feature(r'di_plus_(\d+)', lambda n: ['dm_plus', f'atr_{n}'])
+def _di_plus(n, dm_plus, atr, dtype):
+    return core.directional_index(dm_plus, atr, n, dtype=dtype)
+
+
+@feature(r'di_minus_(\d+)', lambda n: ['dm_minus', f'atr_{n}'])
+def _di_minus(n, dm_minus, atr, dtype):
+    return core.directional_index(dm_minus, atr, n, dtype=dtype)
+
+
+@feature(r'adx_(\d+)', lambda n: [f'di_plus_{n}', f'di_minus_{n}'])
+def _adx(n, di_plus, di_minus, dtype):
+    return core.adx_from_dmi(di_plus, di_minus, n, dtype=dtype)
+
+
+@feature(r'macd_(\d+)_(\d+)', lambda fast, slow: ['close'])
+def _macd(fast, slow, close, dtype):
+    return core.macd(close, fast, slow, dtype=dtype)[0]
+
+
+@feature(r'macd_signal_(\d+)_(\d+)_(\d+)', lambda fast, slow, signal: [f'macd_{fast}_{slow}'])
+def _macd_signal(fast, slow, signal, macd, dtype):
+    return core.ewm(macd, span=signal, dtype=dtype)
+
+
+@feature(r'bb_upper_(\d+)', lambda n: [f'sma_{n}', f'std_{n}'])
+def _bb_upper(n, sma, std, dtype):
+    return (core.as_array(sma) + 2 * core.as_array(std)).astype(dtype, copy=False)
+
+
+@feature(r'bb_lower_(\d+)', lambda n: [f'sma_{n}', f'std_{n}'])
+def _bb_lower(n, sma, std, dtype):
+    return (core.as_array(sma) - 2 * core.as_array(std)).astype(dtype, copy=False)
+
+
+@feature(r'last_(\d+)_high', lambda n: ['high'])
+def _last_high(n, high, dtype):
+    return core.rolling_max(high, n, dtype=dtype)
+
+
+@feature(r'last_(\d+)_low', lambda n: ['low'])
+def _last_low(n, low, dtype):
+    return core.rolling_min(low, n, dtype=dtype)
+
+
+def _resolve(name: str):
+    for pattern, depends, func in _DEFINITIONS:
+        match = pattern.match(name)
+        if match:
+            args = [int(g) for g in match.groups()]
+            return args, depends(*args), func
+    raise ValueError(f'Unknown feature: {name}')
+
+
+class FeatureEngine(object):
+    """
+    Compute named features of one price frame, each feature is computed once and memoized
+    """
+
+    def __init__(self, prices: pd.DataFrame, cache_dir: str = None, dtype=None):
+        """
+        :param prices: ohlc(v) price DataFrame
+        :param cache_dir: directory to persist computed features to, default to no persistence
+        :param dtype: dtype of the computed features, default to float32 for compact prices and float64 otherwise
+        """
+        self.prices = prices
+        self.cache_dir = cache_dir
+        self.dtype = np.dtype(dtype or core.result_dtype(prices['close']))
+        self.computed = []  # names of the features computed by this engine, in order
+        self._values = {}
+        self._key = None
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        :param name: feature name, e.g. atr_14
+        :return: array aligned to the price index
+        """
+        if name in self._values:
+            return self._values[name]
+        if name in PRICE_COLUMNS:
+            values = core.as_array(self.prices[name])
+        else:
+            values = self._load(name)
+            if values is None:
+                args, depends, func = _resolve(name)
+                values = func(*args, *[self.get(d) for d in depends], dtype=self.dtype)
+                self.computed.append(name)
+                self._save(name, values)
+        self._values[name] = values
+        return values
+
+    def frame(self, names: Sequence[str], columns: Dict[str, str] = None) -> pd.DataFrame:
+        """
+        :param names: feature names
+        :param columns: optional mapping of feature name to output column name
+        :return: DataFrame of the features indexed like the prices
+        """
+        columns = columns or {}
+        return pd.DataFrame({columns.get(name, name): self.get(name) for name in names}, index=self.prices.index)
+
+    def enrich(self, names: Sequence[str], columns: Dict[str, str] = None) -> pd.DataFrame:
+        """
+        :return: the prices with the requested features added as columns
+        """
+        return pd.concat([self.prices, self.frame(names, columns)], axis=1)
+
+    def _path(self, name: str, suffix: str = 'npy') -> str:
+        return os.path.join(self.cache_dir, f'{name}.{suffix}')
+
+    def price_key(self) -> str:
+        """
+        Identity of the prices persisted features are computed from: length, first and last time, dtype and a hash of
+        the close prices, so features of a revised download or another instrument with the same range are not reused
+        """
+        if self._key is None:
+            close = np.ascontiguousarray(core.as_array(self.prices['close']))
+            index = self.prices.index
+            first, last = (index[0], index[-1]) if len(index) else ('', '')
+            self._key = f'{len(index)}|{first}|{last}|{self.dtype.name}|{hashlib.sha1(close.tobytes()).hexdigest()}'
+        return self._key
+
+    def _load(self, name: str):
+        if self.cache_dir and os.path.exists(self._path(name)) and os.path.exists(self._path(name, 'key')):
+            with open(self._path(name, 'key')) as f:
+                key = f.read()
+            values = np.load(self._path(name))
+            if key == self.price_key() and len(values) == len(self.prices) and values.dtype == self.dtype:
+                return values
+            logger.info(f'Ignoring stale persisted feature [{name}]')
+        return None
+
+    def _save(self, name: str, values: np.ndarray):
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.save(self._path(name), values)
+            with open(self._path(name, 'key'), 'w') as f:
+                f.write(self.price_key())
+
+
+# most recently used engines of closed ranges, each holds its prices and features in memory
+MAX_ENGINES = 32
+_ENGINES = OrderedDict()
+
+
+def feature_engine(instrument: str, granularity: str, start: datetime, end: datetime = None, persist_dir: str = None,
+                   compact: bool = False) -> FeatureEngine:
+    """
+    Shared FeatureEngine of an instrument, granularity and date range, prices are read once with read_price_df.
+    The last MAX_ENGINES engines are kept. Open ended ranges, i.e. end=None, are not shared since their prices grow.
+    :param persist_dir: root directory to persist computed features to, default to no persistence
+    :param compact: read compact prices and compute float32 features, see pricer.compact_prices
+    """
+    key = (instrument, granularity, start, end, compact)
+    if key in _ENGINES:
+        _ENGINES.move_to_end(key)
+        return _ENGINES[key]
+
+    prices = read_price_df(instrument=instrument, granularity=granularity, start=start, end=end, compact=compact)
+    cache_dir = None
+    if persist_dir:
+        end_label = end.strftime('%Y%m%d%H%M') if end else 'latest'
+        dtype = core.result_dtype(prices['close'])
+        cache_dir = os.path.join(persist_dir, f'{instrument}_{granularity}_{start:%Y%m%d%H%M}_{end_label}_{np.dtype(dtype).name}')
+    engine = FeatureEngine(prices, cache_dir=cache_dir)
+    if end is not None:
+        _ENGINES[key] = engine
+        while len(_ENGINES) > MAX_ENGINES:
+            _ENGINES.popitem(last=False)
+    return engine
+
+
+def clear_engines():
+    _ENGINES.clear()
+
+
+def _instrument_features(instrument: str, names: Sequence[str], columns: Dict[str, str], dtype, prices: pd.DataFrame = None,
+                         granularity: str = None, start: datetime = None, end: datetime = None,
+                         compact: bool = False) -> Tuple[str, pd.DataFrame, float]:
+    """
+    Features of one instrument, prices are read with read_price_df when not given. Runs in the pool workers.
+    :return: tuple of instrument, features and elapsed seconds
+    """
+    started = time.perf_counter()
+    if prices is None:
+        prices = read_price_df(instrument=instrument, granularity=granularity, start=start, end=end, compact=compact)
+    frame = FeatureEngine(prices, dtype=dtype).frame(names, columns)
+    return instrument, frame, time.perf_counter() - started
+
+
+def _fan_out(tasks: List[dict], workers: int, mode: str) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+    if mode == 'thread':
+        executor = ThreadPoolExecutor
+    elif mode == 'process':
+        executor = ProcessPoolExecutor
+    else:
+        raise ValueError(f'Unsupported mode: {mode}, expecting thread or process')
+
+    frames, timings = {}, {}
+    started = time.perf_counter()
+    with executor(max_workers=workers) as pool:
+        futures = [pool.submit(_instrument_features, **task) for task in tasks]
+        for future in futures:
+            instrument, frame, elapsed = future.result()
+            frames[instrument] = frame
+            timings[instrument] = elapsed
+            logger.info(f'Computed {frame.shape[1]} features for [{instrument}] in {elapsed:.3f}s')
+    logger.info(f'Computed features for {len(tasks)} instruments in {time.perf_counter() - started:.3f}s ({mode} pool of {workers or "default"} workers)')
+    return frames, timings
+
+
+def compute_features(prices: Dict[str, pd.DataFrame], names: Sequence[str], columns: Dict[str, str] = None, workers: int = None,
+                     mode: str = 'thread', dtype=None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+    """
+    Compute the same features for many instruments in parallel.
+    Rolling and ewm kernels of pandas release the GIL, so threads scale with cores for most features.
+    Use mode='process' for features dominated by python code, e.g. path dependent kernels without numba.
+    :param prices: dict of instrument to ohlc(v) price DataFrame
+    :param names: feature names, see module docstring
+    :param columns: optional mapping of feature name to output column name
+    :param workers: pool size, default to the executor default
+    :param mode: thread or process
+    :param dtype: dtype of the computed features, default to float32 for compact prices and float64 otherwise
+    :return: tuple of dict of instrument to features DataFrame and dict of instrument to elapsed seconds
+    """
+    tasks = [dict(instrument=inst, names=list(names), columns=columns, dtype=dtype, prices=df) for inst, df in prices.items()]
+    return _fan_out(tasks, workers, mode)
+
+
+def build_features(instruments: Sequence[str], names: Sequence[str], granularity: str, start: datetime, end: datetime = None,
+                   columns: Dict[str, str] = None, workers: int = None, mode: str = 'thread',
+                   dtype=None, compact: bool = False) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+    """
+    Same as compute_features, prices are read with read_price_df inside the workers so downloads overlap too.
+    Timings include reading the prices.
+    :param compact: read compact prices, see pricer.compact_prices
+    """
+    tasks = [dict(instrument=inst, names=list(names), columns=columns, dtype=dtype, granularity=granularity, start=start, end=end,
+                  compact=compact) for inst in instruments]
+    return _fan_out(tasks, workers, mode)
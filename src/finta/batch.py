@@ -0,0 +1,111 @@
+"""
+Indicators for many instruments at once, on aligned 2D time x instrument arrays.
+
+Instruments rarely share every bar, so aligned arrays contain NaN for missing bars. Before computing, the bars of
+each instrument are packed to the top of their column, so every indicator sees the instrument's own consecutive bars,
+exactly as if it was computed on that instrument alone. Results are scattered back to the aligned positions and
+missing bars are NaN. Indicators only look back, so the NaN padding left at the bottom of packed columns never
+leaks into real values. Outputs are float32 when all inputs are float32, float64 otherwise.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.finta import core
+
+
+def to_wide(prices: Dict[str, pd.DataFrame], column: str) -> pd.DataFrame:
+    """
+    Align one column of many price feeds into a time x instrument frame, NaN for missing bars
+    :param prices: dict of instrument to ohlc DataFrame indexed by time
+    :param column: open/high/low/close
+    :return: pd.DataFrame
+    """
+    return pd.concat({inst: df[column] for inst, df in prices.items()}, axis=1).sort_index()
+
+
+class Packed(object):
+    """
+    Bars of each column moved to the top, in time order, NaN below
+    """
+
+    def __init__(self, *arrays: np.ndarray, dtype=core.DEFAULT_DTYPE):
+        arrays = [core.as_array(a, dtype) for a in arrays]
+        shape = arrays[0].shape
+        if len(shape) != 2 or any(a.shape != shape for a in arrays):
+            raise ValueError(f'Expecting 2D arrays of the same shape: {[a.shape for a in arrays]}')
+        self.valid = np.logical_and.reduce([~np.isnan(a) for a in arrays])
+        # stable sort of missing flags keeps the order of the valid bars
+        self.order = np.argsort(~self.valid, axis=0, kind='stable')
+        self.counts = self.valid.sum(axis=0)
+        below = np.arange(shape[0])[:, np.newaxis] >= self.counts
+        self.arrays = [np.where(below, np.nan, np.take_along_axis(a, self.order, axis=0)) for a in arrays]
+
+    def unpack(self, packed: np.ndarray) -> np.ndarray:
+        out = np.full(packed.shape, np.nan, dtype=packed.dtype)
+        np.put_along_axis(out, self.order, packed, axis=0)
+        # padding rows may hold carried forward values, e.g. ewm over NaN
+        out[~self.valid] = np.nan
+        return out
+
+
+@core.preserve_dtype
+def ema(close, period: int = 9, adjust: bool = True, dtype=None) -> np.ndarray:
+    packed = Packed(close)
+    return packed.unpack(core.ewm(packed.arrays[0], span=period, adjust=adjust, dtype=dtype))
+
+
+@core.preserve_dtype
+def smma(close, period: int = 42, adjust: bool = True, dtype=None) -> np.ndarray:
+    packed = Packed(close)
+    return packed.unpack(core.ewm(packed.arrays[0], alpha=1 / period, adjust=adjust, dtype=dtype))
+
+
+@core.preserve_dtype
+def atr(high, low, close, period: int = 14, method: str = 'sma', dtype=None) -> np.ndarray:
+    """
+    :param method: see core.atr
+    """
+    packed = Packed(high, low, close)
+    return packed.unpack(core.atr(*packed.arrays, period=period, method=method, dtype=dtype))
+
+
+@core.preserve_dtype
+def rsi(close, period: int = 14, adjust: bool = True, dtype=None) -> np.ndarray:
+    packed = Packed(close)
+    return packed.unpack(core.rsi(packed.arrays[0], period, adjust, dtype=dtype))
+
+
+@core.preserve_dtype
+def macd(close, period_fast: int = 12, period_slow: int = 26, signal: int = 9, adjust: bool = True,
+         dtype=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: tuple of MACD and signal line
+    """
+    packed = Packed(close)
+    line, signal_line = core.macd(packed.arrays[0], period_fast, period_slow, signal, adjust, dtype=dtype)
+    return packed.unpack(line), packed.unpack(signal_line)
+
+
+@core.preserve_dtype
+def bbands(close, period: int = 20, std_multiplier: float = 2,
+           dtype=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :return: tuple of upper, middle and lower bands
+    """
+    packed = Packed(close)
+    return tuple(packed.unpack(band) for band in core.bbands(packed.arrays[0], period, std_multiplier, dtype=dtype))
+
+
+@core.preserve_dtype
+def rolling_max(values, period: int, dtype=None) -> np.ndarray:
+    packed = Packed(values)
+    return packed.unpack(core.rolling_max(packed.arrays[0], period, dtype=dtype))
+
+
+@core.preserve_dtype
+def rolling_min(values, period: int, dtype=None) -> np.ndarray:
+    packed = Packed(values)
+    return packed.unpack(core.rolling_min(packed.arrays[0], period, dtype=dtype))
+
@@ -0,0 +1,256 @@
+"""
+Array level indicator core shared by TA and src.indicators.
+Functions take NumPy arrays (or anything np.asarray accepts) and return NumPy arrays of the requested dtype,
+they never modify their inputs. Rolling and exponential windows reuse the compiled pandas implementations
+on zero copy Series views, so results are identical to the pandas based versions.
+
+By default outputs are float32 for float32 inputs and float64 otherwise, see result_dtype. Calculations are done
+in float64 either way, only the outputs are rounded.
+
+Except for wma, inputs can also be 2D time x instrument arrays, every column is then computed independently
+in the same call. See src.finta.batch for handling missing bars.
+"""
+import functools
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DTYPE = np.float64
+COMPACT_DTYPE = np.float32
+
+
+def as_array(values, dtype=DEFAULT_DTYPE) -> np.ndarray:
+    """
+    View values as an array of dtype, only copies when a conversion is needed
+    """
+    if isinstance(values, (pd.Series, pd.Index)):
+        return values.to_numpy(dtype=dtype)
+    return np.asarray(values, dtype=dtype)
+
+
+def result_dtype(values) -> type:
+    """
+    Output dtype of an indicator of values: float32 for float32 input so compact price frames stay compact
+    end to end, float64 otherwise
+    """
+    if isinstance(values, pd.DataFrame):
+        compact = len(values.columns) > 0 and (values.dtypes == COMPACT_DTYPE).all()
+    else:
+        compact = getattr(values, 'dtype', None) == COMPACT_DTYPE
+    return COMPACT_DTYPE if compact else DEFAULT_DTYPE
+
+
+def preserve_dtype(func):
+    """
+    Resolve dtype=None to the result_dtype of the first argument
+    """
+
+    @functools.wraps(func)
+    def wrapper(values, *args, dtype=None, **kwargs):
+        return func(values, *args, dtype=result_dtype(values) if dtype is None else dtype, **kwargs)
+
+    return wrapper
+
+
+def _series(values):
+    values = as_array(values)
+    if values.ndim == 2:
+        return pd.DataFrame(values, copy=False)
+    return pd.Series(values, copy=False)
+
+
+def _out(values, dtype) -> np.ndarray:
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        values = values.to_numpy()
+    return values.astype(dtype, copy=False)
+
+
+@preserve_dtype
+def sma(values, period: int, min_periods: int = None, dtype=None) -> np.ndarray:
+    """
+    Simple moving average, NaN until `min_periods` values (default to period) are available
+    """
+    return _out(_series(values).rolling(period, min_periods=min_periods).mean(), dtype)
+
+
+@preserve_dtype
+def rolling_sum(values, period: int, dtype=None) -> np.ndarray:
+    return _out(_series(values).rolling(period).sum(), dtype)
+
+
+@preserve_dtype
+def rolling_std(values, period: int, min_periods: int = None, dtype=None) -> np.ndarray:
+    """
+    Rolling sample standard deviation (ddof=1)
+    """
+    return _out(_series(values).rolling(period, min_periods=min_periods).std(), dtype)
+
+
+@preserve_dtype
+def rolling_max(values, period: int, dtype=None) -> np.ndarray:
+    return _out(_series(values).rolling(period).max(), dtype)
+
+
+@preserve_dtype
+def rolling_min(values, period: int, dtype=None) -> np.ndarray:
+    return _out(_series(values).rolling(period).min(), dtype)
+
+
+@preserve_dtype
+def ewm(values, span: float = None, alpha: float = None, adjust: bool = True, min_periods: int = 0,
+        ignore_na: bool = False, dtype=None) -> np.ndarray:
+    """
+    Exponentially weighted mean, same parameters as pandas ewm
+    """
+    return _out(_series(values).ewm(span=span, alpha=alpha, adjust=adjust, min_periods=min_periods, ignore_na=ignore_na).mean(), dtype)
+
+
+@preserve_dtype
+def wma(values, period: int, dtype=None) -> np.ndarray:
+    """
+    Linearly weighted moving average as one convolution, the latest value gets the highest weight.
+    NaN for the first period - 1 values and for any window containing a NaN
+    """
+    values = as_array(values)
+    out = np.full(len(values), np.nan)
+    if 0 < period <= len(values):
+        # convolution flips the kernel, so the weights are given oldest first: the latest value gets weight period
+        weights = np.arange(1, period + 1, dtype=np.float64)[::-1] / (period * (period + 1) / 2)
+        out[period - 1:] = np.convolve(values, weights, mode="valid")
+    return _out(out, dtype)
+
+
+def shift(values, periods: int = 1) -> np.ndarray:
+    """
+    Shift values forward by periods, filling the head with NaN
+    """
+    values = as_array(values)
+    out = np.full(values.shape, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def diff(values, periods: int = 1) -> np.ndarray:
+    values = as_array(values)
+    return values - shift(values, periods)
+
+
+@preserve_dtype
+def typical_price(high, low, close, dtype=None) -> np.ndarray:
+    return _out((as_array(high) + as_array(low) + as_array(close)) / 3, dtype)
+
+
+@preserve_dtype
+def true_range(high, low, close, dtype=None) -> np.ndarray:
+    """
+    Largest of high - low, |high - previous close| and |previous close - low|, missing ranges are skipped
+    so the first bar is high - low
+    """
+    high, low = as_array(high), as_array(low)
+    prev_close = shift(close)
+    ranges = np.abs(high - low), np.abs(high - prev_close), np.abs(prev_close - low)
+    return _out(np.fmax(np.fmax(ranges[0], ranges[1]), ranges[2]), dtype)
+
+
+@preserve_dtype
+def atr(high, low, close, period: int = 14, method: str = 'sma', dtype=None) -> np.ndarray:
+    """
+    Average true range
+    :param method: how true range is averaged,
+        'sma': rolling mean (TA.ATR),
+        'ema': ewm with span=period (indicators.average_true_range),
+        'wilder': Wilder's smoothing, ewm with alpha=1/period and adjust=False (indicators.atr)
+    """
+    tr = true_range(high, low, close, dtype=DEFAULT_DTYPE)
+    if method == 'sma':
+        return sma(tr, period, dtype=dtype)
+    if method == 'ema':
+        return ewm(tr, span=period, dtype=dtype)
+    if method == 'wilder':
+        return ewm(tr, alpha=1 / period, adjust=False, dtype=dtype)
+    raise ValueError(f'Unsupported ATR method: {method}')
+
+
+@preserve_dtype
+def rsi(close, period: int = 14, adjust: bool = True, dtype=None) -> np.ndarray:
+    """
+    Relative strength index with ewm(span=period) averages of gains and losses
+    """
+    delta = diff(close)
+    with np.errstate(invalid='ignore'):
+        up = np.where(delta < 0, 0., delta)
+        down = np.abs(np.where(delta > 0, 0., delta))
+    gain = ewm(up, span=period, adjust=adjust)
+    loss = ewm(down, span=period, adjust=adjust)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _out(100 - (100 / (1 + gain / loss)), dtype)
+
+
+@preserve_dtype
+def macd(close, period_fast: int = 12, period_slow: int = 26, signal: int = 9, adjust: bool = True,
+         dtype=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: tuple of MACD and signal line
+    """
+    line = ewm(close, span=period_fast, adjust=adjust, dtype=DEFAULT_DTYPE) - ewm(close, span=period_slow, adjust=adjust, dtype=DEFAULT_DTYPE)
+    return _out(line, dtype), ewm(line, span=signal, adjust=adjust, dtype=dtype)
+
+
+@preserve_dtype
+def bbands(close, period: int = 20, std_multiplier: float = 2, middle=None,
+           dtype=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :param middle: middle band, default to the simple moving average
+    :return: tuple of upper, middle and lower bands
+    """
+    std = rolling_std(close, period, dtype=DEFAULT_DTYPE)
+    middle = sma(close, period, dtype=DEFAULT_DTYPE) if middle is None else as_array(middle)
+    return _out(middle + std_multiplier * std, dtype), _out(middle, dtype), _out(middle - std_multiplier * std, dtype)
+
+
+def directional_moves(high, low) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positive and negative directional moves into each bar, 0 when the other move is larger or for the first bar
+    """
+    up_move = diff(high)
+    down_move = -diff(low)
+    with np.errstate(invalid='ignore'):
+        plus = np.where((up_move > down_move) & (up_move > 0), up_move, 0.)
+        minus = np.where((down_move > up_move) & (down_move > 0), down_move, 0.)
+    return plus, minus
+
+
+@preserve_dtype
+def directional_index(moves, average_range, period: int = 14, adjust: bool = True, dtype=None) -> np.ndarray:
+    """
+    DI+ or DI-, directional moves over ATR smoothed by ewm(span=period)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = as_array(moves) / as_array(average_range)
+    return _out(100 * ewm(ratio, span=period, adjust=adjust), dtype)
+
+
+@preserve_dtype
+def dmi(high, low, close, period: int = 14, adjust: bool = True, dtype=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: tuple of DI+ and DI- over a rolling mean ATR
+    """
+    plus, minus = directional_moves(high, low)
+    average_range = atr(high, low, close, period, dtype=DEFAULT_DTYPE)
+    return (directional_index(plus, average_range, period, adjust, dtype=dtype),
+            directional_index(minus, average_range, period, adjust, dtype=dtype))
+
+
+@preserve_dtype
+def adx_from_dmi(plus, minus, period: int = 14, adjust: bool = True, dtype=None) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = np.abs(as_array(plus) - as_array(minus)) / (as_array(plus) + as_array(minus))
+    return _out(100 * ewm(dx, alpha=1 / period, adjust=adjust), dtype)
+
+
+@preserve_dtype
+def adx(high, low, close, period: int = 14, adjust: bool = True, dtype=None) -> np.ndarray:
+    plus, minus = dmi(high, low, close, period, adjust, dtype=DEFAULT_DTYPE)
+    return adx_from_dmi(plus, minus, period, adjust, dtype=dtype)
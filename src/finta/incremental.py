@@ -0,0 +1,393 @@
+"""
+Incremental indicators, updated one bar at a time in O(1).
+Each indicator follows the formula of its batch counterpart in TA, so feeding a whole history bar by bar
+gives the same values as calling TA on the whole DataFrame.
+A bar is anything with open/high/low/close attributes, e.g. a namedtuple.
+
+Indicator state can be saved with state() and restored with Indicator.from_state(), the state is a plain dict
+which can be dumped as json, so a live trader can carry on from where it stopped without replaying history.
+"""
+import math
+from collections import deque
+
+NAN = float('nan')
+INF = float('inf')
+
+_REGISTRY = {}
+
+
+def _div(a: float, b: float) -> float:
+    """
+    Float division with numpy semantics, i.e. x / 0 is +-inf and 0 / 0 is NaN instead of raising
+    """
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(INF, a) * math.copysign(1., b)
+    return a / b
+
+
+def _dump(value):
+    if isinstance(value, Stateful):
+        return value.state()
+    if isinstance(value, deque):
+        return {'deque': [_dump(v) for v in value], 'maxlen': value.maxlen}
+    if isinstance(value, (list, tuple)):
+        return [_dump(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if 'type' in value and 'state' in value:
+            return Stateful.from_state(value)
+        if 'deque' in value:
+            return deque((_load(v) for v in value['deque']), maxlen=value['maxlen'])
+        return {k: _load(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_load(v) for v in value]
+    return value
+
+
+class Stateful(object):
+    """
+    Serialize and restore the attributes of an object as a plain dict
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _REGISTRY[cls.__name__] = cls
+
+    def state(self) -> dict:
+        return {'type': type(self).__name__, 'state': {k: _dump(v) for k, v in self.__dict__.items()}}
+
+    @staticmethod
+    def from_state(state: dict):
+        obj = _REGISTRY[state['type']].__new__(_REGISTRY[state['type']])
+        obj.__dict__.update({k: _load(v) for k, v in state['state'].items()})
+        return obj
+
+
+class Indicator(Stateful):
+    """
+    Base class of incremental indicators
+    """
+
+    value = NAN
+
+    def update(self, bar):
+        raise NotImplementedError
+
+
+class EWM(Stateful):
+    """
+    Exponentially weighted mean of a stream of floats, same recurrence as pandas ewm(...).mean()
+    """
+
+    def __init__(self, alpha: float, adjust: bool = True, ignore_na: bool = False):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.ignore_na = ignore_na
+        self.value = NAN
+        self._old_wt = 1.
+
+    def update(self, x: float) -> float:
+        is_observation = x == x
+        if self.value == self.value:
+            if is_observation or not self.ignore_na:
+                new_wt = 1. if self.adjust else self.alpha
+                self._old_wt *= 1. - self.alpha
+                if is_observation:
+                    if self.value != x:
+                        self.value = (self._old_wt * self.value + new_wt * x) / (self._old_wt + new_wt)
+                    self._old_wt = self._old_wt + new_wt if self.adjust else 1.
+        elif is_observation:
+            self.value = x
+        return self.value
+
+
+class RollingSum(Stateful):
+    """
+    Sum of the last `window` floats with compensated (Neumaier) summation, NaN until the window is full of observations
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.
+        self._compensation = 0.
+        self._nans = 0
+
+    def _add(self, x: float):
+        t = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._compensation += (self._sum - t) + x
+        else:
+            self._compensation += (x - t) + self._sum
+        self._sum = t
+
+    def update(self, x: float) -> float:
+        if len(self._values) == self.window:
+            dropped = self._values[0]
+            if dropped == dropped:
+                self._add(-dropped)
+            else:
+                self._nans -= 1
+        self._values.append(x)
+        if x == x:
+            self._add(x)
+        else:
+            self._nans += 1
+        if len(self._values) < self.window or self._nans:
+            return NAN
+        return self._sum + self._compensation
+
+
+class RollingMeanStd(Stateful):
+    """
+    Mean and sample standard deviation of the last `window` floats, sliding Welford updates
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._n = 0
+        self._mean = 0.
+        self._m2 = 0.
+        self._nans = 0
+
+    def update(self, x: float) -> tuple:
+        if len(self._values) == self.window:
+            dropped = self._values[0]
+            if dropped == dropped:
+                self._n -= 1
+                if self._n:
+                    delta = dropped - self._mean
+                    self._mean -= delta / self._n
+                    self._m2 -= delta * (dropped - self._mean)
+                else:
+                    self._mean, self._m2 = 0., 0.
+            else:
+                self._nans -= 1
+        self._values.append(x)
+        if x == x:
+            self._n += 1
+            delta = x - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (x - self._mean)
+        else:
+            self._nans += 1
+        if len(self._values) < self.window or self._nans:
+            return NAN, NAN
+        return self._mean, math.sqrt(max(self._m2, 0.) / (self._n - 1)) if self._n > 1 else NAN
+
+
+class RollingExtreme(Stateful):
+    """
+    Maximum (or minimum) of the last `window` floats with a monotonic deque, NaN until the window is full of observations
+    """
+
+    def __init__(self, window: int, is_max: bool = True):
+        self.window = window
+        self.is_max = is_max
+        self._candidates = deque()  # [index, value], values monotonic from the front
+        self._index = -1
+        self._last_nan = -window
+
+    def update(self, x: float) -> float:
+        self._index += 1
+        if x != x:
+            self._last_nan = self._index
+        else:
+            while self._candidates and (self._candidates[-1][1] <= x if self.is_max else self._candidates[-1][1] >= x):
+                self._candidates.pop()
+            self._candidates.append([self._index, x])
+        while self._candidates and self._candidates[0][0] <= self._index - self.window:
+            self._candidates.popleft()
+        if self._index < self.window - 1 or self._index - self._last_nan < self.window:
+            return NAN
+        return self._candidates[0][1]
+
+
+class EMA(Indicator):
+    """
+    Same as TA.EMA
+    """
+
+    def __init__(self, period: int = 9, column: str = 'close', adjust: bool = True):
+        self.period = period
+        self.column = column
+        self._ewm = EWM(alpha=2 / (period + 1), adjust=adjust)
+
+    def update(self, bar) -> float:
+        self.value = self._ewm.update(getattr(bar, self.column))
+        return self.value
+
+
+class SMMA(Indicator):
+    """
+    Same as TA.SMMA
+    """
+
+    def __init__(self, period: int = 42, column: str = 'close', adjust: bool = True):
+        self.period = period
+        self.column = column
+        self._ewm = EWM(alpha=1 / period, adjust=adjust)
+
+    def update(self, bar) -> float:
+        self.value = self._ewm.update(getattr(bar, self.column))
+        return self.value
+
+
+class TR(Indicator):
+    """
+    Same as TA.TR
+    """
+
+    def __init__(self):
+        self._prev_close = NAN
+
+    def update(self, bar) -> float:
+        ranges = [abs(bar.high - bar.low), abs(bar.high - self._prev_close), abs(self._prev_close - bar.low)]
+        ranges = [r for r in ranges if not math.isnan(r)]
+        self.value = max(ranges) if ranges else NAN
+        self._prev_close = bar.close
+        return self.value
+
+
+class ATR(Indicator):
+    """
+    Same as TA.ATR, rolling mean of true range
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._tr = TR()
+        self._sum = RollingSum(period)
+
+    def update(self, bar) -> float:
+        self.value = self._sum.update(self._tr.update(bar)) / self.period
+        return self.value
+
+
+class RSI(Indicator):
+    """
+    Same as TA.RSI
+    """
+
+    def __init__(self, period: int = 14, adjust: bool = True):
+        self.period = period
+        self._prev_close = NAN
+        self._gain = EWM(alpha=2 / (period + 1), adjust=adjust)
+        self._loss = EWM(alpha=2 / (period + 1), adjust=adjust)
+
+    def update(self, bar) -> float:
+        delta = bar.close - self._prev_close
+        self._prev_close = bar.close
+        gain = self._gain.update(delta if delta != delta or delta > 0 else 0.)
+        loss = self._loss.update(abs(delta) if delta != delta or delta < 0 else 0.)
+        self.value = 100 - _div(100, 1 + _div(gain, loss))
+        return self.value
+
+
+class MACD(Indicator):
+    """
+    Same as TA.MACD, value is a tuple of (macd, signal)
+    """
+
+    def __init__(self, period_fast: int = 12, period_slow: int = 26, signal: int = 9, adjust: bool = True):
+        self._fast = EWM(alpha=2 / (period_fast + 1), adjust=adjust)
+        self._slow = EWM(alpha=2 / (period_slow + 1), adjust=adjust)
+        self._signal = EWM(alpha=2 / (signal + 1), adjust=adjust)
+        self.value = (NAN, NAN)
+
+    def update(self, bar) -> tuple:
+        macd = self._fast.update(bar.close) - self._slow.update(bar.close)
+        self.value = (macd, self._signal.update(macd))
+        return self.value
+
+
+class BBANDS(Indicator):
+    """
+    Same as TA.BBANDS with a simple moving average, value is a tuple of (upper, middle, lower)
+    """
+
+    def __init__(self, period: int = 20, column: str = 'close', std_multiplier: float = 2):
+        self.column = column
+        self.std_multiplier = std_multiplier
+        self._rolling = RollingMeanStd(period)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, bar) -> tuple:
+        middle, std = self._rolling.update(getattr(bar, self.column))
+        self.value = (middle + self.std_multiplier * std, middle, middle - self.std_multiplier * std)
+        return self.value
+
+
+class DMI(Indicator):
+    """
+    Same as TA.DMI, value is a tuple of (DI+, DI-)
+    """
+
+    def __init__(self, period: int = 14, adjust: bool = True):
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self._atr = ATR(period)
+        self._plus = EWM(alpha=2 / (period + 1), adjust=adjust)
+        self._minus = EWM(alpha=2 / (period + 1), adjust=adjust)
+        self.value = (NAN, NAN)
+
+    def update(self, bar) -> tuple:
+        up_move = bar.high - self._prev_high
+        down_move = self._prev_low - bar.low
+        self._prev_high, self._prev_low = bar.high, bar.low
+        plus = up_move if up_move > down_move and up_move > 0 else 0.
+        minus = down_move if down_move > up_move and down_move > 0 else 0.
+        atr = self._atr.update(bar)
+        self.value = (100 * self._plus.update(_div(plus, atr)), 100 * self._minus.update(_div(minus, atr)))
+        return self.value
+
+
+class ADX(Indicator):
+    """
+    Same as TA.ADX
+    """
+
+    def __init__(self, period: int = 14, adjust: bool = True):
+        self._dmi = DMI(period, adjust)
+        self._adx = EWM(alpha=1 / period, adjust=adjust)
+
+    def update(self, bar) -> float:
+        plus, minus = self._dmi.update(bar)
+        self.value = 100 * self._adx.update(_div(abs(plus - minus), plus + minus))
+        return self.value
+
+
+class RollingMax(Indicator):
+    """
+    Highest value of the last `period` bars, same as ohlc[column].rolling(period).max()
+    """
+
+    def __init__(self, period: int, column: str = 'high'):
+        self.column = column
+        self._extreme = RollingExtreme(period, is_max=True)
+
+    def update(self, bar) -> float:
+        self.value = self._extreme.update(getattr(bar, self.column))
+        return self.value
+
+
+class RollingMin(Indicator):
+    """
+    Lowest value of the last `period` bars, same as ohlc[column].rolling(period).min()
+    """
+
+    def __init__(self, period: int, column: str = 'low'):
+        self.column = column
+        self._extreme = RollingExtreme(period, is_max=False)
+
+    def update(self, bar) -> float:
+        self.value = self._extreme.update(getattr(bar, self.column))
+        return self.value
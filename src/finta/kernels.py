@@ -0,0 +1,106 @@
+"""
+Array kernels for path dependent indicators, i.e. the ones where each value depends on the previous one and
+cannot be expressed with whole column operations.
+Kernels take and return float64 NumPy arrays. They are compiled with numba when it is installed,
+otherwise they run as plain python loops, which is still much faster than indexing pandas Series element by element.
+"""
+import functools
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+def jit(func):
+    """
+    Compile func with numba if available, the python version is always kept as func.py_func.
+    Without numba, array arguments are passed to func as lists since indexing lists of floats is several times
+    faster than indexing arrays in python.
+    """
+    if njit is not None:
+        return njit(cache=True)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        return func(*[a.tolist() if isinstance(a, np.ndarray) else a for a in args])
+
+    wrapper.py_func = func
+    return wrapper
+
+
+@jit
+def kama(sc: np.ndarray, prior_sma: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Kaufman's adaptive moving average, seeded with the previous SMA
+    :param sc: smoothing constant
+    :param prior_sma: SMA of the previous bar, NaN until available
+    :param close: close prices
+    :return: KAMA, NaN until the first SMA is available
+    """
+    n = len(close)
+    out = np.full(n, np.nan)
+    started = False
+    last = np.nan
+    for i in range(n):
+        if started:
+            last = last + sc[i] * (close[i] - last)
+            out[i] = last
+        elif prior_sma[i] == prior_sma[i]:
+            last = prior_sma[i] + sc[i] * (close[i] - prior_sma[i])
+            out[i] = last
+            started = True
+    return out
+
+
+@jit
+def sar(high: np.ndarray, low: np.ndarray, start: float, af: float, amax: float) -> np.ndarray:
+    """
+    Parabolic stop and reverse
+    :param high: high prices
+    :param low: low prices
+    :param start: SAR of the first bar
+    :param af: acceleration factor step
+    :param amax: maximum acceleration factor
+    :return: SAR
+    """
+    n = len(high)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    out[0] = start
+    prev = start
+    sig0, xpt0, af0 = True, high[0], af
+    for i in range(1, n):
+        sig1, xpt1, af1 = sig0, xpt0, af0
+
+        # same as python min/max, the first argument wins when the comparison is False (NaN)
+        lmin = low[i] if low[i] < low[i - 1] else low[i - 1]
+        lmax = high[i] if high[i] > high[i - 1] else high[i - 1]
+
+        if sig1:
+            sig0 = low[i] > prev
+            xpt0 = xpt1 if xpt1 > lmax else lmax
+        else:
+            sig0 = high[i] >= prev
+            xpt0 = xpt1 if xpt1 < lmin else lmin
+
+        if sig0 == sig1:
+            sari = prev + (xpt1 - prev) * af1
+            af0 = af1 + af if af1 + af < amax else amax
+
+            if sig0:
+                af0 = af0 if xpt0 > xpt1 else af1
+                sari = lmin if lmin < sari else sari
+            else:
+                af0 = af0 if xpt0 < xpt1 else af1
+                sari = lmax if lmax > sari else sari
+        else:
+            af0 = af
+            sari = xpt0
+
+        out[i] = sari
+        prev = sari
+    return out
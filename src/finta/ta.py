@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from pandas import DataFrame, Series
 
+from src.finta import core, kernels
+
 
 class TA:
     __version__ = "0.4.3"
@@ -14,7 +16,8 @@ class TA:
         """
 
         return pd.Series(
-            ohlc[column].rolling(window=period).mean(),
+            core.sma(ohlc[column], period),
+            index=ohlc.index,
             name="{0} period SMA".format(period),
         )
 
@@ -69,7 +72,8 @@ class TA:
         """
 
         return pd.Series(
-            ohlc[column].ewm(span=period, adjust=adjust).mean(),
+            core.ewm(ohlc[column], span=period, adjust=adjust),
+            index=ohlc.index,
             name="{0} period EMA".format(period),
         )
 
@@ -231,23 +235,14 @@ class TA:
         sma = pd.Series(
             ohlc["close"].rolling(period).mean(), name="SMA"
         )  ## first KAMA is SMA
-        kama = []
         # Current KAMA = Prior KAMA + smoothing_constant * (Price - Prior KAMA)
-        for s, ma, price in zip(
-                sc.iteritems(), sma.shift().iteritems(), ohlc["close"].iteritems()
-        ):
-            try:
-                kama.append(kama[-1] + s[1] * (price[1] - kama[-1]))
-            except (IndexError, TypeError):
-                if pd.notnull(ma[1]):
-                    kama.append(ma[1] + s[1] * (price[1] - ma[1]))
-                else:
-                    kama.append(None)
-
-        sma["KAMA"] = pd.Series(
-            kama, index=sma.index, name="{0} period KAMA.".format(period)
-        )  ## apply the kama list to existing index
-        return sma["KAMA"]
+        kama = kernels.kama(
+            sc.to_numpy(dtype=np.float64),
+            sma.shift().to_numpy(dtype=np.float64),
+            ohlc["close"].to_numpy(dtype=np.float64),
+        )
+
+        return pd.Series(kama, index=ohlc.index, name="{0} period KAMA.".format(period))
 
     @classmethod
     def ZLEMA(cls, ohlc: DataFrame, period: int = 26, adjust: bool = True) -> Series:
@@ -278,20 +273,9 @@ class TA:
         :period: Specifies the number of Periods used for WMA calculation
         """
 
-        d = (period * (period + 1)) / 2  # denominator
-        _weights = pd.Series(np.arange(1, period + 1))
-        weights = _weights.iloc[::-1]  # reverse the series
-
-        def linear(w):
-            def _compute(x):
-                return (w * x).sum() / d
+        wma = core.wma(ohlc[column].to_numpy(), period)
 
-            return _compute
-
-        close_ = ohlc["close"].rolling(period, min_periods=period)
-        wma = close_.apply(linear(weights), raw=True)
-
-        return pd.Series(wma, name="{0} period WMA.".format(period))
+        return pd.Series(wma, index=ohlc.index, name="{0} period WMA.".format(period))
 
     @classmethod
     def HMA(cls, ohlc: DataFrame, period: int = 16) -> Series:
@@ -309,12 +293,11 @@ class TA:
         half_length = int(period / 2)
         sqrt_length = int(math.sqrt(period))
 
-        wmaf = cls.WMA(ohlc, period=half_length)
-        wmas = cls.WMA(ohlc, period=period)
-        ohlc["deltawma"] = 2 * wmaf - wmas
-        hma = cls.WMA(ohlc, column="deltawma", period=sqrt_length)
+        close = ohlc["close"].to_numpy()
+        deltawma = 2 * core.wma(close, half_length) - core.wma(close, period)
+        hma = core.wma(deltawma, sqrt_length)
 
-        return pd.Series(hma, name="{0} period HMA.".format(period))
+        return pd.Series(hma, index=ohlc.index, name="{0} period HMA.".format(period))
 
     @classmethod
     def EVWMA(cls, ohlcv: DataFrame, period: int = 20) -> Series:
@@ -369,7 +352,7 @@ class TA:
         """The SMMA (Smoothed Moving Average) gives recent prices an equal weighting to historic prices."""
 
         return pd.Series(
-            ohlc[column].ewm(alpha=1 / period, adjust=adjust).mean(), name="SMMA"
+            core.ewm(ohlc[column], alpha=1 / period, adjust=adjust), index=ohlc.index, name="SMMA"
         )
 
     @classmethod
@@ -425,18 +408,9 @@ class TA:
         A bearish crossover occurs when the MACD turns down and crosses below the signal line.
         """
 
-        EMA_fast = pd.Series(
-            ohlc["close"].ewm(ignore_na=False, span=period_fast, adjust=adjust).mean(),
-            name="EMA_fast",
-        )
-        EMA_slow = pd.Series(
-            ohlc["close"].ewm(ignore_na=False, span=period_slow, adjust=adjust).mean(),
-            name="EMA_slow",
-        )
-        MACD = pd.Series(EMA_fast - EMA_slow, name="MACD")
-        MACD_signal = pd.Series(
-            MACD.ewm(ignore_na=False, span=signal, adjust=adjust).mean(), name="SIGNAL"
-        )
+        macd, macd_signal = core.macd(ohlc["close"], period_fast, period_slow, signal, adjust)
+        MACD = pd.Series(macd, index=ohlc.index, name="MACD")
+        MACD_signal = pd.Series(macd_signal, index=ohlc.index, name="SIGNAL")
 
         return pd.concat([MACD, MACD_signal], axis=1)
 
@@ -566,20 +540,7 @@ class TA:
         Signals can also be generated by looking for divergences, failure swings and centerline crossovers.
         RSI can also be used to identify the general trend."""
 
-        ## get the price diff
-        delta = ohlc["close"].diff()
-
-        ## positive gains (up) and negative gains (down) Series
-        up, down = delta.copy(), delta.copy()
-        up[up < 0] = 0
-        down[down > 0] = 0
-
-        # EMAs of ups and downs
-        _gain = up.ewm(span=period, adjust=adjust).mean()
-        _loss = down.abs().ewm(span=period, adjust=adjust).mean()
-
-        RS = _gain / _loss
-        return pd.Series(100 - (100 / (1 + RS)), name="RSI")
+        return pd.Series(core.rsi(ohlc["close"], period, adjust), index=ohlc.index, name="RSI")
 
     @classmethod
     def IFT_RSI(
@@ -593,35 +554,10 @@ class TA:
         v1 = pd.Series(0.1 * (cls.RSI(ohlc, rsi_period) - 50), name="v1")
 
         ### v2 = WMA(wma_period) of v1
-        d = (wma_period * (wma_period + 1)) / 2  # denominator
-        rev = v1.iloc[::-1]  # reverse the series
-        wma = []
-
-        def _chunks(series, period):  # split into chunks of n elements
-            for i in enumerate(series):
-                c = rev.iloc[i[0]: i[0] + period]
-                if len(c) != period:
-                    yield None
-                else:
-                    yield c
-
-        def _wma(chunk, period):  # calculate wma for each chunk
-            w = []
-            for price, i in zip(chunk.iloc[::-1].items(), range(period + 1)[1:]):
-                w.append(price[1] * i / d)
-            return sum(w)
-
-        for i in _chunks(rev, wma_period):
-            try:
-                wma.append(_wma(i, wma_period))
-            except:
-                wma.append(None)
-
-        wma.reverse()  ##reverse the wma list to match the Series
-
-        v1["v2"] = pd.Series(wma, index=v1.index)
+        v2 = pd.Series(core.wma(v1.to_numpy(), wma_period), index=v1.index)
+
         fish = pd.Series(
-            ((2 * v1["v2"]) - 1) ** 2 / ((2 * v1["v2"]) + 1) ** 2, name="IFT_RSI"
+            ((2 * v2) - 1) ** 2 / ((2 * v2) + 1) ** 2, name="IFT_RSI"
         )
         return fish
 
@@ -637,29 +573,17 @@ class TA:
         Absolute value of the most recent period's high minus the previous close.
         Absolute value of the most recent period's low minus the previous close."""
 
-        TR1 = pd.Series(ohlc["high"] - ohlc["low"]).abs()  # True Range = High less Low
-
-        TR2 = pd.Series(
-            ohlc["high"] - ohlc["close"].shift()
-        ).abs()  # True Range = High less Previous Close
-
-        TR3 = pd.Series(
-            ohlc["close"].shift() - ohlc["low"]
-        ).abs()  # True Range = Previous Close less Low
-
-        _TR = pd.concat([TR1, TR2, TR3], axis=1)
-
-        _TR["TR"] = _TR.max(axis=1)
-
-        return pd.Series(_TR["TR"], name="TR")
+        return pd.Series(
+            core.true_range(ohlc["high"], ohlc["low"], ohlc["close"]), index=ohlc.index, name="TR"
+        )
 
     @classmethod
     def ATR(cls, ohlc: DataFrame, period: int = 14) -> Series:
         """Average True Range is moving average of True Range."""
 
-        TR = cls.TR(ohlc)
         return pd.Series(
-            TR.rolling(center=False, window=period).mean(),
+            core.atr(ohlc["high"], ohlc["low"], ohlc["close"], period),
+            index=ohlc.index,
             name="{0} period ATR".format(period),
         )
 
@@ -668,42 +592,15 @@ class TA:
         """SAR stands for “stop and reverse,” which is the actual indicator used in the system.
         SAR trails price as the trend extends over time. The indicator is below prices when prices are rising and above prices when prices are falling.
         In this regard, the indicator stops and reverses when the price trend reverses and breaks above or below the indicator."""
-        high, low = ohlc.high, ohlc.low
-
-        # Starting values
-        sig0, xpt0, af0 = True, high[0], af
-        _sar = [low[0] - (high - low).std()]
+        high = ohlc["high"].to_numpy(dtype=np.float64)
+        low = ohlc["low"].to_numpy(dtype=np.float64)
+        if not len(ohlc):
+            return pd.Series([], index=ohlc.index, dtype=np.float64)
 
-        for i in range(1, len(ohlc)):
-            sig1, xpt1, af1 = sig0, xpt0, af0
+        # Starting value
+        start = low[0] - (ohlc["high"] - ohlc["low"]).std()
 
-            lmin = min(low[i - 1], low[i])
-            lmax = max(high[i - 1], high[i])
-
-            if sig1:
-                sig0 = low[i] > _sar[-1]
-                xpt0 = max(lmax, xpt1)
-            else:
-                sig0 = high[i] >= _sar[-1]
-                xpt0 = min(lmin, xpt1)
-
-            if sig0 == sig1:
-                sari = _sar[-1] + (xpt1 - _sar[-1]) * af1
-                af0 = min(amax, af1 + af)
-
-                if sig0:
-                    af0 = af0 if xpt0 > xpt1 else af1
-                    sari = min(sari, lmin)
-                else:
-                    af0 = af0 if xpt0 < xpt1 else af1
-                    sari = max(sari, lmax)
-            else:
-                af0 = af
-                sari = xpt0
-
-            _sar.append(sari)
-
-        return pd.Series(_sar, index=ohlc.index)
+        return pd.Series(kernels.sar(high, low, start, af, amax), index=ohlc.index)
 
     @classmethod
     def BBANDS(
@@ -718,15 +615,12 @@ class TA:
          Pass desired moving average as <MA> argument. For example BBANDS(MA=TA.KAMA(20)).
          """
 
-        std = ohlc["close"].rolling(window=period).std()
-
-        if not isinstance(MA, pd.core.series.Series):
-            middle_band = pd.Series(cls.SMA(ohlc, period), name="BB_MIDDLE")
-        else:
-            middle_band = pd.Series(MA, name="BB_MIDDLE")
+        middle = MA if isinstance(MA, pd.core.series.Series) else None
+        upper, middle, lower = core.bbands(ohlc["close"], period, std_multiplier, middle)
 
-        upper_bb = pd.Series(middle_band + (std_multiplier * std), name="BB_UPPER")
-        lower_bb = pd.Series(middle_band - (std_multiplier * std), name="BB_LOWER")
+        upper_bb = pd.Series(upper, index=ohlc.index, name="BB_UPPER")
+        middle_band = pd.Series(middle, index=ohlc.index, name="BB_MIDDLE")
+        lower_bb = pd.Series(lower, index=ohlc.index, name="BB_LOWER")
 
         return pd.concat([upper_bb, middle_band, lower_bb], axis=1)
 
@@ -818,40 +712,9 @@ class TA:
         :period: Specifies the number of Periods used for DMI calculation
         """
 
-        ohlc["up_move"] = ohlc["high"].diff()
-        ohlc["down_move"] = -ohlc["low"].diff()
-
-        # positive Dmi
-        def _dmp(row):
-            if row["up_move"] > row["down_move"] and row["up_move"] > 0:
-                return row["up_move"]
-            else:
-                return 0
-
-        # negative Dmi
-        def _dmn(row):
-            if row["down_move"] > row["up_move"] and row["down_move"] > 0:
-                return row["down_move"]
-            else:
-                return 0
-
-        ohlc["plus"] = ohlc.apply(_dmp, axis=1)
-        ohlc["minus"] = ohlc.apply(_dmn, axis=1)
-
-        diplus = pd.Series(
-            100
-            * (ohlc["plus"] / cls.ATR(ohlc, period))
-            .ewm(span=period, adjust=adjust)
-            .mean(),
-            name="DI+",
-        )
-        diminus = pd.Series(
-            100
-            * (ohlc["minus"] / cls.ATR(ohlc, period))
-            .ewm(span=period, adjust=adjust)
-            .mean(),
-            name="DI-",
-        )
+        plus, minus = core.dmi(ohlc["high"], ohlc["low"], ohlc["close"], period, adjust)
+        diplus = pd.Series(plus, index=ohlc.index, name="DI+")
+        diminus = pd.Series(minus, index=ohlc.index, name="DI-")
 
         return pd.concat([diplus, diminus], axis=1)
 
@@ -861,12 +724,9 @@ class TA:
         only trend strength. Generally, A.D.X. readings below 20 indicate trend weakness,
         and readings above 40 indicate trend strength. An extremely strong trend is indicated by readings above 50"""
 
-        dmi = cls.DMI(ohlc, period)
         return pd.Series(
-            100
-            * (abs(dmi["DI+"] - dmi["DI-"]) / (dmi["DI+"] + dmi["DI-"]))
-            .ewm(alpha=1 / period, adjust=adjust)
-            .mean(),
+            core.adx(ohlc["high"], ohlc["low"], ohlc["close"], period, adjust),
+            index=ohlc.index,
             name="{0} period ADX.".format(period),
         )
 
@@ -1018,14 +878,16 @@ class TA:
         This is because they are stuck with one time frame. The Ultimate Oscillator attempts to correct this fault by incorporating longer
         time frames into the basic formula."""
 
-        k = []  # current low or past close
-        for row, _row in zip(ohlc.itertuples(), ohlc.shift(1).itertuples()):
-            k.append(min(row.low, _row.close))
+        low = ohlc["low"].to_numpy()
+        past_close = ohlc["close"].shift(1).to_numpy()
+        with np.errstate(invalid="ignore"):
+            k = np.where(past_close < low, past_close, low)  # current low or past close
         bp = pd.Series(ohlc["close"] - k, name="bp")  # Buying pressure
 
-        Average7 = bp.rolling(window=7).sum() / cls.TR(ohlc).rolling(window=7).sum()
-        Average14 = bp.rolling(window=14).sum() / cls.TR(ohlc).rolling(window=14).sum()
-        Average28 = bp.rolling(window=28).sum() / cls.TR(ohlc).rolling(window=28).sum()
+        tr = cls.TR(ohlc)
+        Average7 = bp.rolling(window=7).sum() / tr.rolling(window=7).sum()
+        Average14 = bp.rolling(window=14).sum() / tr.rolling(window=14).sum()
+        Average28 = bp.rolling(window=28).sum() / tr.rolling(window=28).sum()
 
         return pd.Series(
             (100 * ((4 * Average7) + (2 * Average14) + Average28)) / (4 + 2 + 1)
@@ -1146,7 +1008,7 @@ class TA:
     def TP(cls, ohlc: DataFrame) -> Series:
         """Typical Price refers to the arithmetic average of the high, low, and closing prices for a given period."""
 
-        return pd.Series((ohlc["high"] + ohlc["low"] + ohlc["close"]) / 3, name="TP")
+        return pd.Series(core.typical_price(ohlc["high"], ohlc["low"], ohlc["close"]), index=ohlc.index, name="TP")
 
     @classmethod
     def ADL(cls, ohlcv: DataFrame) -> Series:
@@ -1185,27 +1047,16 @@ class TA:
 
         tp = cls.TP(ohlc)
         rmf = pd.Series(tp * ohlc["volume"], name="rmf")  ## Real Money Flow
-        _mf = pd.concat([tp, rmf], axis=1)
-        _mf["delta"] = _mf["TP"].diff()
-
-        def pos(row):
-            if row["delta"] > 0:
-                return row["rmf"]
-            else:
-                return 0
+        delta = tp.diff().to_numpy()
 
-        def neg(row):
-            if row["delta"] < 0:
-                return row["rmf"]
-            else:
-                return 0
-
-        _mf["neg"] = _mf.apply(neg, axis=1)
-        _mf["pos"] = _mf.apply(pos, axis=1)
+        # comparisons with NaN are False, so the first row counts as neither positive nor negative flow
+        with np.errstate(invalid="ignore"):
+            pos = pd.Series(np.where(delta > 0, rmf, 0), index=ohlc.index)
+            neg = pd.Series(np.where(delta < 0, rmf, 0), index=ohlc.index)
 
         mfratio = pd.Series(
-            _mf["pos"].rolling(window=period).sum()
-            / _mf["neg"].rolling(window=period).sum()
+            pos.rolling(window=period).sum()
+            / neg.rolling(window=period).sum()
         )
 
         return pd.Series(
@@ -1679,17 +1530,9 @@ class TA:
 
         bb = cls.BBANDS(ohlc, period=period, MA=ma)
         kc = cls.KC(ohlc, period=period, kc_mult=1.5)
-        comb = pd.concat([bb, kc], axis=1)
-
-        def sqz_on(row):
-            if row["BB_LOWER"] > row["KC_LOWER"] and row["BB_UPPER"] < row["KC_UPPER"]:
-                return True
-            else:
-                return False
+        sqz = (bb["BB_LOWER"] > kc["KC_LOWER"]) & (bb["BB_UPPER"] < kc["KC_UPPER"])
 
-        comb["SQZ"] = comb.apply(sqz_on, axis=1)
-
-        return pd.Series(comb["SQZ"], name="{0} period SQZMI".format(period))
+        return pd.Series(sqz, name="{0} period SQZMI".format(period))
 
     @classmethod
     def VPT(cls, ohlc: DataFrame) -> Series:
@@ -1721,19 +1564,13 @@ class TA:
         smav = ohlc["volume"].rolling(window=period).mean()
         mf = pd.Series((ohlc["close"] - hl2 + tp.diff()), name="mf")
 
-        _mf = pd.concat([ohlc["close"], ohlc["volume"], mf], axis=1)
-
-        def vol_shift(row):
-
-            if row["mf"] > factor * row["close"] / 100:
-                return row["volume"]
-            elif row["mf"] < -factor * row["close"] / 100:
-                return -row["volume"]
-            else:
-                return 0
+        threshold = factor * ohlc["close"].to_numpy() / 100
+        volume = ohlc["volume"].to_numpy()
 
-        _mf["vol_shift"] = _mf.apply(vol_shift, axis=1)
-        _sum = _mf["vol_shift"].rolling(window=period).sum()
+        # volume counts up or down when the money flow is beyond the threshold, NaN money flow counts as 0
+        with np.errstate(invalid="ignore"):
+            vol_shift = np.select([mf > threshold, mf < -threshold], [volume, -volume], 0)
+        _sum = pd.Series(vol_shift, index=ohlc.index).rolling(window=period).sum()
 
         return pd.Series((_sum / smav) / period * 100)
 
@@ -1762,7 +1599,7 @@ class TA:
 
         typical = TA.TP(ohlc)
         # historical interday volatility and cutoff
-        inter = typical.apply(np.log).diff()
+        inter = np.log(typical).diff()
         # stdev of linear1
         vinter = inter.rolling(window=30).std()
         cutoff = pd.Series(factor * vinter * ohlc["close"], name="cutoff")
@@ -1771,35 +1608,18 @@ class TA:
             ohlc["volume"].rolling(center=False, window=period).mean(), name="mav",
         )
 
-        _va = pd.concat([ohlc["volume"], mav.shift()], axis=1)
-        _mp = pd.concat([price_change, cutoff], axis=1)
-        _mp.fillna(value=0, inplace=True)
+        # maximum volume to be added, volume is kept as is while the moving average is not available
+        max_vol = vfactor * mav.shift().to_numpy()
+        volume = ohlc["volume"].to_numpy()
+        with np.errstate(invalid="ignore"):
+            added_vol = np.where(volume > max_vol, max_vol, volume)
 
-        def _vol_added(row):
-            """ Determine the maximum volume to be added"""
-
-            if row["volume"] > vfactor * row["mav"]:
-                return vfactor * row["mav"]
-            else:
-                return row["volume"]
-
-        added_vol = _va.apply(_vol_added, axis=1)
-
-        def _multiplier(row):
-            """
-            Determine whether the volume is up volume (multiplier +1) or
-            down volume (multiplier -1). If price change is smaller than cutoff
-            do not count volume (multipler 0).
-            """
-            if row["pc"] > row["cutoff"]:
-                return 1
-            elif row["pc"] < 0 - row["cutoff"]:
-                return -1
-            else:
-                return 0
+        # up volume (multiplier +1) or down volume (multiplier -1), price change smaller than cutoff is not counted
+        pc = price_change.fillna(0).to_numpy()
+        cut = cutoff.fillna(0).to_numpy()
+        multiplier = np.select([pc > cut, pc < -cut], [1, -1], 0)
 
-        multiplier = _mp.apply(_multiplier, axis=1)
-        raw_sum = (multiplier * added_vol).rolling(window=period).sum()
+        raw_sum = pd.Series(multiplier * added_vol, index=ohlc.index).rolling(window=period).sum()
         raw_value = raw_sum / mav.shift()
 
         vfi = pd.Series(
@@ -1,5 +1,8 @@
 import pandas as pd
 
+# the widest half spread of a bar bounds its bid and ask prices, see pricer.transform
+OHLCV_AGGREGATION = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum", "half_spread": "max"}
+
 
 def to_dataframe(ticks: list) -> pd.DataFrame:
     """Convert list to Series compatible with the library."""
@@ -14,9 +17,22 @@ def to_dataframe(ticks: list) -> pd.DataFrame:
 def resample(df: pd.DataFrame, interval: str) -> pd.DataFrame:
     """Resample DataFrame by <interval>."""
 
-    d = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    return df.resample(interval).agg(_aggregation(df))
+
+
+def aggregate(df: pd.DataFrame, labels) -> pd.DataFrame:
+    """Aggregate the bars of DataFrame sharing a label, for bars which can not be expressed as a pandas offset.
+    :param df: data
+    :param labels: array like of the bar labels, one per row, e.g. the start time of the bar each row belongs to
+    :return: result DataFrame indexed by the sorted labels, without empty bars
+    """
+
+    return df.groupby(labels, sort=True).agg(_aggregation(df))
 
-    return df.resample(interval).agg(d)
+
+def _aggregation(df: pd.DataFrame) -> dict:
+    # volume and half_spread are optional, e.g. the Oanda mid prices of pricer.candles_to_df have neither
+    return {c: f for c, f in OHLCV_AGGREGATION.items() if c in df.columns}
 
 
 def resample_calendar(df: pd.DataFrame, offset: str) -> pd.DataFrame:
@@ -27,9 +43,7 @@ def resample_calendar(df: pd.DataFrame, offset: str) -> pd.DataFrame:
     :return: result DataFrame
     """
 
-    d = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
-
-    return df.resample(offset).agg(d)
+    return df.resample(offset).agg(_aggregation(df))
 
 
 def trending_up(df: pd.Series, period: int) -> pd.Series:
@@ -3,10 +3,48 @@ import logging
 import numpy as np
 import pandas as pd
 
+from src.finta import core
+
 # Init Logging Facilities
 log = logging.getLogger(__name__)
 
 
+def _column(df, name):
+    """Column of a price frame, accepting both our lower case names and capitalized ones, e.g. close or Close.
+
+    :param df: pandas.DataFrame
+    :param name: lower case column name
+    :return: pandas.Series
+    """
+    return df[name] if name in df else df[name.capitalize()]
+
+
+def _directional_moves(df):
+    """Positive and negative directional moves, 0 for the first bar.
+
+    :param df: pandas.DataFrame
+    :return: tuple of numpy arrays
+    """
+    return core.directional_moves(_column(df, 'high'), _column(df, 'low'))
+
+
+def _true_range(df):
+    """True range and buying pressure against the previous close, 0 for the first bar.
+
+    :param df: pandas.DataFrame
+    :return: tuple of numpy arrays
+    """
+    low = core.as_array(_column(df, 'low'))
+    close = core.as_array(_column(df, 'close'))
+    tr = core.true_range(_column(df, 'high'), low, close)
+    prev_close = core.shift(close)
+    with np.errstate(invalid='ignore'):
+        bp = close - np.where(prev_close < low, prev_close, low)
+    tr[:1] = 0
+    bp[:1] = 0
+    return tr, bp
+
+
 def moving_average(df, n):
     """Calculate the moving average for the given data.
 
@@ -14,7 +52,7 @@ def moving_average(df, n):
     :param n:
     :return: pandas.Series
     """
-    return pd.Series(df['close'].rolling(n, min_periods=n).mean(), name=f'MA_{n}')
+    return pd.Series(core.sma(df['close'], n), index=df.index, name=f'MA_{n}')
 
 
 def exponential_moving_average(df, n):
@@ -25,7 +63,7 @@ def exponential_moving_average(df, n):
     :return: pandas.Series
     """
     # return values.ewm(alpha=1 / n, adjust=False).mean()
-    return df['close'].ewm(span=n).mean()
+    return pd.Series(core.ewm(df['close'], span=n), index=df.index, name='close')
 
 
 def momentum(df, n):
@@ -33,11 +71,9 @@ def momentum(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    M = pd.Series(df['Close'].diff(n), name='Momentum_' + str(n))
-    df = df.join(M)
-    return df
+    return pd.Series(_column(df, 'close').diff(n), name='Momentum_' + str(n))
 
 
 def rate_of_change(df, n):
@@ -45,13 +81,11 @@ def rate_of_change(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    M = df['Close'].diff(n - 1)
-    N = df['Close'].shift(n - 1)
-    ROC = pd.Series(M / N, name='ROC_' + str(n))
-    df = df.join(ROC)
-    return df
+    M = _column(df, 'close').diff(n - 1)
+    N = _column(df, 'close').shift(n - 1)
+    return pd.Series(M / N, name='ROC_' + str(n))
 
 
 def average_true_range(df, n):
@@ -61,15 +95,7 @@ def average_true_range(df, n):
     :param n:
     :return: pandas.Series
     """
-    data = df.copy()
-    high = data['high']
-    low = data['low']
-    close = data['close']
-    data['tr0'] = abs(high - low)
-    data['tr1'] = abs(high - close.shift())
-    data['tr2'] = abs(low - close.shift())
-    tr = data[['tr0', 'tr1', 'tr2']].max(axis=1)
-    return pd.Series(tr.ewm(span=n).mean(), name=f'ATR_{n}')
+    return pd.Series(core.atr(df['high'], df['low'], df['close'], n, method='ema'), index=df.index, name=f'ATR_{n}')
 
 
 def bollinger_bands(df, n):
@@ -79,15 +105,12 @@ def bollinger_bands(df, n):
     :param n:
     :return: pandas.DataFrame
     """
-    MA = pd.Series(df['Close'].rolling(n, min_periods=n).mean())
-    MSD = pd.Series(df['Close'].rolling(n, min_periods=n).std())
-    b1 = 4 * MSD / MA
-    B1 = pd.Series(b1, name='BollingerB_' + str(n))
-    df = df.join(B1)
-    b2 = (df['Close'] - MA + 2 * MSD) / (4 * MSD)
-    B2 = pd.Series(b2, name='Bollinger%b_' + str(n))
-    df = df.join(B2)
-    return df
+    close = _column(df, 'close')
+    MA = close.rolling(n, min_periods=n).mean()
+    MSD = close.rolling(n, min_periods=n).std()
+    B1 = pd.Series(4 * MSD / MA, name='BollingerB_' + str(n))
+    B2 = pd.Series((close - MA + 2 * MSD) / (4 * MSD), name='Bollinger%b_' + str(n))
+    return pd.concat([B1, B2], axis=1)
 
 
 def ppsr(df):
@@ -96,40 +119,35 @@ def ppsr(df):
     :param df: pandas.DataFrame
     :return: pandas.DataFrame
     """
-    PP = pd.Series((df['High'] + df['Low'] + df['Close']) / 3)
-    R1 = pd.Series(2 * PP - df['Low'])
-    S1 = pd.Series(2 * PP - df['High'])
-    R2 = pd.Series(PP + df['High'] - df['Low'])
-    S2 = pd.Series(PP - df['High'] + df['Low'])
-    R3 = pd.Series(df['High'] + 2 * (PP - df['Low']))
-    S3 = pd.Series(df['Low'] - 2 * (df['High'] - PP))
-    psr = {'PP': PP, 'R1': R1, 'S1': S1, 'R2': R2, 'S2': S2, 'R3': R3, 'S3': S3}
-    PSR = pd.DataFrame(psr)
-    df = df.join(PSR)
-    return df
+    high, low, close = _column(df, 'high'), _column(df, 'low'), _column(df, 'close')
+    PP = (high + low + close) / 3
+    R1 = 2 * PP - low
+    S1 = 2 * PP - high
+    R2 = PP + high - low
+    S2 = PP - high + low
+    R3 = high + 2 * (PP - low)
+    S3 = low - 2 * (high - PP)
+    return pd.DataFrame({'PP': PP, 'R1': R1, 'S1': S1, 'R2': R2, 'S2': S2, 'R3': R3, 'S3': S3})
 
 
 def stochastic_oscillator_k(df):
     """Calculate stochastic oscillator %K for given data.
 
     :param df: pandas.DataFrame
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    SOk = pd.Series((df['Close'] - df['Low']) / (df['High'] - df['Low']), name='SO%k')
-    df = df.join(SOk)
-    return df
+    high, low, close = _column(df, 'high'), _column(df, 'low'), _column(df, 'close')
+    return pd.Series((close - low) / (high - low), name='SO%k')
 
 
 def stochastic_oscillator_d(df, n):
     """Calculate stochastic oscillator %D for given data.
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    SOk = pd.Series((df['Close'] - df['Low']) / (df['High'] - df['Low']), name='SO%k')
-    SOd = pd.Series(SOk.ewm(span=n, min_periods=n).mean(), name='SO%d_' + str(n))
-    df = df.join(SOd)
-    return df
+    SOk = stochastic_oscillator_k(df)
+    return pd.Series(SOk.ewm(span=n, min_periods=n).mean(), name='SO%d_' + str(n))
 
 
 def trix(df, n):
@@ -137,20 +155,12 @@ def trix(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    EX1 = df['Close'].ewm(span=n, min_periods=n).mean()
+    EX1 = _column(df, 'close').ewm(span=n, min_periods=n).mean()
     EX2 = EX1.ewm(span=n, min_periods=n).mean()
     EX3 = EX2.ewm(span=n, min_periods=n).mean()
-    i = 0
-    ROC_l = [np.nan]
-    while i + 1 <= df.index[-1]:
-        ROC = (EX3[i + 1] - EX3[i]) / EX3[i]
-        ROC_l.append(ROC)
-        i = i + 1
-    Trix = pd.Series(ROC_l, name='Trix_' + str(n))
-    df = df.join(Trix)
-    return df
+    return pd.Series(EX3.diff() / EX3.shift(), name='Trix_' + str(n))
 
 
 def average_directional_movement_index(df, n, n_ADX):
@@ -159,41 +169,15 @@ def average_directional_movement_index(df, n, n_ADX):
     :param df: pandas.DataFrame
     :param n:
     :param n_ADX:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    UpI = []
-    DoI = []
-    while i + 1 <= df.index[-1]:
-        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
-        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
-        if UpMove > DoMove and UpMove > 0:
-            UpD = UpMove
-        else:
-            UpD = 0
-        UpI.append(UpD)
-        if DoMove > UpMove and DoMove > 0:
-            DoD = DoMove
-        else:
-            DoD = 0
-        DoI.append(DoD)
-        i = i + 1
-    i = 0
-    TR_l = [0]
-    while i < df.index[-1]:
-        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR_l.append(TR)
-        i = i + 1
-    TR_s = pd.Series(TR_l)
-    ATR = pd.Series(TR_s.ewm(span=n, min_periods=n).mean())
-    UpI = pd.Series(UpI)
-    DoI = pd.Series(DoI)
-    PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean() / ATR)
-    NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean() / ATR)
-    ADX = pd.Series((abs(PosDI - NegDI) / (PosDI + NegDI)).ewm(span=n_ADX, min_periods=n_ADX).mean(),
-                    name='ADX_' + str(n) + '_' + str(n_ADX))
-    df = df.join(ADX)
-    return df
+    up, do = _directional_moves(df)
+    tr, _ = _true_range(df)
+    ATR = pd.Series(tr, index=df.index).ewm(span=n, min_periods=n).mean()
+    PosDI = pd.Series(up, index=df.index).ewm(span=n, min_periods=n).mean() / ATR
+    NegDI = pd.Series(do, index=df.index).ewm(span=n, min_periods=n).mean() / ATR
+    return pd.Series((abs(PosDI - NegDI) / (PosDI + NegDI)).ewm(span=n_ADX, min_periods=n_ADX).mean(),
+                     name='ADX_' + str(n) + '_' + str(n_ADX))
 
 
 def macd(df, n_fast, n_slow):
@@ -204,30 +188,26 @@ def macd(df, n_fast, n_slow):
     :param n_slow:
     :return: pandas.DataFrame
     """
-    EMAfast = pd.Series(df['Close'].ewm(span=n_fast, min_periods=n_slow).mean())
-    EMAslow = pd.Series(df['Close'].ewm(span=n_slow, min_periods=n_slow).mean())
+    close = _column(df, 'close')
+    EMAfast = close.ewm(span=n_fast, min_periods=n_slow).mean()
+    EMAslow = close.ewm(span=n_slow, min_periods=n_slow).mean()
     MACD = pd.Series(EMAfast - EMAslow, name='MACD_' + str(n_fast) + '_' + str(n_slow))
     MACDsign = pd.Series(MACD.ewm(span=9, min_periods=9).mean(), name='MACDsign_' + str(n_fast) + '_' + str(n_slow))
     MACDdiff = pd.Series(MACD - MACDsign, name='MACDdiff_' + str(n_fast) + '_' + str(n_slow))
-    df = df.join(MACD)
-    df = df.join(MACDsign)
-    df = df.join(MACDdiff)
-    return df
+    return pd.concat([MACD, MACDsign, MACDdiff], axis=1)
 
 
 def mass_index(df):
     """Calculate the Mass Index for given data.
 
     :param df: pandas.DataFrame
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    Range = df['High'] - df['Low']
+    Range = _column(df, 'high') - _column(df, 'low')
     EX1 = Range.ewm(span=9, min_periods=9).mean()
     EX2 = EX1.ewm(span=9, min_periods=9).mean()
     Mass = EX1 / EX2
-    MassI = pd.Series(Mass.rolling(25).sum(), name='Mass Index')
-    df = df.join(MassI)
-    return df
+    return pd.Series(Mass.rolling(25).sum(), name='Mass Index')
 
 
 def vortex_indicator(df, n):
@@ -237,23 +217,15 @@ def vortex_indicator(df, n):
         http://www.vortexindicator.com/VFX_VORTEX.PDF
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    TR = [0]
-    while i < df.index[-1]:
-        Range = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR.append(Range)
-        i = i + 1
-    i = 0
-    VM = [0]
-    while i < df.index[-1]:
-        Range = abs(df.loc[i + 1, 'High'] - df.loc[i, 'Low']) - abs(df.loc[i + 1, 'Low'] - df.loc[i, 'High'])
-        VM.append(Range)
-        i = i + 1
-    VI = pd.Series(pd.Series(VM).rolling(n).sum() / pd.Series(TR).rolling(n).sum(), name='Vortex_' + str(n))
-    df = df.join(VI)
-    return df
+    high = _column(df, 'high').to_numpy(dtype=np.float64)
+    low = _column(df, 'low').to_numpy(dtype=np.float64)
+    TR, _ = _true_range(df)
+    VM = np.zeros(len(df))
+    VM[1:] = np.abs(high[1:] - low[:-1]) - np.abs(low[1:] - high[:-1])
+    VI = pd.Series(VM, index=df.index).rolling(n).sum() / pd.Series(TR, index=df.index).rolling(n).sum()
+    return pd.Series(VI, name='Vortex_' + str(n))
 
 
 def kst_oscillator(df, r1, r2, r3, r4, n1, n2, n3, n4):
@@ -268,26 +240,17 @@ def kst_oscillator(df, r1, r2, r3, r4, n1, n2, n3, n4):
     :param n2:
     :param n3:
     :param n4:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    M = df['Close'].diff(r1 - 1)
-    N = df['Close'].shift(r1 - 1)
-    ROC1 = M / N
-    M = df['Close'].diff(r2 - 1)
-    N = df['Close'].shift(r2 - 1)
-    ROC2 = M / N
-    M = df['Close'].diff(r3 - 1)
-    N = df['Close'].shift(r3 - 1)
-    ROC3 = M / N
-    M = df['Close'].diff(r4 - 1)
-    N = df['Close'].shift(r4 - 1)
-    ROC4 = M / N
-    KST = pd.Series(
+    close = _column(df, 'close')
+    ROC1 = close.diff(r1 - 1) / close.shift(r1 - 1)
+    ROC2 = close.diff(r2 - 1) / close.shift(r2 - 1)
+    ROC3 = close.diff(r3 - 1) / close.shift(r3 - 1)
+    ROC4 = close.diff(r4 - 1) / close.shift(r4 - 1)
+    return pd.Series(
         ROC1.rolling(n1).sum() + ROC2.rolling(n2).sum() * 2 + ROC3.rolling(n3).sum() * 3 + ROC4.rolling(n4).sum() * 4,
         name='KST_' + str(r1) + '_' + str(r2) + '_' + str(r3) + '_' + str(r4) + '_' + str(n1) + '_' + str(
             n2) + '_' + str(n3) + '_' + str(n4))
-    df = df.join(KST)
-    return df
 
 
 def relative_strength_index(df, n):
@@ -295,32 +258,12 @@ def relative_strength_index(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    UpI = [0]
-    DoI = [0]
-    while i + 1 <= df.index[-1]:
-        UpMove = df.loc[i + 1, 'High'] - df.loc[i, 'High']
-        DoMove = df.loc[i, 'Low'] - df.loc[i + 1, 'Low']
-        if UpMove > DoMove and UpMove > 0:
-            UpD = UpMove
-        else:
-            UpD = 0
-        UpI.append(UpD)
-        if DoMove > UpMove and DoMove > 0:
-            DoD = DoMove
-        else:
-            DoD = 0
-        DoI.append(DoD)
-        i = i + 1
-    UpI = pd.Series(UpI)
-    DoI = pd.Series(DoI)
-    PosDI = pd.Series(UpI.ewm(span=n, min_periods=n).mean())
-    NegDI = pd.Series(DoI.ewm(span=n, min_periods=n).mean())
-    RSI = pd.Series(PosDI / (PosDI + NegDI), name='RSI_' + str(n))
-    df = df.join(RSI)
-    return df
+    up, do = _directional_moves(df)
+    PosDI = pd.Series(up, index=df.index).ewm(span=n, min_periods=n).mean()
+    NegDI = pd.Series(do, index=df.index).ewm(span=n, min_periods=n).mean()
+    return pd.Series(PosDI / (PosDI + NegDI), name='RSI_' + str(n))
 
 
 def true_strength_index(df, r, s):
@@ -329,17 +272,15 @@ def true_strength_index(df, r, s):
     :param df: pandas.DataFrame
     :param r:
     :param s:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    M = pd.Series(df['Close'].diff(1))
+    M = _column(df, 'close').diff(1)
     aM = abs(M)
-    EMA1 = pd.Series(M.ewm(span=r, min_periods=r).mean())
-    aEMA1 = pd.Series(aM.ewm(span=r, min_periods=r).mean())
-    EMA2 = pd.Series(EMA1.ewm(span=s, min_periods=s).mean())
-    aEMA2 = pd.Series(aEMA1.ewm(span=s, min_periods=s).mean())
-    TSI = pd.Series(EMA2 / aEMA2, name='TSI_' + str(r) + '_' + str(s))
-    df = df.join(TSI)
-    return df
+    EMA1 = M.ewm(span=r, min_periods=r).mean()
+    aEMA1 = aM.ewm(span=r, min_periods=r).mean()
+    EMA2 = EMA1.ewm(span=s, min_periods=s).mean()
+    aEMA2 = aEMA1.ewm(span=s, min_periods=s).mean()
+    return pd.Series(EMA2 / aEMA2, name='TSI_' + str(r) + '_' + str(s))
 
 
 def accumulation_distribution(df, n):
@@ -347,27 +288,24 @@ def accumulation_distribution(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    ad = (2 * df['Close'] - df['High'] - df['Low']) / (df['High'] - df['Low']) * df['Volume']
+    high, low, close = _column(df, 'high'), _column(df, 'low'), _column(df, 'close')
+    ad = (2 * close - high - low) / (high - low) * _column(df, 'volume')
     M = ad.diff(n - 1)
     N = ad.shift(n - 1)
-    ROC = M / N
-    AD = pd.Series(ROC, name='Acc/Dist_ROC_' + str(n))
-    df = df.join(AD)
-    return df
+    return pd.Series(M / N, name='Acc/Dist_ROC_' + str(n))
 
 
 def chaikin_oscillator(df):
     """Calculate Chaikin Oscillator for given data.
 
     :param df: pandas.DataFrame
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    ad = (2 * df['Close'] - df['High'] - df['Low']) / (df['High'] - df['Low']) * df['Volume']
-    Chaikin = pd.Series(ad.ewm(span=3, min_periods=3).mean() - ad.ewm(span=10, min_periods=10).mean(), name='Chaikin')
-    df = df.join(Chaikin)
-    return df
+    high, low, close = _column(df, 'high'), _column(df, 'low'), _column(df, 'close')
+    ad = (2 * close - high - low) / (high - low) * _column(df, 'volume')
+    return pd.Series(ad.ewm(span=3, min_periods=3).mean() - ad.ewm(span=10, min_periods=10).mean(), name='Chaikin')
 
 
 def money_flow_index(df, n):
@@ -375,23 +313,13 @@ def money_flow_index(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    PP = (df['High'] + df['Low'] + df['Close']) / 3
-    i = 0
-    PosMF = [0]
-    while i < df.index[-1]:
-        if PP[i + 1] > PP[i]:
-            PosMF.append(PP[i + 1] * df.loc[i + 1, 'Volume'])
-        else:
-            PosMF.append(0)
-        i = i + 1
-    PosMF = pd.Series(PosMF)
-    TotMF = PP * df['Volume']
-    MFR = pd.Series(PosMF / TotMF)
-    MFI = pd.Series(MFR.rolling(n, min_periods=n).mean(), name='MFI_' + str(n))
-    df = df.join(MFI)
-    return df
+    PP = (_column(df, 'high') + _column(df, 'low') + _column(df, 'close')) / 3
+    TotMF = PP * _column(df, 'volume')
+    PosMF = TotMF.where(PP.diff() > 0, 0)
+    MFR = PosMF / TotMF
+    return pd.Series(MFR.rolling(n, min_periods=n).mean(), name='MFI_' + str(n))
 
 
 def on_balance_volume(df, n):
@@ -399,22 +327,11 @@ def on_balance_volume(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    OBV = [0]
-    while i < df.index[-1]:
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] > 0:
-            OBV.append(df.loc[i + 1, 'Volume'])
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] == 0:
-            OBV.append(0)
-        if df.loc[i + 1, 'Close'] - df.loc[i, 'Close'] < 0:
-            OBV.append(-df.loc[i + 1, 'Volume'])
-        i = i + 1
-    OBV = pd.Series(OBV)
-    OBV_ma = pd.Series(OBV.rolling(n, min_periods=n).mean(), name='OBV_' + str(n))
-    df = df.join(OBV_ma)
-    return df
+    volume = _column(df, 'volume')
+    OBV = np.sign(_column(df, 'close').diff()).fillna(0) * volume
+    return pd.Series(OBV.rolling(n, min_periods=n).mean(), name='OBV_' + str(n))
 
 
 def force_index(df, n):
@@ -422,11 +339,9 @@ def force_index(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    F = pd.Series(df['Close'].diff(n) * df['Volume'].diff(n), name='Force_' + str(n))
-    df = df.join(F)
-    return df
+    return pd.Series(_column(df, 'close').diff(n) * _column(df, 'volume').diff(n), name='Force_' + str(n))
 
 
 def ease_of_movement(df, n):
@@ -434,12 +349,11 @@ def ease_of_movement(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    EoM = (df['High'].diff(1) + df['Low'].diff(1)) * (df['High'] - df['Low']) / (2 * df['Volume'])
-    Eom_ma = pd.Series(EoM.rolling(n, min_periods=n).mean(), name='EoM_' + str(n))
-    df = df.join(Eom_ma)
-    return df
+    high, low = _column(df, 'high'), _column(df, 'low')
+    EoM = (high.diff(1) + low.diff(1)) * (high - low) / (2 * _column(df, 'volume'))
+    return pd.Series(EoM.rolling(n, min_periods=n).mean(), name='EoM_' + str(n))
 
 
 def commodity_channel_index(df, n):
@@ -447,13 +361,11 @@ def commodity_channel_index(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    PP = (df['High'] + df['Low'] + df['Close']) / 3
-    CCI = pd.Series((PP - PP.rolling(n, min_periods=n).mean()) / PP.rolling(n, min_periods=n).std(),
-                    name='CCI_' + str(n))
-    df = df.join(CCI)
-    return df
+    PP = (_column(df, 'high') + _column(df, 'low') + _column(df, 'close')) / 3
+    return pd.Series((PP - PP.rolling(n, min_periods=n).mean()) / PP.rolling(n, min_periods=n).std(),
+                     name='CCI_' + str(n))
 
 
 def coppock_curve(df, n):
@@ -461,17 +373,12 @@ def coppock_curve(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    M = df['Close'].diff(int(n * 11 / 10) - 1)
-    N = df['Close'].shift(int(n * 11 / 10) - 1)
-    ROC1 = M / N
-    M = df['Close'].diff(int(n * 14 / 10) - 1)
-    N = df['Close'].shift(int(n * 14 / 10) - 1)
-    ROC2 = M / N
-    Copp = pd.Series((ROC1 + ROC2).ewm(span=n, min_periods=n).mean(), name='Copp_' + str(n))
-    df = df.join(Copp)
-    return df
+    close = _column(df, 'close')
+    ROC1 = close.diff(int(n * 11 / 10) - 1) / close.shift(int(n * 11 / 10) - 1)
+    ROC2 = close.diff(int(n * 14 / 10) - 1) / close.shift(int(n * 14 / 10) - 1)
+    return pd.Series((ROC1 + ROC2).ewm(span=n, min_periods=n).mean(), name='Copp_' + str(n))
 
 
 def keltner_channel(df, n):
@@ -481,62 +388,36 @@ def keltner_channel(df, n):
     :param n:
     :return: pandas.DataFrame
     """
-    KelChM = pd.Series(((df['High'] + df['Low'] + df['Close']) / 3).rolling(n, min_periods=n).mean(),
-                       name='KelChM_' + str(n))
-    KelChU = pd.Series(((4 * df['High'] - 2 * df['Low'] + df['Close']) / 3).rolling(n, min_periods=n).mean(),
-                       name='KelChU_' + str(n))
-    KelChD = pd.Series(((-2 * df['High'] + 4 * df['Low'] + df['Close']) / 3).rolling(n, min_periods=n).mean(),
-                       name='KelChD_' + str(n))
-    df = df.join(KelChM)
-    df = df.join(KelChU)
-    df = df.join(KelChD)
-    return df
+    high, low, close = _column(df, 'high'), _column(df, 'low'), _column(df, 'close')
+    KelChM = pd.Series(((high + low + close) / 3).rolling(n, min_periods=n).mean(), name='KelChM_' + str(n))
+    KelChU = pd.Series(((4 * high - 2 * low + close) / 3).rolling(n, min_periods=n).mean(), name='KelChU_' + str(n))
+    KelChD = pd.Series(((-2 * high + 4 * low + close) / 3).rolling(n, min_periods=n).mean(), name='KelChD_' + str(n))
+    return pd.concat([KelChM, KelChU, KelChD], axis=1)
 
 
 def ultimate_oscillator(df):
     """Calculate Ultimate Oscillator for given data.
 
     :param df: pandas.DataFrame
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    TR_l = [0]
-    BP_l = [0]
-    while i < df.index[-1]:
-        TR = max(df.loc[i + 1, 'High'], df.loc[i, 'Close']) - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        TR_l.append(TR)
-        BP = df.loc[i + 1, 'Close'] - min(df.loc[i + 1, 'Low'], df.loc[i, 'Close'])
-        BP_l.append(BP)
-        i = i + 1
-    UltO = pd.Series((4 * pd.Series(BP_l).rolling(7).sum() / pd.Series(TR_l).rolling(7).sum()) + (
-            2 * pd.Series(BP_l).rolling(14).sum() / pd.Series(TR_l).rolling(14).sum()) + (
-                             pd.Series(BP_l).rolling(28).sum() / pd.Series(TR_l).rolling(28).sum()),
-                     name='Ultimate_Osc')
-    df = df.join(UltO)
-    return df
+    TR, BP = _true_range(df)
+    TR = pd.Series(TR, index=df.index)
+    BP = pd.Series(BP, index=df.index)
+    UltO = (4 * BP.rolling(7).sum() / TR.rolling(7).sum()) + (
+            2 * BP.rolling(14).sum() / TR.rolling(14).sum()) + (
+                   BP.rolling(28).sum() / TR.rolling(28).sum())
+    return pd.Series(UltO, name='Ultimate_Osc')
 
 
 def donchian_channel(df, n):
     """Calculate donchian channel of given pandas data frame.
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    i = 0
-    dc_l = []
-    while i < n - 1:
-        dc_l.append(0)
-        i += 1
-
-    i = 0
-    while i + n - 1 < df.index[-1]:
-        dc = max(df['High'].ix[i:i + n - 1]) - min(df['Low'].ix[i:i + n - 1])
-        dc_l.append(dc)
-        i += 1
-
-    donchian_chan = pd.Series(dc_l, name='Donchian_' + str(n))
-    donchian_chan = donchian_chan.shift(n - 1)
-    return df.join(donchian_chan)
+    dc = _column(df, 'high').rolling(n, min_periods=n).max() - _column(df, 'low').rolling(n, min_periods=n).min()
+    return pd.Series(dc, name='Donchian_' + str(n))
 
 
 def standard_deviation(df, n):
@@ -544,26 +425,20 @@ def standard_deviation(df, n):
 
     :param df: pandas.DataFrame
     :param n:
-    :return: pandas.DataFrame
+    :return: pandas.Series
     """
-    df = df.join(pd.Series(df['Close'].rolling(n, min_periods=n).std(), name='STD_' + str(n)))
-    return df
+    return pd.Series(_column(df, 'close').rolling(n, min_periods=n).std(), name='STD_' + str(n))
 
 
 def wma(values, n):
     """
      J. Welles Wilder's EMA
     """
-    return values.ewm(alpha=1 / n, adjust=False).mean()
+    return pd.Series(core.ewm(values, alpha=1 / n, adjust=False), index=values.index, name=values.name)
 
 
 def atr(df, n=14):
-    data = df.copy()
-    high = data['high']
-    low = data['low']
-    close = data['close']
-    data['tr0'] = abs(high - low)
-    data['tr1'] = abs(high - close.shift())
-    data['tr2'] = abs(low - close.shift())
-    tr = data[['tr0', 'tr1', 'tr2']].max(axis=1)
-    return wma(tr, n)
+    """
+     Average true range with Wilder's smoothing
+    """
+    return pd.Series(core.atr(df['high'], df['low'], df['close'], n, method='wilder'), index=df.index)
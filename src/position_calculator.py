@@ -1,9 +1,6 @@
 import logging
-from functools import lru_cache
 
-from oandapyV20 import V20Error
-
-from src.pricer import api_request
+from src.pricing.spot_rate import SPOT_RATES
 
 logger = logging.getLogger(__name__)
 
@@ -26,31 +23,17 @@ def pos_size(account_balance: float, risk_pct: float, sl_pips: float, instrument
     return round(risk_amt / (sl_pips * pip_value) * close, 4)
 
 
-@lru_cache(1000)
 def get_fx_rate(account_ccy: str, instrument: str) -> float:
     """
-    Get latest fx rates against USD
+    Get latest fx rate of the account currency against the counter currency of the instrument,
+    inverted or triangulated by the shared SpotRateService when Oanda does not quote the pair
     :param account_ccy: GBP, EUR
     :param instrument: currency pair, e.g. EUR_USD
-    :return: fx rates against USD
+    :return: units of the counter currency per unit of the account currency
     """
     counter_ccy = instrument.split('_')[-1]
-    if account_ccy == counter_ccy:
-        return 1.0
-
-    p = {
-        "count": 1,
-        "granularity": "M1"
-    }
-    try:
-        resp = api_request(f'{account_ccy}_{counter_ccy}', p)
-        close = float(resp['candles'][0]['mid']['c'])
-        logger.info(f'Close fx rate is: {close}')
-    except V20Error:
-        resp = api_request(f'{counter_ccy}_{account_ccy}', p)
-        close = 1 / float(resp['candles'][0]['mid']['c'])
-        logger.info(f'Close fx rate is: {close}')
-
+    close = SPOT_RATES.rate(f'{account_ccy}_{counter_ccy}')
+    logger.info(f'Close fx rate is: {close}')
     return close
 
 
@@ -1,32 +1,131 @@
 import logging
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List
 
 import numpy as np
 import pandas as pd
-from dateutil import parser
+import requests
 
 import oandapyV20.endpoints.instruments as v20instruments
 from oandapyV20 import V20Error
 
+from src.db.candle_store import CandleStore
 from src.env import RUNNING_ENV
-from src.utils.timeout_cache import cache
+from src.pricing.spot_rate import SPOT_RATES
+from src.utils import fx_calendar
+from src.utils.rate_limit import RateLimiter, retry
 
 OANDA_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
 
+# Oanda allows 120 requests per second, stay well below it to leave room for trading
+RATE_LIMITER = RateLimiter(rate=30, burst=10)
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 5
+# maximum number of candles Oanda returns per request
+MAX_COUNT = 5000
+# price components of the candles: M mid, B bid, A ask, e.g. MBA for all three in one request
+PRICE_COMPONENTS = ('M', 'B', 'A', 'BA', 'MBA')
+OHLC_KEYS = ('open', 'high', 'low', 'close')
+
+# set to a CandleStore to make read_price_df download only the ranges it has not downloaded before
+CANDLE_STORE = None
+
 logger = logging.getLogger(__name__)
 
 
-def read_price_df(instrument: str, granularity: str, start: datetime, end: datetime = None, max_count: int = 4000) -> pd.DataFrame:
+class PriceDownloadError(Exception):
+    pass
+
+
+def read_price_df(instrument: str, granularity: str, start: datetime, end: datetime = None, max_count: int = MAX_COUNT,
+                  compact: bool = False, store: CandleStore = None, price: str = 'M') -> pd.DataFrame:
     """
     Read raw price data into Pandas DataFrame
+    :param compact: return compact prices, see compact_prices
+    :param store: candle store to serve downloaded ranges from, default to CANDLE_STORE
+    :param price: price components, BA or MBA add a half_spread column to the mid prices, see transform
+    """
+    store = store or CANDLE_STORE
+    if store is None:
+        df = candles_to_df(read_price_data(instrument, granularity, start, end, max_count, price=price), price)
+    else:
+        df = read_through_store(store, instrument, granularity, start, end, max_count, price=price)
+    return compact_prices(df) if compact else df
+
 
+def read_through_store(store: CandleStore, instrument: str, granularity: str, start: datetime, end: datetime = None,
+                       max_count: int = MAX_COUNT, price: str = 'M') -> pd.DataFrame:
+    """
+    Download only the ranges missing from the store, save them and read the whole range from the store.
+    Incomplete candles, i.e. the current one, are returned but not stored, the range from them on is downloaded again next time.
+    :param end: default to now, candles after now are not requested and the range after now is not marked as covered
+    :param price: price components, stored as the component of the store
+    """
+    now = datetime.utcnow()
+    until = min(end or now, now)
+    incomplete = []
+    for gap_start, gap_end in store.missing(instrument, granularity, start, until, component=price):
+        raw = read_price_data(instrument, granularity, gap_start, gap_end, max_count, price=price)
+        complete = [el for el in raw if el.get('complete', True)]
+        pending = [el for el in raw if not el.get('complete', True)]
+        covered_end = min(pd.Timestamp(el['time']).tz_convert(None).to_pydatetime() for el in pending) if pending else gap_end
+        store.save(instrument, granularity, candles_to_df(complete, price), gap_start, covered_end, component=price)
+        incomplete.extend(pending)
+        logger.info(f'Stored {len(complete)} {granularity} candles of {instrument} from {gap_start} to {covered_end}')
+
+    df = store.load(instrument, granularity, start, end, component=price)
+    if incomplete:
+        df = pd.concat([df, candles_to_df(incomplete, price)])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df
+
+
+def candles_to_df(raw_data, price: str = 'M') -> pd.DataFrame:
+    """
+    Price DataFrame of raw candles indexed by time, sorted and without duplicated candles
+    :param price: price components of the candles, see transform
     """
-    prices = transform(read_price_data(instrument, granularity, start, end, max_count))
-    return pd.DataFrame(prices).drop_duplicates().set_index('time').sort_index()
+    df = pd.DataFrame(transform(raw_data, price)).set_index('time')
+    # candles are identified by their time, keep the last copy of any candle downloaded twice
+    return df[~df.index.duplicated(keep='last')].sort_index()
 
 
-def read_price_data(instrument, granularity, start=None, end=None, max_count=4000):
+def compact_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact copy of a price frame for long histories: float32 prices and an int64 index of epoch seconds
+    instead of datetimes. Indicators of float32 prices stay float32, see src.finta.core.result_dtype.
+
+    Precision: float32 keeps 24 significant bits, i.e. a relative error up to 6e-8.
+    That is about 0.001 pip for EUR_USD at 1.3 and for USD_JPY at 150, so prices, ranges and indicator levels
+    are fine for pip level signals. Do not use compact prices for anything accumulated over many values or
+    needing sub 0.01 pip accuracy, e.g. PnL, position sizes or tick level spreads: convert back with astype(float).
+    :param df: price DataFrame indexed by time
+    :return: pd.DataFrame, use pd.to_datetime(df.index, unit='s', utc=True) to get the times back
+    """
+    compact = df.astype({col: np.float32 for col in df.columns if pd.api.types.is_float_dtype(df[col])})
+    if isinstance(compact.index, pd.DatetimeIndex):
+        compact.index = pd.Index(compact.index.asi8 // 10 ** 9, name=df.index.name)
+    return compact
+
+
+def stack_prices(prices: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Stack the price frames of many instruments into one long frame with a categorical instrument column,
+    which stores one small integer code per row instead of a string
+    :param prices: dict of instrument to price DataFrame indexed by time
+    :return: pd.DataFrame with the time index as a column, ordered by instrument then time
+    """
+    stacked = pd.concat([df.reset_index() for df in prices.values()], ignore_index=True)
+    codes = np.repeat(np.arange(len(prices)), [len(df) for df in prices.values()])
+    stacked.insert(0, 'instrument', pd.Categorical.from_codes(codes, categories=list(prices)))
+    return stacked
+
+
+def read_price_data(instrument, granularity, start=None, end=None, max_count=MAX_COUNT, workers=DOWNLOAD_WORKERS, price='M'):
     """
     :return List of dictionaries
     :param instrument: A string containing the base currency and quote currency delimited by a “_”.
@@ -56,19 +155,95 @@ def read_price_data(instrument, granularity, start=None, end=None, max_count=400
     :param start: datetime object
     :param end:  datetime object
     :param max_count: number of expected return counts, Oanda has maximum return count as 5000
-    :return: list of dictionaries
+    :param workers: number of windows downloaded concurrently
+    :param price: price components, one of PRICE_COMPONENTS, all components come with the same request
+    :return: list of dictionaries in time order
     """
-    params = build_params(granularity=granularity, start=start, end=end, max_count=max_count)
-    final_response = []
-    for p in params:
-        try:
-            resp = api_request(instrument, p)
-            final_response.extend(resp['candles'])
-        except Exception as err:
-            print("Error: {}".format(err))
-            exit(2)
+    return [candle for window in iter_windows(instrument, granularity, start, end, max_count, workers, price) for candle in window]
 
-    return final_response
+
+def iter_windows(instrument: str, granularity: str, start: datetime = None, end: datetime = None, max_count: int = MAX_COUNT,
+                 workers: int = DOWNLOAD_WORKERS, price: str = 'M') -> Iterator[list]:
+    """
+    Raw candles window by window in time order, candles already yielded by the previous window are dropped.
+    At most `workers` windows are downloaded ahead of the consumer, so memory does not grow with the range.
+    See read_price_data for the parameters
+    """
+    if price not in PRICE_COMPONENTS:
+        raise ValueError(f'Invalid price components: {price}, expected one of {PRICE_COMPONENTS}')
+    windows = plan_windows(granularity=granularity, start=start, end=end, max_count=max_count)
+    params = iter(windows if price == 'M' else [dict(p, price=price) for p in windows])
+    last_time = ''
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque(pool.submit(download_window, instrument, p) for p in islice(params, workers))
+        while pending:
+            candles = pending.popleft().result()
+            p = next(params, None)
+            if p is not None:
+                pending.append(pool.submit(download_window, instrument, p))
+            candles = [candle for candle in candles if candle['time'] > last_time]
+            if candles:
+                last_time = candles[-1]['time']
+                yield candles
+
+
+def iter_price_chunks(instrument: str, granularity: str, start: datetime = None, end: datetime = None, max_count: int = MAX_COUNT,
+                      workers: int = DOWNLOAD_WORKERS, compact: bool = False, price: str = 'M') -> Iterator[pd.DataFrame]:
+    """
+    Streaming version of read_price_df: one price DataFrame per downloaded window, in time order and without
+    duplicated candles, e.g. to write long ranges to a sink of src.db.sinks with constant memory
+    :param compact: yield compact prices, see compact_prices
+    """
+    for window in iter_windows(instrument, granularity, start, end, max_count, workers, price):
+        df = candles_to_df(window, price)
+        yield compact_prices(df) if compact else df
+
+
+def download_window(instrument: str, p: dict) -> list:
+    """
+    Candles of one window [from, to) with count based pagination: request `count` candles from the start of the window
+    and continue after the last returned candle until the window is complete.
+    Requests are throttled by RATE_LIMITER and retried with exponential backoff on transient errors
+    :param instrument: ccy_pair
+    :param p: window, see plan_windows
+    :return: list of candles
+    """
+    params = {k: v for k, v in p.items() if k != 'to'}
+    params.setdefault('count', MAX_COUNT)
+    end = datetime.strptime(p['to'], OANDA_DATETIME_FORMAT)
+    step = timedelta(seconds=get_granularity_seconds(p['granularity']))
+    candles = []
+    while True:
+        batch = request_candles(instrument, params)
+        candles.extend(candle for candle in batch if candle['time'][:19] < p['to'])
+        if len(batch) < params['count'] or datetime.strptime(batch[-1]['time'][:19], OANDA_DATETIME_FORMAT) + step >= end:
+            return candles
+        # more candles than estimated, e.g. a window ending during the weekend close
+        params = dict(params, **{'from': batch[-1]['time'], 'includeFirst': False})
+
+
+def request_candles(instrument: str, p: dict) -> list:
+    """
+    One candles request, throttled by RATE_LIMITER and retried with exponential backoff on transient errors
+    """
+
+    def request():
+        RATE_LIMITER.acquire()
+        return api_request(instrument, p)
+
+    try:
+        return retry(request, retries=DOWNLOAD_RETRIES, retry_on=is_transient)['candles']
+    except Exception as err:
+        raise PriceDownloadError(f'Failed to read price data for {instrument} {p}: {err}') from err
+
+
+def is_transient(err: Exception) -> bool:
+    """
+    Rate limited, server side and connection errors are worth retrying, bad requests are not
+    """
+    if isinstance(err, V20Error):
+        return int(err.code) == 429 or int(err.code) >= 500
+    return isinstance(err, (requests.ConnectionError, requests.Timeout))
 
 
 def api_request(instrument, p):
@@ -78,21 +253,70 @@ def api_request(instrument, p):
     return resp
 
 
-def transform(raw_data):
-    return [
-        {
-            'time': parser.parse(el.get('time')),
-            'open': float(el['mid']['o']),
-            'high': float(el['mid']['h']),
-            'low': float(el['mid']['l']),
-            'close': float(el['mid']['c'])
-        } for el in raw_data
-    ]
+def transform(raw_data, price: str = 'M') -> Dict[str, np.ndarray]:
+    """
+    Parse raw candles into columns, times are parsed in one pass.
+    Candles with bid and ask prices, i.e. price BA or MBA, are kept as mid prices plus a float32 half_spread column
+    instead of three sets of ohlc columns: the largest half spread of the open, high, low and close, so mid +/- half_spread
+    bounds the ask and bid prices, see backtester.fill_orders. Without mid prices the mid is the average of bid and ask.
+    :param raw_data: list of candles with RFC3339 time and mid, bid or ask prices as strings
+    :param price: price components of the candles, one of PRICE_COMPONENTS
+    :return: dict of time (UTC DatetimeIndex), open, high, low, close and optionally half_spread arrays, ready for pd.DataFrame
+    """
+    columns = {'time': pd.to_datetime([el['time'] for el in raw_data], utc=True)}
+    if 'B' in price and 'A' in price:
+        bid, ask = _ohlc(raw_data, 'bid'), _ohlc(raw_data, 'ask')
+        mid = _ohlc(raw_data, 'mid') if 'M' in price else (bid + ask) / 2
+        columns.update(zip(OHLC_KEYS, mid))
+        columns['half_spread'] = ((ask - bid).max(axis=0, initial=0) / 2).astype(np.float32)
+    else:
+        columns.update(zip(OHLC_KEYS, _ohlc(raw_data, {'M': 'mid', 'B': 'bid', 'A': 'ask'}[price])))
+    return columns
+
+
+def _ohlc(raw_data, component: str) -> np.ndarray:
+    """
+    :return: 4 x n array of the open, high, low and close prices of one component, e.g. mid
+    """
+    prices = [el[component] for el in raw_data]
+    return np.array([[p[key] for p in prices] for key in 'ohlc'], dtype=np.float64).reshape(4, len(prices))
+
+
+def plan_windows(granularity: str, start: datetime, end: datetime = None, max_count: int = MAX_COUNT) -> List[dict]:
+    """
+    Split [start, end) into independent windows of at most max_count candles, counting only the time the FX market
+    is open, so windows spanning a weekend are not under filled. Windows entirely inside market closures are skipped.
+    Each window carries the number of candles to request from its start, see download_window.
+    :param granularity: see build_params
+    :param start: datetime
+    :param end: datetime, default to now
+    :param max_count: maximum number of candles of a request, 5000 for Oanda
+    :return: list of dicts of from, to, count and granularity in time order
+    """
+    end = end or datetime.utcnow()
+
+    def window(s: datetime, e: datetime, count: int) -> dict:
+        return {'from': s.strftime(OANDA_DATETIME_FORMAT), 'to': e.strftime(OANDA_DATETIME_FORMAT), 'count': count, 'granularity': granularity}
+
+    if granularity == 'M':
+        return [window(start, end, min(max_count, (end.year - start.year) * 12 + end.month - start.month + 1))]
+    if granularity == 'W':
+        return [window(start, end, min(max_count, (end - start).days // 7 + 2))]
+
+    seconds = get_granularity_seconds(granularity)
+    windows = []
+    while start < end:
+        e = min(end, fx_calendar.add_trading_seconds(start, seconds * max_count))
+        open_seconds = fx_calendar.trading_seconds(start, e)
+        if open_seconds > 0:
+            windows.append(window(start, e, min(max_count, int(np.ceil(open_seconds / seconds)))))
+        start = e
+    return windows
 
 
 def build_params(granularity: str, start: datetime, end: datetime = None, max_count: int = 4000):
     """
-    Compose params for querying Oanda
+    Compose params for querying Oanda with fixed length windows, see plan_windows for windows sized by the trading calendar
     :param granularity:
         Value	Description
         S5	5 second candlesticks, minute alignment
@@ -143,24 +367,7 @@ def build_params(granularity: str, start: datetime, end: datetime = None, max_co
         ]
     candlesticks = get_candlesticks(start=start, end=end, granularity=granularity)
 
-    multiplier = 1
-
-    if granularity == 'W':
-        multiplier = 7 * 24 * 60 * 60
-    elif granularity == 'M':
-        multiplier = 30 * 24 * 60 * 60
-    elif granularity == 'D':
-        multiplier = 24 * 60 * 60
-    else:
-        nums = int(re.compile(r"\d+$").search(granularity)[0])
-        if granularity.startswith('H'):
-            multiplier = 60 * 60 * nums
-
-        if granularity.startswith('M'):
-            multiplier = 60 * nums
-
-        if granularity.startswith('S'):
-            multiplier = nums
+    multiplier = get_granularity_seconds(granularity)
 
     params = []
     no_of_requests = int(np.ceil(candlesticks / max_count))
@@ -178,6 +385,29 @@ def build_params(granularity: str, start: datetime, end: datetime = None, max_co
     return params
 
 
+def get_granularity_seconds(granularity: str) -> int:
+    """
+    Length of one candlestick in seconds, months are approximated as 30 days
+    :param granularity: string, e.g. S5, M15, H1, D
+    :return: int
+    """
+    if granularity == 'W':
+        return 7 * 24 * 60 * 60
+    if granularity == 'M':
+        return 30 * 24 * 60 * 60
+    if granularity == 'D':
+        return 24 * 60 * 60
+
+    nums = int(re.compile(r"\d+$").search(granularity)[0])
+    if granularity.startswith('H'):
+        return 60 * 60 * nums
+    if granularity.startswith('M'):
+        return 60 * nums
+    if granularity.startswith('S'):
+        return nums
+    raise ValueError(f'Invalid granularity: {granularity}')
+
+
 def get_candlesticks(start, end, granularity):
     """
     Get # of candlesticks
@@ -209,18 +439,14 @@ def get_candlesticks(start, end, granularity):
         return int(np.ceil(seconds / nums))
 
 
-@cache(seconds=60)
 def get_spot_rate(ccy_pair: str) -> float:
-    p = {
-        "count": 1,
-        "granularity": "S5"
-    }
+    """
+    Mid spot rate of a pair from the shared SpotRateService, None when it can not be read.
+    Use SPOT_RATES.rates to read the rates of many pairs in one request
+    """
     try:
-        resp = api_request(ccy_pair, p)
-        close = float(resp['candles'][0]['mid']['c'])
-        logger.info(f'Close fx rate for {ccy_pair} is: {close}')
-        return close
-    except V20Error:
+        return SPOT_RATES.rate(ccy_pair)
+    except (V20Error, ValueError):
         logger.info(f'Failed to get spot rate for: {ccy_pair}')
 
 
@@ -0,0 +1,145 @@
+"""
+Spot rates of many instruments with one PricingInfo request.
+
+    rates = SPOT_RATES.rates(['GBP_USD', 'EUR_JPY', 'GBP_SGD'])
+
+Each fetched instrument is cached for its own time to live, so a page of open trades only fetches the instruments
+whose rates expired, all in one round trip. Pairs Oanda does not quote, e.g. GBP_SGD, are inverted from the opposite
+pair or triangulated through a pivot currency: GBP_SGD = GBP_USD * USD_SGD.
+Rates are mid prices, the average of the best bid and ask.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import oandapyV20.endpoints.accounts as accounts
+import oandapyV20.endpoints.pricing as pricing
+
+from src.env import RUNNING_ENV
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 5
+PIVOT_CURRENCIES = ('USD', 'EUR')
+
+# a rate as a product of (instrument, power) legs, power -1 for an inverted pair
+Legs = List[Tuple[str, int]]
+
+
+class SpotRateService(object):
+    """
+    Thread safe cache of spot rates, fetched with PricingInfo in batches
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, ttls: Dict[str, float] = None, account: str = 'mt4',
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param ttl: seconds a fetched rate is reused
+        :param ttls: seconds per instrument overriding ttl, e.g. {'XAU_USD': 1}
+        :param account: trading account used for the pricing and instruments requests
+        :param clock: monotonic clock in seconds
+        """
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.account = account
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._rates = {}  # (env, instrument) -> (rate, expiry)
+        self._instruments = {}  # env -> names of the instruments Oanda quotes
+
+    def rate(self, ccy_pair: str) -> float:
+        """
+        :param ccy_pair: currency pair, e.g. EUR_USD
+        :return: mid rate, units of the quote currency per unit of the base currency
+        """
+        return self.rates([ccy_pair])[ccy_pair]
+
+    def rates(self, ccy_pairs: Iterable[str]) -> Dict[str, float]:
+        """
+        Rates of many pairs with at most one pricing request for the expired or missing instruments.
+        The request runs outside the lock, so callers served from the cache do not wait for it.
+        :param ccy_pairs: currency pairs, e.g. ['GBP_USD', 'GBP_SGD']
+        :return: dict of pair to mid rate
+        :raise ValueError: if a pair can not be priced
+        """
+        legs = {pair: self._legs(pair) for pair in set(ccy_pairs)}
+        needed = {instrument for pair_legs in legs.values() for instrument, _ in pair_legs}
+        env = RUNNING_ENV.env
+        with self._lock:
+            now = self.clock()
+            cached = {i: self._rates[(env, i)][0] for i in needed if (env, i) in self._rates and self._rates[(env, i)][1] > now}
+        expired = sorted(needed - set(cached))
+        if expired:
+            fetched = self._request_prices(expired)
+            missing = [i for i in expired if i not in fetched]
+            if missing:
+                raise ValueError(f'No price returned for {missing}')
+            with self._lock:
+                for instrument in expired:
+                    self._rates[(env, instrument)] = (fetched[instrument], now + self.ttls.get(instrument, self.ttl))
+            cached.update(fetched)
+
+        res = {}
+        for pair, pair_legs in legs.items():
+            rate = 1.0
+            for instrument, power in pair_legs:
+                rate *= cached[instrument] ** power
+            res[pair] = rate
+        return res
+
+    def _legs(self, ccy_pair: str) -> Legs:
+        """
+        Quoted instruments making up a pair: itself, its inverse or two legs through a pivot currency
+        """
+        base, quote = ccy_pair.split('_')
+        if base == quote:
+            return []
+        direct = self._direct(base, quote)
+        if direct is not None:
+            return direct
+        for pivot in PIVOT_CURRENCIES:
+            first, second = self._direct(base, pivot), self._direct(pivot, quote)
+            if first is not None and second is not None:
+                return first + second
+        raise ValueError(f'No rate available for {ccy_pair}')
+
+    def _direct(self, base: str, quote: str) -> Optional[Legs]:
+        if base == quote:
+            return []
+        instruments = self.instruments()
+        if f'{base}_{quote}' in instruments:
+            return [(f'{base}_{quote}', 1)]
+        if f'{quote}_{base}' in instruments:
+            return [(f'{quote}_{base}', -1)]
+        return None
+
+    def instruments(self) -> set:
+        """
+        Names of the instruments quoted for the account, requested once per environment
+        """
+        env = RUNNING_ENV.env
+        with self._lock:
+            if env in self._instruments:
+                return self._instruments[env]
+        r = accounts.AccountInstruments(accountID=RUNNING_ENV.get_account(self.account))
+        instruments = {el['name'] for el in RUNNING_ENV.api.request(r)['instruments']}
+        with self._lock:
+            return self._instruments.setdefault(env, instruments)
+
+    def _request_prices(self, instruments: List[str]) -> Dict[str, float]:
+        logger.info(f'Reading spot rates of {instruments}')
+        r = pricing.PricingInfo(accountID=RUNNING_ENV.get_account(self.account), params={'instruments': ','.join(instruments)})
+        return {
+            price['instrument']: (float(price['bids'][0]['price']) + float(price['asks'][0]['price'])) / 2
+            for price in RUNNING_ENV.api.request(r)['prices']
+        }
+
+    def clear(self):
+        with self._lock:
+            self._rates.clear()
+            self._instruments.clear()
+
+
+# shared by the web endpoints, position sizing and pricer.get_spot_rate
+SPOT_RATES = SpotRateService()
@@ -25,3 +25,139 @@ Profit Target:
 
 Stop loss; 5 pips below or above of the entry bar.
 """
+import logging
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.backtester import fill_orders
+from src.finta import core
+from src.finta.batch import Packed, to_wide
+from src.pricer import read_price_df
+from src.utils.common import has_special_instrument
+
+logger = logging.getLogger(__name__)
+
+# Profit targets in pips per timeframe and instrument, '*' applies to instruments not listed
+PROFIT_TARGETS = {
+    'M15': {'EUR_USD': 9, 'GBP_USD': 12, '*': 9},
+    'M30': {'EUR_USD': 14, 'GBP_USD': 18, '*': 14},
+    'H4': {'EUR_USD': 60, 'GBP_USD': 70, '*': 60},
+    'D': {'EUR_USD': 200, 'GBP_USD': 250, '*': 200},
+}
+
+
+def profit_target(instrument: str, granularity: str, targets: dict = None) -> float:
+    """
+    Profit target in pips for the instrument and timeframe
+    :param instrument: ccy pair
+    :param granularity: M15, M30, H4 or D
+    :param targets: table of targets, default to PROFIT_TARGETS
+    :return: pips
+    """
+    table = (targets or PROFIT_TARGETS)[granularity]
+    return table.get(instrument, table['*'])
+
+
+def pip_size(instrument: str) -> float:
+    return 0.01 if has_special_instrument(instrument) else 0.0001
+
+
+def compute_indicators(close: pd.DataFrame, rsi_period: int = 11, bb_period: int = 20, std_multiplier: float = 2) -> Dict[str, pd.DataFrame]:
+    """
+    RSI and Bollinger bands on RSI and on price, for all instruments in one pass.
+    The closes are packed once like src.finta.batch does, so each instrument gets TA.RSI and TA.BBANDS of its own bars,
+    missing bars are skipped by both and are NaN in the results. The RSI bands are computed on the packed RSI rather
+    than with batch.bbands, which would repack the RSI and drop its leading NaN from the first window.
+    :param close: time x instrument close prices
+    :param rsi_period: int
+    :param bb_period: int
+    :param std_multiplier: band width in standard deviations
+    :return: dict of time x instrument frames: rsi, rsi_upper, rsi_lower, upper, lower
+    """
+    packed = Packed(close.to_numpy())
+    rsi = core.rsi(packed.arrays[0], rsi_period)
+    rsi_upper, _, rsi_lower = core.bbands(rsi, bb_period, std_multiplier)
+    upper, _, lower = core.bbands(packed.arrays[0], bb_period, std_multiplier)
+    values = {'rsi': rsi, 'rsi_upper': rsi_upper, 'rsi_lower': rsi_lower, 'upper': upper, 'lower': lower}
+    return {name: pd.DataFrame(packed.unpack(v), index=close.index, columns=close.columns) for name, v in values.items()}
+
+
+def find_signals(close: pd.DataFrame, ind: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Entry rules (see above). Only the first bar of a run of signals on the same side is kept.
+    :return: time x instrument frame, 1 long, -1 short, 0 none
+    """
+    rsi = ind['rsi']
+    is_long = (rsi > 70) & (rsi > ind['rsi_upper']) & (close > ind['upper'])
+    is_short = (rsi < 30) & (rsi < ind['rsi_lower']) & (close < ind['lower'])
+    sides = is_long.astype(np.int8) - is_short.astype(np.int8)
+    return sides.where(sides != sides.shift(1), 0)
+
+
+def backtest(prices: Dict[str, pd.DataFrame], granularity: str, targets: dict = None, sl_pips: float = 5) -> pd.DataFrame:
+    """
+    Enter at the close of the signal bar, stop loss sl_pips beyond the low/high of the entry bar and take profit from the target table
+    :param prices: dict of instrument to ohlc DataFrame indexed by time, all for the same granularity
+    :param granularity: M15, M30, H4 or D
+    :param targets: table of profit targets, default to PROFIT_TARGETS
+    :param sl_pips: stop loss adjustment in pips
+    :return: pd.DataFrame of trades
+    """
+    close, high, low = (to_wide(prices, col) for col in ('close', 'high', 'low'))
+    sides = find_signals(close, compute_indicators(close)).to_numpy()
+    times = close.index
+    trades = []
+    for col, instrument in enumerate(close.columns):
+        bars = np.flatnonzero(sides[:, col])
+        if not bars.size:
+            continue
+        side = sides[bars, col].astype(np.float64)
+        pip = pip_size(instrument)
+        entry = close.iloc[bars, col].to_numpy()
+        sl = np.where(side > 0, low.iloc[bars, col].to_numpy() - sl_pips * pip, high.iloc[bars, col].to_numpy() + sl_pips * pip)
+        tp = entry + side * profit_target(instrument, granularity, targets) * pip
+        h, lo = high.iloc[:, col].to_numpy(), low.iloc[:, col].to_numpy()
+        _, close_idx, outcome = fill_orders(h, lo, bars + 1, side > 0, entry, sl, tp, is_pending=np.zeros(len(bars), dtype=bool))
+        exit_price = np.where(outcome == 1, tp, np.where(outcome == -1, sl, np.nan))
+        trades.append(pd.DataFrame({
+            'instrument': instrument,
+            'granularity': granularity,
+            'time': times[bars],
+            'side': np.where(side > 0, 'long', 'short'),
+            'entry': entry,
+            'sl': sl,
+            'tp': tp,
+            'outcome': np.select([outcome == 1, outcome == -1], ['win', 'loss'], 'open'),
+            'close_time': times[np.maximum(close_idx, 0)].where(close_idx >= 0),
+            'pips': (exit_price - entry) * side / pip,
+        }))
+    if not trades:
+        return pd.DataFrame(columns=['instrument', 'granularity', 'time', 'side', 'entry', 'sl', 'tp', 'outcome', 'close_time', 'pips'])
+    return pd.concat(trades, ignore_index=True)
+
+
+def scan(instruments: list, granularities: list, start: datetime, end: datetime, targets: dict = None) -> pd.DataFrame:
+    """
+    Backtest the strategy for every instrument and timeframe
+    :return: pd.DataFrame of trades
+    """
+    results = []
+    for granularity in granularities:
+        prices = {inst: read_price_df(instrument=inst, granularity=granularity, start=start, end=end) for inst in instruments}
+        results.append(backtest(prices, granularity, targets))
+    return pd.concat(results, ignore_index=True)
+
+
+if __name__ == '__main__':
+    pairs = ['EUR_USD', 'GBP_USD', 'AUD_USD', 'USD_JPY', 'USD_CAD', 'EUR_GBP', 'USD_CHF', 'GBP_AUD']
+    all_trades = scan(pairs, ['M15', 'M30', 'H4', 'D'], start=datetime(2018, 1, 1), end=datetime(2020, 8, 31))
+    summary = all_trades.groupby(['granularity', 'instrument']).agg(
+        trades=('pips', 'size'),
+        wins=('outcome', lambda x: (x == 'win').sum()),
+        losses=('outcome', lambda x: (x == 'loss').sum()),
+        pips=('pips', 'sum'),
+    )
+    print(summary)
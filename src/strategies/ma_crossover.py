@@ -1,6 +1,6 @@
 import logging
 import queue
-import threading
+import time
 from collections import namedtuple
 from datetime import datetime, date
 
@@ -10,9 +10,11 @@ import pandas as pd
 
 from src.backtester import BackTester
 from src.db.ohlc_to_db import connect_to_db
+from src.finta.incremental import ATR, EMA
 from src.indicators import average_true_range, exponential_moving_average
 from src.orders.order import Order, OrderStatus, OrderSide
 from src.pricer import read_price_df
+from src.strategy import Strategy
 
 # Tested with real tick data
 # Rules: Simple MA cross over strategy, can be used in either 1 hour or 1 day timeframe
@@ -58,13 +60,14 @@ def generate_signals(instrument: str = "EUR_USD", granularity: str = "H1", short
     return df
 
 
-def read_db_price(instrument: str, start_date: [datetime, date], end_date: [date, datetime]):
+def read_db_price(instrument: str, start_date: [datetime, date], end_date: [date, datetime], batch_size: int = 10000):
     """
     Read historical price
     :param instrument: Currency pair: GBP_USD, EUR_USD etc.
     :param start_date: start
     :param end_date: end
-    :return:
+    :param batch_size: number of rows fetched from the cursor at once
+    :return: generator of OHLC
     """
     import os
     basedir = os.path.abspath(os.path.dirname(__file__))
@@ -74,17 +77,38 @@ def read_db_price(instrument: str, start_date: [datetime, date], end_date: [date
     s = start_date.strftime('%Y-%m-%d')
     e = end_date.strftime('%Y-%m-%d')
     table_name = f"{instrument.replace('_', '').lower()}_ohlc"
-    cur.execute(f"select * from {table_name} where date(time) between ? and ?", (s, e))
+    cur.execute(f"select time, open, high, low, close from {table_name} where date(time) between ? and ?", (s, e))
 
-    for row in cur.fetchall():
-        yield row
+    try:
+        rows = cur.fetchmany(batch_size)
+        while rows:
+            yield from map(OHLC._make, rows)
+            rows = cur.fetchmany(batch_size)
+    finally:
+        conn.close()
+
+
+def iter_price_arrays(times, opens, highs, lows, closes):
+    """
+    Iterate column arrays (e.g. from a DataFrame or np.load) as OHLC bars
+    :return: iterator of OHLC
+    """
+    return map(OHLC._make, zip(times, opens, highs, lows, closes))
 
 
 class MaTrader:
-    def __init__(self, instrument: str, price_events: queue.Queue, signals: list, running: bool = False):
+    def __init__(self, instrument: str, price_events: queue.Queue = None, signals: list = None, running: bool = False):
+        """
+        Replay historical prices against pre-computed crossover signals
+        :param instrument: ccy pair
+        :param price_events: queue of OHLC, only needed by the threaded run mode used for live prices
+        :param signals: list of crossover signals with time, positions and atr
+        :param running: keep polling price_events in run
+        """
         self.price_events = price_events
         self.orders = []
-        self.signals = signals
+        self.open_order = None
+        self.signals = signals or []
         self.process_index = 0
         self.running = running
         self.instrument = instrument
@@ -107,10 +131,30 @@ class MaTrader:
             except Exception as ex:
                 logger.exception(f'Error while processing item: [{ex}]')
 
+    def replay(self, bars) -> dict:
+        """
+        Feed historical bars to process_event in the calling thread, no queue or polling involved
+        :param bars: iterable of OHLC, e.g. read_db_price or iter_price_arrays
+        :return: dict with number of bars, elapsed seconds and bars per second
+        """
+        count = 0
+        started = time.perf_counter()
+        for ohlc in bars:
+            self.process_event(ohlc)
+            count += 1
+        elapsed = time.perf_counter() - started
+        stats = {
+            'bars': count,
+            'seconds': round(elapsed, 3),
+            'bars_per_second': round(count / elapsed) if elapsed else count
+        }
+        logger.info(f"Replayed {count} bars in {stats['seconds']} seconds, {stats['bars_per_second']} bars/second")
+        return stats
+
     def process_event(self, ohlc):
 
         if self.process_index < len(self.signals) and ohlc.time > self.signals[self.process_index]['time']:
-            filled_order = next((o for o in self.orders if o.is_open), None)
+            filled_order = self.open_order
             if filled_order:
                 if filled_order.is_long:
                     # close long filled order
@@ -130,28 +174,72 @@ class MaTrader:
                         filled_order.close_with_loss(ohlc.time, ohlc.open)
 
             is_long = self.signals[self.process_index]['positions'] == 1
-            self.orders.append(Order(
+            self.open_order = Order(
                 order_date=ohlc.time,
                 instrument=self.instrument,
                 side=OrderSide.LONG if is_long else OrderSide.SHORT,
                 entry=ohlc.open,
-                tp=ohlc.open + crossover_signals[self.process_index]['atr'] * 5 * (1 if is_long else -1),  # 5 times ATR
+                tp=ohlc.open + self.signals[self.process_index]['atr'] * 5 * (1 if is_long else -1),  # 5 times ATR
                 status=OrderStatus.FILLED
-            ))
+            )
+            self.orders.append(self.open_order)
             self.process_index += 1
 
-        filled_order = next((o for o in self.orders if o.is_open), None)
+        filled_order = self.open_order
         if filled_order:
             if filled_order.is_long:
                 # buy order, low >= tp
                 if ohlc.low >= filled_order.tp:
                     logger.info(f"Closing long order when profit target met: {(filled_order.tp - filled_order.entry) * self.multiplier} pips at [{ohlc.time}]")
                     filled_order.close_with_win(ohlc[0], filled_order.tp)
+                    self.open_order = None
             else:
                 # sell order, high >= tp
                 if ohlc.high <= filled_order.tp:
                     logger.info(f"Closing short order when profit target met: {(filled_order.entry - filled_order.tp) * self.multiplier} pips at [{ohlc.time}]")
                     filled_order.close_with_win(ohlc[0], filled_order.tp)
+                    self.open_order = None
+
+
+class MaCrossoverStrategy(Strategy):
+    """
+    MA crossover rules above as a Strategy, the same code runs with HistoricalEngine and LiveEngine.
+    EMAs and ATR are the TA.EMA / TA.ATR definitions used by trading.ma_crossover, updated incrementally.
+    On a crossover any open order is closed at the bar close and a new one is opened with TP of tp_multiplier * ATR.
+    """
+
+    def __init__(self, instrument: str, short_win: int = 16, long_win: int = 64, atr_period: int = 14, tp_multiplier: float = 5):
+        self.short_win = short_win
+        self.long_win = long_win
+        self.atr_period = atr_period
+        self.tp_multiplier = tp_multiplier
+        self.bar_count = 0
+        self.signal = 0
+        super().__init__(instrument)
+
+    def declare_features(self) -> dict:
+        return {
+            'ema_short': EMA(self.short_win),
+            'ema_long': EMA(self.long_win),
+            'atr': ATR(self.atr_period),
+        }
+
+    def on_bar(self, bar):
+        self.bar_count += 1
+        if self.bar_count <= self.short_win:
+            return
+        signal = 1 if self.values['ema_short'] > self.values['ema_long'] else 0
+        position, self.signal = signal - self.signal, signal
+        if position == 0:
+            return
+
+        for o in list(self.open_orders):
+            self.close(o, bar.time, bar.close)
+        tp = bar.close + self.values['atr'] * self.tp_multiplier * position
+        if position == 1:
+            self.buy(bar.time, bar.close, tp=tp)
+        else:
+            self.sell(bar.time, bar.close, tp=tp)
 
 
 if __name__ == '__main__':
@@ -168,17 +256,8 @@ if __name__ == '__main__':
     crossover_signals = signals[signals.positions.isin([-1, 1])].to_dict('records')
     print(json.dumps(crossover_signals, indent=2))
 
-    events = queue.Queue()
-    ma = MaTrader(instrument=ccy_pair, price_events=events, signals=crossover_signals, running=True)
-
-    for p in read_db_price(instrument=ccy_pair, start_date=start, end_date=end):
-        events.put(OHLC(p[0], p[1], p[2], p[3], p[4]))
-
-    threading.Thread(target=ma.run).start()
-
-    events.join()
-
-    ma.running = False
+    ma = MaTrader(instrument=ccy_pair, signals=crossover_signals)
+    ma.replay(read_db_price(instrument=ccy_pair, start_date=start, end_date=end))
 
     BackTester().print_stats(ma.orders)
 
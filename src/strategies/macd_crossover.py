@@ -30,27 +30,30 @@ MACD line crossover strategy
 from os import path
 from functools import partial
 from datetime import datetime, timedelta
+from itertools import product
 
 import pandas as pd
 import numpy as np
 
-from src.backtester import BackTester
+from src.backtester import BackTester, fill_orders
+from src.features import FeatureEngine
 from src.finta.ta import TA
-from src.pricer import read_price_df
 from src.orders.order import Order, OrderSide, OrderStatus
+from src.timeframes import read_pyramid
 
 
 def generate_price_feed(instrument: str, start: datetime = None, end: datetime = None, persist_dir: str = 'c:/temp'):
     start = start or datetime(2005, 1, 1)  # earliest date support by Oanda
     end = end or datetime.today() - timedelta(days=1)
-    pd_h1 = read_price_df(instrument=instrument, granularity='H1', start=start, end=end)
-    pd_d = read_price_df(instrument=instrument, granularity='D', start=start, end=end)
-    pd_h1[['macd', 'signal']] = TA.MACD(pd_h1)
-    pd_h1['ema_200'] = TA.EMA(pd_h1, period=200)
-    pd_h1['atr'] = TA.ATR(pd_h1)
-    pd_h1['rsi'] = TA.RSI(pd_h1)
-    pd_d['atr'] = TA.ATR(pd_d)
-    pd_d['rsi'] = TA.RSI(pd_d)
+    # daily bars are derived from the H1 candles, only H1 is downloaded
+    pyramid = read_pyramid(instrument, 'H1', start=start, end=end)
+    pd_h1 = FeatureEngine(pyramid.get('H1')).enrich(
+        ['macd_12_26', 'macd_signal_12_26_9', 'ema_200', 'atr_14', 'rsi_14'],
+        columns={'macd_12_26': 'macd', 'macd_signal_12_26_9': 'signal', 'atr_14': 'atr', 'rsi_14': 'rsi'}
+    )
+    pd_d = FeatureEngine(pyramid.get('D')).enrich(
+        ['atr_14', 'rsi_14'], columns={'atr_14': 'atr', 'rsi_14': 'rsi'}
+    )
 
     pd_h1.reset_index(level=0, inplace=True)
     pd_h1 = pd_h1.apply(partial(_enrich, pd_d), axis=1).set_index('time')
@@ -69,51 +72,127 @@ def _enrich(pd_d, row):
 backtester = BackTester(strategy='MACD crossover')
 
 
+def find_candidates(price_df: pd.DataFrame) -> np.ndarray:
+    """
+    Vectorized entry rules (see above)
+    :param price_df: price feed with close, macd, signal and ema_200 columns
+    :return: array of sides per bar: 1 long, -1 short, 0 none
+    """
+    comparison = np.where(price_df['macd'].to_numpy() > price_df['signal'].to_numpy(), 1, 0)
+    cross = np.zeros(len(comparison))
+    cross[1:] = np.diff(comparison)
+    close = price_df['close'].to_numpy()
+    ema_200 = price_df['ema_200'].to_numpy()
+    macd = price_df['macd'].to_numpy()
+    is_long = (cross == 1) & (close > ema_200) & (macd < 0)
+    is_short = (cross == -1) & (close < ema_200) & (macd > 0)
+    return is_long.astype(np.int8) - is_short.astype(np.int8)
+
+
+def limit_one_side(sides: np.ndarray, maximum_order_size_in_one_side: int) -> np.ndarray:
+    """
+    Drop candidates which would make more than maximum_order_size_in_one_side consecutive orders on the same side
+    :param sides: candidate sides in time order, 1 long, -1 short
+    :param maximum_order_size_in_one_side: int
+    :return: bool mask of accepted candidates
+    """
+    accepted = np.zeros(len(sides), dtype=bool)
+    if maximum_order_size_in_one_side <= 0:
+        return accepted
+    last_side, streak = 0, 0
+    for idx, side in enumerate(sides):
+        if side == last_side:
+            if streak >= maximum_order_size_in_one_side:
+                continue
+            streak += 1
+        else:
+            last_side, streak = side, 1
+        accepted[idx] = True
+    return accepted
+
+
+def generate_orders(instrument: str, price_df: pd.DataFrame, maximum_order_size_in_one_side: int = 4) -> list:
+    """
+    Pending orders for the next bar open, with 1 ATR stop loss and 1.5 ATR take profit
+    :param instrument: ccy pair
+    :param price_df: price feed with time, open, close, macd, signal, ema_200 and atr columns
+    :param maximum_order_size_in_one_side: int
+    :return: list of Orders
+    """
+    sides = find_candidates(price_df)
+    candidates = np.flatnonzero(sides)
+    candidates = candidates[limit_one_side(sides[candidates], maximum_order_size_in_one_side)]
+
+    times = pd.to_datetime(price_df['time']).to_numpy()[candidates]
+    entries = price_df['open'].shift(-1).to_numpy()[candidates]
+    atrs = price_df['atr'].to_numpy()[candidates]
+    return [
+        Order(
+            order_date=pd.Timestamp(time) + timedelta(hours=1),
+            instrument=instrument,
+            side=OrderSide.LONG if side == 1 else OrderSide.SHORT,
+            entry=entry,
+            sl=entry - atr * side,
+            tp=entry + atr * 1.5 * side,
+            status=OrderStatus.PENDING)
+        for time, side, entry, atr in zip(times, sides[candidates], entries, atrs)
+    ]
+
+
 def backtest(instrument: str, start: str = None, end: str = None, maximum_order_size_in_one_side: int = 4):
     if not path.exists(f'c:/temp/{instrument.lower()}_macd.csv'):
         generate_price_feed(instrument)
     price_df = pd.read_csv(f'c:/temp/{instrument.lower()}_macd.csv')
     if start and end:
         price_df = price_df[(price_df['time'] >= start) & (price_df['time'] < end)]
-    price_df['comparison'] = np.where(price_df['macd'] > price_df['signal'], 1, 0)
-    price_df['cross'] = price_df['comparison'].diff()
-    price_df['next_open'] = price_df['open'].shift(-1)
     price_df['time'] = pd.to_datetime(price_df['time'])
 
-    orders = []
-    for idx, ohlc in enumerate(price_df.to_dict('records')):
-        is_all_long = True if len(orders) >= maximum_order_size_in_one_side and not any([o.is_short for o in orders[-maximum_order_size_in_one_side:]]) else False
-        is_all_short = True if len(orders) >= maximum_order_size_in_one_side and not any([o.is_long for o in orders[-maximum_order_size_in_one_side:]]) else False
-        # Generate buy order: (rules above)
-        if ohlc['cross'] == 1 and ohlc['close'] > ohlc['ema_200'] and ohlc['macd'] < 0 and not is_all_long:
-            atr = ohlc['atr']
-            entry = ohlc['next_open']
-            orders.append(
-                Order(
-                    order_date=ohlc['time'] + timedelta(hours=1),
-                    instrument=instrument,
-                    side=OrderSide.LONG,
-                    entry=entry,
-                    sl=entry - atr,
-                    tp=entry + atr * 1.5,
-                    status=OrderStatus.PENDING)
-            )
-        # Generate sell order: (rules above)
-        if ohlc['cross'] == -1 and ohlc['close'] < ohlc['ema_200'] and ohlc['macd'] > 0 and not is_all_short:
-            atr = ohlc['atr']
-            entry = ohlc['next_open']
-            orders.append(
-                Order(
-                    order_date=ohlc['time'] + timedelta(hours=1),
-                    instrument=instrument,
-                    side=OrderSide.SHORT,
-                    entry=entry,
-                    sl=entry + atr,
-                    tp=entry - atr * 1.5,
-                    status=OrderStatus.PENDING)
-            )
-
-    return backtester.run(price_feed=price_df.set_index('time'), orders=orders, print_stats=True)
+    orders = generate_orders(instrument, price_df, maximum_order_size_in_one_side)
+    return backtester.run_vectorized(price_feed=price_df.set_index('time'), orders=orders, print_stats=True)
+
+
+def sweep(price_df: pd.DataFrame, fast_periods: list, slow_periods: list, signal_periods: list, maximum_order_size_in_one_side: int = 4) -> pd.DataFrame:
+    """
+    Backtest a grid of MACD (fast, slow, signal) parameters without creating Order objects
+    :param price_df: price feed with time, open, high, low, close, ema_200 and atr columns
+    :param fast_periods: list of int
+    :param slow_periods: list of int
+    :param signal_periods: list of int
+    :param maximum_order_size_in_one_side: int
+    :return: pd.DataFrame, one row of stats per parameter set
+    """
+    times = pd.DatetimeIndex(pd.to_datetime(price_df['time']))
+    high = price_df['high'].to_numpy(dtype=np.float64)
+    low = price_df['low'].to_numpy(dtype=np.float64)
+    next_open = price_df['open'].shift(-1).to_numpy(dtype=np.float64)
+    atr = price_df['atr'].to_numpy(dtype=np.float64)
+    order_start = times.searchsorted(times + timedelta(hours=1), side='left')
+
+    results = []
+    for fast, slow, signal in product(fast_periods, slow_periods, signal_periods):
+        if fast >= slow:
+            continue
+        feed = price_df[['close', 'ema_200']].copy()
+        feed[['macd', 'signal']] = TA.MACD(price_df, period_fast=fast, period_slow=slow, signal=signal).to_numpy()
+        sides = find_candidates(feed)
+        candidates = np.flatnonzero(sides)
+        candidates = candidates[limit_one_side(sides[candidates], maximum_order_size_in_one_side)]
+        side = sides[candidates].astype(np.float64)
+        entry, order_atr = next_open[candidates], atr[candidates]
+        sl, tp = entry - order_atr * side, entry + order_atr * 1.5 * side
+
+        _, close_idx, outcome = fill_orders(high, low, order_start[candidates], side > 0, entry, sl, tp)
+        pnl = np.where(outcome == 1, tp - entry, np.where(outcome == -1, sl - entry, 0.0)) * side
+        results.append({
+            'fast': fast,
+            'slow': slow,
+            'signal': signal,
+            'orders': len(candidates),
+            'wins': int((outcome == 1).sum()),
+            'losses': int((outcome == -1).sum()),
+            'total pnl': round(float(pnl.sum()) * 10000, 4)
+        })
+    return pd.DataFrame(results)
 
 
 if __name__ == '__main__':
@@ -4,7 +4,8 @@ from functools import partial
 
 import pandas as pd
 
-from src.pricer import read_price_df
+from src.features import FeatureEngine
+from src.timeframes import read_pyramid
 from src.trading.daily_price import output_daily_price
 
 logger = logging.getLogger(__name__)
@@ -22,15 +23,22 @@ def output_feeds(instrument: str, st: datetime, et: datetime, short_win: int, lo
     :param save_dir:
     :return:
     """
-    pd_h1 = read_price_df(instrument=instrument, granularity='H1', start=st, end=et)
-    pd_h1[f'last_{long_win}_high'] = pd_h1['high'].rolling(window=long_win * 24).max()
-    pd_h1[f'last_{short_win}_high'] = pd_h1['high'].rolling(window=short_win * 24).max()
-    pd_h1[f'last_{long_win}_low'] = pd_h1['low'].rolling(window=long_win * 24).min()
-    pd_h1[f'last_{short_win}_low'] = pd_h1['low'].rolling(window=short_win * 24).min()
+    # daily bars are derived from the H1 candles, only H1 is downloaded
+    pyramid = read_pyramid(instrument, 'H1', start=st, end=et)
+    engine = FeatureEngine(pyramid.get('H1'))
+    # windows are in days, i.e. 24 H1 bars per day
+    pd_h1 = engine.enrich(
+        [f'last_{long_win * 24}_high', f'last_{short_win * 24}_high', f'last_{long_win * 24}_low', f'last_{short_win * 24}_low'],
+        columns={
+            f'last_{long_win * 24}_high': f'last_{long_win}_high', f'last_{short_win * 24}_high': f'last_{short_win}_high',
+            f'last_{long_win * 24}_low': f'last_{long_win}_low', f'last_{short_win * 24}_low': f'last_{short_win}_low',
+        }
+    )
     pd_h1.to_csv(f'{save_dir}/{instrument.lower()}_h1.csv')
     pd_h1.reset_index(level=0, inplace=True)
 
-    pd_d = output_daily_price(instrument=instrument, st=st, et=et, short_win=short_win, long_win=long_win, ema_period=ema_period, save_dir=save_dir)
+    pd_d = output_daily_price(instrument=instrument, st=st, et=et, short_win=short_win, long_win=long_win, ema_period=ema_period, save_dir=save_dir,
+                              prices=pyramid.get('D'))
 
     pd_merged = pd_h1.apply(partial(enrich, pd_d, ema_period), axis=1).set_index('time')
 
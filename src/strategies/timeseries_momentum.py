@@ -1,5 +1,8 @@
 from datetime import datetime
+from typing import Sequence, Tuple
+
 import numpy as np
+import pandas as pd
 from matplotlib import pyplot as plt
 from src.pricer import read_price_df
 
@@ -11,26 +14,83 @@ from src.pricer import read_price_df
 #         1. If this value is positive, we go/stay long the traded instrument;
 #         2. if it is negative we go/stay short.
 
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """
+    Log returns of a close matrix
+    :param close: 2D array (time x instruments) of close prices
+    :return: 2D array of the same shape, first row is NaN
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = np.log(close[1:] / close[:-1])
+    return returns
+
+
+def momentum_backtest(close: np.ndarray, lookbacks: Sequence[int], chunk_size: int = 16) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Time series momentum for many instruments and look back windows at once.
+    Position is the sign of the rolling mean log return, strategy return is previous position * current return.
+
+    Rolling sums are derived from one cumulative sum per instrument chunk instead of one rolling call per window,
+    a window containing a missing bar (NaN) yields NaN the same way pandas rolling(window).mean() does.
+    :param close: 2D array (time x instruments) of close prices, NaN for missing bars
+    :param lookbacks: look back windows in number of bars, e.g. [15, 30, 60, 120]
+    :param chunk_size: number of instruments processed together, bounds the temporary memory
+    :return: tuple of 3D arrays (lookback x time x instrument): positions and strategy returns
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if close.ndim == 1:
+        close = close[:, np.newaxis]
+    lookbacks = [int(lb) for lb in lookbacks]
+    if any(lb < 1 for lb in lookbacks):
+        raise ValueError(f'Look back windows must be positive: {lookbacks}')
+
+    n_bars, n_instruments = close.shape
+    positions = np.full((len(lookbacks), n_bars, n_instruments), np.nan)
+    strategy = np.full((len(lookbacks), n_bars, n_instruments), np.nan)
+
+    for start in range(0, n_instruments, chunk_size):
+        cols = slice(start, start + chunk_size)
+        returns = log_returns(close[:, cols])
+        valid = ~np.isnan(returns)
+        # prepend a zero row so that a window sum is csum[t + 1] - csum[t + 1 - window]
+        csum = np.zeros((n_bars + 1, returns.shape[1]))
+        np.cumsum(np.where(valid, returns, 0.0), axis=0, out=csum[1:])
+        ccount = np.zeros((n_bars + 1, returns.shape[1]), dtype=np.int64)
+        np.cumsum(valid, axis=0, out=ccount[1:])
+
+        for k, window in enumerate(lookbacks):
+            if window > n_bars:
+                continue
+            window_sum = csum[window:] - csum[:-window]
+            complete = (ccount[window:] - ccount[:-window]) == window
+            pos = positions[k, window - 1:, cols]
+            pos[:] = np.where(complete, np.sign(window_sum / window), np.nan)
+            strategy[k, 1:, cols] = positions[k, :-1, cols] * returns[1:]
+
+    return positions, strategy
+
+
 if __name__ == '__main__':
     from_dt = datetime(2015, 1, 1)
     end_dt = datetime(2020, 3, 31)
-    df = read_price_df(instrument='GBP_USD', granularity='D', start=from_dt, end=end_dt)
-    print(df)
-    df['returns'] = np.log(df['close'] / df['close'].shift(1))
-
-    cols = []
-
-    for momentum in [15, 30, 60, 120]:
-        col = 'position_%s' % momentum
-        df[col] = np.sign(df['returns'].rolling(momentum).mean())
-        cols.append(col)
+    instruments = ['GBP_USD', 'EUR_USD', 'AUD_USD', 'USD_JPY']
+    windows = [15, 30, 60, 120]
 
-    strats = ['returns']
+    closes = pd.concat(
+        [read_price_df(instrument=inst, granularity='D', start=from_dt, end=end_dt)['close'].rename(inst) for inst in instruments],
+        axis=1
+    )
+    print(closes)
 
-    for col in cols:
-        strat = 'strategy_%s' % col.split('_')[1]
-        df[strat] = df[col].shift(1) * df['returns']
-        strats.append(strat)  # 23
+    _, strategy_returns = momentum_backtest(closes.to_numpy(), windows)
 
-    df[strats].dropna().cumsum().apply(np.exp).plot()
+    for idx, inst in enumerate(instruments):
+        df = pd.DataFrame(
+            {f'strategy_{window}': strategy_returns[k, :, idx] for k, window in enumerate(windows)},
+            index=closes.index
+        )
+        df['returns'] = log_returns(closes[[inst]].to_numpy())[:, 0]
+        df.dropna().cumsum().apply(np.exp).plot(title=inst)
     plt.show()
@@ -0,0 +1,266 @@
+import logging
+import queue
+import time
+from collections import namedtuple
+from typing import Dict, Iterable
+
+import pandas as pd
+
+from src.backtester import process_order
+from src.event import TickEvent
+from src.finta.incremental import Indicator, NAN
+from src.orders.order import Order, OrderSide, OrderStatus
+from src.orders.order_manager import OrderType
+from src.pricer import get_granularity_seconds
+
+logger = logging.getLogger(__name__)
+
+Bar = namedtuple('Bar', 'time open high low close')
+
+
+class SimulatedBroker(object):
+    """
+    Keep orders locally and fill them against each bar with the same rules as BackTester.run
+    """
+
+    def __init__(self):
+        self.orders = []
+        self.open_orders = []
+
+    def place(self, order: Order, order_type: str = OrderType.MARKET):
+        self.orders.append(order)
+        self.open_orders.append(order)
+
+    def close(self, order: Order, close_time, price: float):
+        if order.is_pending:
+            order.cancel(close_time)
+        elif (price - order.entry) * (1 if order.is_long else -1) >= 0:
+            order.close_with_win(close_time, price)
+        else:
+            order.close_with_loss(close_time, price)
+        self.open_orders = [o for o in self.open_orders if o.is_open]
+
+    def process_bar(self, bar):
+        for o in self.open_orders:
+            process_order(o, bar.time, bar.high, bar.low)
+        self.open_orders = [o for o in self.open_orders if o.is_open]
+
+
+class LiveBroker(SimulatedBroker):
+    """
+    Shadow the orders locally like SimulatedBroker, and send them to the account through OrderManager
+    """
+
+    def __init__(self, order_manager, live_run: bool = False):
+        """
+        :param order_manager: OrderManager of the trading account
+        :param live_run: live or dry run, default to false
+        """
+        super().__init__()
+        self.order_manager = order_manager
+        self.live_run = live_run
+
+    def place(self, order: Order, order_type: str = OrderType.MARKET):
+        super().place(order, order_type)
+        logger.info(f"Placing {order_type} order: {order}")
+        if not self.live_run:
+            logger.info("Dry run only, no order will be placed")
+            return
+        tp = None if order.tp != order.tp else order.tp
+        sl = None if order.sl != order.sl else order.sl
+        if order_type == OrderType.MARKET:
+            self.order_manager.place_market_order(instrument=order.instrument, side=order.side, units=order.units, tp=tp, sl=sl)
+        elif order_type == OrderType.LIMIT:
+            self.order_manager.place_limit_order(instrument=order.instrument, side=order.side, units=order.units, price=order.entry, tp=tp, sl=sl)
+        elif order_type == OrderType.STOP:
+            self.order_manager.place_stop_order(instrument=order.instrument, side=order.side, units=order.units, price=order.entry, tp=tp, sl=sl)
+        else:
+            raise ValueError(f'Unsupported order type: {order_type}')
+
+    def close(self, order: Order, close_time, price: float):
+        was_pending = order.is_pending
+        super().close(order, close_time, price)
+        if not self.live_run:
+            return
+        if was_pending:
+            for o in self.order_manager.get_pending_orders() or []:
+                if o.get('instrument') == order.instrument and o.get('type') not in ('TAKE_PROFIT', 'STOP_LOSS'):
+                    self.order_manager.cancel_order(o.get('id'))
+        else:
+            for trade in self.order_manager.get_open_trades() or []:
+                if trade.get('instrument') == order.instrument:
+                    self.order_manager.close_trade(trade['id'])
+
+
+class Strategy(object):
+    """
+    Base class of strategies which run the same code in backtest and live.
+
+    Subclasses declare the indicators they depend on in declare_features and implement on_bar, and on_tick if they need ticks.
+    Indicators are updated incrementally before each on_bar call and their latest values are available in self.values.
+    Orders go through self.broker, a SimulatedBroker in backtest and a LiveBroker when trading.
+    """
+
+    def __init__(self, instrument: str):
+        self.instrument = instrument
+        self.broker = SimulatedBroker()
+        self.features = self.declare_features()
+        self.values = {name: NAN for name in self.features}
+
+    def declare_features(self) -> Dict[str, Indicator]:
+        """
+        :return: dict of feature name to incremental indicator
+        """
+        return {}
+
+    def update(self, bar):
+        for name, feature in self.features.items():
+            self.values[name] = feature.update(bar)
+        self.on_bar(bar)
+
+    def on_bar(self, bar):
+        raise NotImplementedError
+
+    def on_tick(self, tick: TickEvent):
+        pass
+
+    @property
+    def orders(self) -> list:
+        return self.broker.orders
+
+    @property
+    def open_orders(self) -> list:
+        return self.broker.open_orders
+
+    def buy(self, order_time, price: float, sl: float = None, tp: float = None, order_type: str = OrderType.MARKET, units: int = 100000) -> Order:
+        return self._place(order_time, OrderSide.LONG, price, sl, tp, order_type, units)
+
+    def sell(self, order_time, price: float, sl: float = None, tp: float = None, order_type: str = OrderType.MARKET, units: int = 100000) -> Order:
+        return self._place(order_time, OrderSide.SHORT, price, sl, tp, order_type, units)
+
+    def close(self, order: Order, close_time, price: float):
+        self.broker.close(order, close_time, price)
+
+    def _place(self, order_time, side, price, sl, tp, order_type, units) -> Order:
+        order = Order(
+            order_date=order_time,
+            side=side,
+            instrument=self.instrument,
+            entry=price,
+            sl=NAN if sl is None else sl,
+            tp=NAN if tp is None else tp,
+            status=OrderStatus.FILLED if order_type == OrderType.MARKET else OrderStatus.PENDING,
+            units=units
+        )
+        self.broker.place(order, order_type)
+        return order
+
+
+class HistoricalEngine(object):
+    """
+    Drive a strategy bar by bar over historical prices in the calling thread
+    """
+
+    def __init__(self, strategy: Strategy):
+        self.strategy = strategy
+
+    @staticmethod
+    def bars(price_df: pd.DataFrame) -> Iterable[Bar]:
+        """
+        :param price_df: ohlc DataFrame indexed by time
+        :return: iterator of Bar
+        """
+        return map(Bar._make, zip(price_df.index, price_df['open'], price_df['high'], price_df['low'], price_df['close']))
+
+    def run(self, bars: Iterable) -> dict:
+        """
+        :param bars: iterable of bars, e.g. HistoricalEngine.bars(price_df)
+        :return: dict with number of bars, elapsed seconds and bars per second
+        """
+        strategy = self.strategy
+        broker = strategy.broker
+        count = 0
+        started = time.perf_counter()
+        for bar in bars:
+            broker.process_bar(bar)
+            strategy.update(bar)
+            count += 1
+        elapsed = time.perf_counter() - started
+        return {
+            'bars': count,
+            'seconds': round(elapsed, 3),
+            'bars_per_second': round(count / elapsed) if elapsed else count
+        }
+
+
+class LiveEngine(object):
+    """
+    Drive a strategy from live tick events, e.g. put on the queue by PollPriceEvent or StreamPriceEvent.
+    Ticks are aggregated into bars of the given granularity using mid prices, each completed bar is handled
+    exactly as HistoricalEngine would, so indicators are updated in O(1) instead of being recomputed from candles.
+    """
+
+    def __init__(self, strategy: Strategy, events: queue.Queue, granularity: str = 'H1', broker: SimulatedBroker = None):
+        """
+        :param strategy: Strategy
+        :param events: queue of TickEvent
+        :param granularity: bar size, e.g. M15, H1
+        :param broker: LiveBroker for trading, default to SimulatedBroker
+        """
+        self.strategy = strategy
+        self.events = events
+        self.freq = f'{get_granularity_seconds(granularity)}s'
+        self.broker = broker or SimulatedBroker()
+        self.strategy.broker = self.broker
+        self.running = False
+        self._bar = None
+
+    def warm_up(self, bars: Iterable):
+        """
+        Prime indicators with historical bars, orders generated while warming up are discarded
+        :param bars: iterable of bars
+        """
+        self.strategy.broker = SimulatedBroker()
+        HistoricalEngine(self.strategy).run(bars)
+        self.strategy.broker = self.broker
+
+    def on_tick(self, tick: TickEvent):
+        if tick.instrument == self.strategy.instrument:
+            tick_time = pd.Timestamp(tick.time)
+            price = (float(tick.bid) + float(tick.ask)) / 2
+            bar_time = tick_time.floor(self.freq)
+            if self._bar is None:
+                self._bar = Bar(bar_time, price, price, price, price)
+            elif bar_time > self._bar.time:
+                self._on_bar(self._bar)
+                self._bar = Bar(bar_time, price, price, price, price)
+            else:
+                self._bar = self._bar._replace(high=max(self._bar.high, price), low=min(self._bar.low, price), close=price)
+            self.strategy.on_tick(tick)
+
+    def flush(self):
+        """
+        Complete the bar in progress, e.g. when the feed stops
+        """
+        if self._bar is not None:
+            self._on_bar(self._bar)
+            self._bar = None
+
+    def _on_bar(self, bar: Bar):
+        self.broker.process_bar(bar)
+        self.strategy.update(bar)
+
+    def run(self):
+        self.running = True
+        while self.running:
+            try:
+                event = self.events.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if event is not None and event.type == 'TICK':
+                    self.on_tick(event)
+            except Exception as ex:
+                logger.exception(f'Error while processing event: [{ex}]')
+            finally:
+                self.events.task_done()
@@ -0,0 +1,130 @@
+"""
+Timeframe pyramid: higher granularities derived locally from the candles of one base granularity.
+
+Strategies reading H1 and D prices of the same instrument only have to download H1, the daily bars are aggregated
+from it, so both timeframes are built from the same candles and can not disagree.
+
+    pyramid = read_pyramid('GBP_USD', 'H1', start, end)
+    pd_h1, pd_d = pyramid.get('H1'), pyramid.get('D')
+
+Bars are labelled by their start time in UTC like the Oanda candles. Bars dividing an hour (M5, M15, H1)
+are aligned to UTC, H2 to H12 and D to the Oanda default daily alignment of 17:00 New York time and W to the
+Sunday 17:00 open, all following daylight saving time, e.g. a daily bar starts at 22:00 UTC in winter and 21:00 UTC
+in summer. Derived levels are cached and append only recomputes the bars the new base candles fall into.
+"""
+from datetime import datetime
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.db.candle_store import CandleStore
+from src.finta.utils import aggregate
+from src.pricer import MAX_COUNT, get_granularity_seconds, read_price_df
+from src.utils import fx_calendar
+
+HOUR = 60 * 60
+WEEK = 7 * 24 * HOUR
+DEFAULT_LEVELS = ('M5', 'M15', 'H1', 'H4', 'D')
+
+
+def bar_labels(times: pd.DatetimeIndex, granularity: str) -> pd.DatetimeIndex:
+    """
+    Start time of the bar of granularity each time falls into
+    :param times: UTC DatetimeIndex, naive times are taken as UTC
+    :return: UTC DatetimeIndex of the same length
+    """
+    times = pd.DatetimeIndex(times)
+    times = times.tz_localize('UTC') if times.tz is None else times.tz_convert('UTC')
+    seconds = get_granularity_seconds(granularity)
+    if seconds < WEEK and HOUR % seconds == 0:
+        return times.floor(f'{seconds}s')
+
+    # shift the New York wall clock so the 17:00 open falls on midnight, then floor to days or hours
+    opening = pd.Timedelta(hours=fx_calendar.MARKET_OPEN_HOUR)
+    shifted = times.tz_convert(fx_calendar.MARKET_TZ).tz_localize(None) - opening
+    if granularity == 'W':
+        shifted = shifted.normalize() - pd.to_timedelta((shifted.weekday + 1) % 7, unit='D')
+    else:
+        shifted = shifted.floor(f'{seconds}s')
+    # a wall clock hour repeated when daylight saving time ends is labelled with the first one
+    wall = (shifted + opening).tz_localize(fx_calendar.MARKET_TZ, ambiguous=np.ones(len(shifted), dtype=bool),
+                                           nonexistent='shift_forward')
+    return wall.tz_convert('UTC')
+
+
+class TimeframePyramid(object):
+    """
+    Candles of a base granularity and the levels derived from them, each level is aggregated once and cached
+    """
+
+    def __init__(self, base_granularity: str, prices: pd.DataFrame = None):
+        """
+        :param base_granularity: granularity of the prices, e.g. M5 or H1
+        :param prices: ohlc(v) price DataFrame indexed by UTC time, see pricer.candles_to_df
+        """
+        self.base_granularity = base_granularity
+        self.base = pd.DataFrame(columns=['open', 'high', 'low', 'close'], index=pd.DatetimeIndex([], tz='UTC'), dtype=float)
+        self._levels = {}  # type: Dict[str, pd.DataFrame]
+        if prices is not None:
+            self.append(prices)
+
+    def _check(self, granularity: str):
+        seconds, base_seconds = get_granularity_seconds(granularity), get_granularity_seconds(self.base_granularity)
+        if granularity == 'M' or seconds < base_seconds or seconds % base_seconds:
+            raise ValueError(f'{granularity} can not be derived from {self.base_granularity} candles')
+
+    def get(self, granularity: str) -> pd.DataFrame:
+        """
+        :param granularity: base or a multiple of it up to W, e.g. H4 or D
+        :return: price DataFrame of the granularity, the last bar is incomplete until the base candles cover it
+        """
+        if granularity == self.base_granularity:
+            return self.base
+        if granularity not in self._levels:
+            self._check(granularity)
+            self._levels[granularity] = self._aggregate(self.base, granularity)
+        return self._levels[granularity]
+
+    def levels(self, granularities: Sequence[str] = DEFAULT_LEVELS) -> Dict[str, pd.DataFrame]:
+        """
+        :return: dict of granularity to prices, for the granularities which can be derived from the base
+        """
+        base_seconds = get_granularity_seconds(self.base_granularity)
+        return {g: self.get(g) for g in granularities if g != 'M' and get_granularity_seconds(g) >= base_seconds}
+
+    def append(self, prices: pd.DataFrame):
+        """
+        Add base candles, candles with an existing time replace the stored ones.
+        Only the cached bars from the one holding the earliest new candle on are recomputed.
+        """
+        if len(prices) == 0:
+            return
+        times = pd.DatetimeIndex(prices.index)
+        prices = prices.set_axis(times.tz_localize('UTC') if times.tz is None else times.tz_convert('UTC'))
+        base = pd.concat([self.base, prices]) if len(self.base) else prices
+        self.base = base[~base.index.duplicated(keep='last')].sort_index()
+
+        earliest = prices.index.min()
+        for granularity, level in self._levels.items():
+            since = bar_labels(pd.DatetimeIndex([earliest]), granularity)[0]
+            updated = self._aggregate(self.base.iloc[self.base.index.searchsorted(since):], granularity)
+            self._levels[granularity] = pd.concat([level.iloc[:level.index.searchsorted(since)], updated])
+
+    @staticmethod
+    def _aggregate(prices: pd.DataFrame, granularity: str) -> pd.DataFrame:
+        df = aggregate(prices, bar_labels(prices.index, granularity))
+        df.index.name = prices.index.name
+        return df
+
+
+def read_pyramid(instrument: str, base_granularity: str, start: datetime, end: datetime = None, max_count: int = MAX_COUNT,
+                 store: CandleStore = None) -> TimeframePyramid:
+    """
+    Download the base granularity only, see read_price_df, and derive the higher timeframes from it.
+    :param start: moved back to the start of its daily bar, e.g. 22:00 UTC the day before, so the first derived bars
+        up to D are complete
+    """
+    start = bar_labels(pd.DatetimeIndex([start]), 'D')[0].tz_convert(None).to_pydatetime()
+    prices = read_price_df(instrument=instrument, granularity=base_granularity, start=start, end=end, max_count=max_count, store=store)
+    return TimeframePyramid(base_granularity, prices)
@@ -4,14 +4,14 @@ from datetime import datetime
 
 import pandas as pd
 
-from src.pricer import read_price_df
 from src.env import RUNNING_ENV
-from src.finta.ta import TA
+from src.features import FeatureEngine, feature_engine
 
 logger = logging.getLogger(__name__)
 
 
-def output_daily_price(instrument: str, short_win: int, long_win: int, ema_period: int, save_dir: str, st: datetime, et: datetime = None) -> pd.DataFrame:
+def output_daily_price(instrument: str, short_win: int, long_win: int, ema_period: int, save_dir: str, st: datetime, et: datetime = None,
+                       prices: pd.DataFrame = None) -> pd.DataFrame:
     """
     Output daily ohlc price feeds to csv
     :param instrument: ccy_pair
@@ -21,18 +21,16 @@ def output_daily_price(instrument: str, short_win: int, long_win: int, ema_perio
     :param long_win:
     :param ema_period:
     :param save_dir:
+    :param prices: daily prices, e.g. derived with timeframes.TimeframePyramid, default to download them
     :return:
     """
 
-    pd_d = read_price_df(instrument=instrument, granularity='D', start=st, end=et)
-    pd_d[f'last_{long_win}_high'] = pd_d['high'].rolling(window=long_win).max()
-    pd_d[f'last_{short_win}_high'] = pd_d['high'].rolling(window=short_win).max()
-    pd_d[f'last_{long_win}_low'] = pd_d['low'].rolling(window=long_win).min()
-    pd_d[f'last_{short_win}_low'] = pd_d['low'].rolling(window=short_win).min()
-    pd_d['atr'] = TA.ATR(pd_d, period=14)
-    pd_d['adx'] = TA.ADX(pd_d, period=14)
-    pd_d['rsi'] = TA.RSI(pd_d, period=14)
-    pd_d[f'ema_{ema_period}'] = TA.EMA(pd_d, period=ema_period)
+    features = [
+        f'last_{long_win}_high', f'last_{short_win}_high', f'last_{long_win}_low', f'last_{short_win}_low',
+        'atr_14', 'adx_14', 'rsi_14', f'ema_{ema_period}'
+    ]
+    engine = FeatureEngine(prices) if prices is not None else feature_engine(instrument=instrument, granularity='D', start=st, end=et)
+    pd_d = engine.enrich(features, columns={'atr_14': 'atr', 'adx_14': 'adx', 'rsi_14': 'rsi'})
 
     pd_d.to_csv(f'{save_dir}/{instrument.lower()}_d.csv')
     logger.info(f'output feeds complete for [{instrument}]!')
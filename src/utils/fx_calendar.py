@@ -0,0 +1,74 @@
+"""
+FX trading week: the market opens on Sunday at 17:00 New York time and closes on Friday at 17:00 New York time.
+Datetimes are naive UTC like everywhere else in the project. Boundaries are computed in New York wall clock time,
+so they follow daylight saving time. Holidays are not modelled, they only make estimates slightly too high.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+MARKET_TZ = 'America/New_York'
+MARKET_OPEN_HOUR = 17
+WEEK = timedelta(days=7)
+TRADING_WEEK = timedelta(days=5)
+
+
+def to_market_time(dt: datetime) -> datetime:
+    """
+    Naive New York wall clock time of a naive UTC datetime
+    """
+    return pd.Timestamp(dt).tz_localize('UTC').tz_convert(MARKET_TZ).tz_localize(None).to_pydatetime()
+
+
+def to_utc(wall: datetime) -> datetime:
+    """
+    Naive UTC datetime of a naive New York wall clock time
+    """
+    return pd.Timestamp(wall).tz_localize(MARKET_TZ).tz_convert('UTC').tz_localize(None).to_pydatetime()
+
+
+def week_open(dt: datetime) -> datetime:
+    """
+    New York wall clock time of the Sunday 17:00 open of the trading week containing dt, or the last one before dt
+    """
+    wall = to_market_time(dt)
+    days_since_sunday = (wall.weekday() + 1) % 7
+    opening = datetime(wall.year, wall.month, wall.day, MARKET_OPEN_HOUR) - timedelta(days=days_since_sunday)
+    return opening - WEEK if opening > wall else opening
+
+
+def trading_sessions(start: datetime, end: datetime):
+    """
+    Yield the (open, close) UTC ranges of the trading weeks overlapping [start, end), clipped to [start, end)
+    """
+    wall_open = week_open(start)
+    while True:
+        opening, closing = to_utc(wall_open), to_utc(wall_open + TRADING_WEEK)
+        if opening >= end:
+            return
+        if closing > start:
+            yield max(opening, start), min(closing, end)
+        wall_open += WEEK
+
+
+def trading_seconds(start: datetime, end: datetime) -> float:
+    """
+    Seconds the market is open during [start, end)
+    """
+    return sum((e - s).total_seconds() for s, e in trading_sessions(start, end))
+
+
+def add_trading_seconds(start: datetime, seconds: float) -> datetime:
+    """
+    Time at which the market has been open for `seconds` since start, closed periods are skipped
+    """
+    wall_open = week_open(start)
+    while True:
+        opening, closing = to_utc(wall_open), to_utc(wall_open + TRADING_WEEK)
+        begin = max(opening, start)
+        if closing > begin:
+            available = (closing - begin).total_seconds()
+            if seconds <= available:
+                return begin + timedelta(seconds=seconds)
+            seconds -= available
+        wall_open += WEEK
@@ -0,0 +1,68 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter(object):
+    """
+    Token bucket shared by threads: on average at most `rate` calls per second, with bursts of up to `burst` calls
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = None):
+        """
+        :param rate: calls per second
+        :param burst: calls allowed back to back after an idle period
+        :param clock: monotonic clock in seconds
+        :param sleep: sleep function, default to time.sleep
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a call is allowed. The slot is reserved under the lock and waited for outside it,
+        so waiting threads are released in arrival order at the configured rate.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            (self._sleep or time.sleep)(wait)
+
+
+def retry(func: Callable, retries: int = 5, backoff: float = 0.5, max_backoff: float = 30,
+          retry_on: Callable[[Exception], bool] = lambda err: True, sleep: Callable[[float], None] = None):
+    """
+    Call func until it succeeds, waiting exponentially longer with jitter between attempts
+    :param func: function without arguments
+    :param retries: maximum number of retries, the last error is raised once exhausted
+    :param backoff: wait before the first retry in seconds, doubled after each retry
+    :param max_backoff: maximum wait in seconds
+    :param retry_on: whether an error is worth retrying, other errors are raised immediately
+    :param sleep: sleep function, default to time.sleep
+    :return: result of func
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as err:
+            if attempt >= retries or not retry_on(err):
+                raise
+            # jitter avoids retries of concurrent callers hitting the server at the same time
+            delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1)
+            attempt += 1
+            logger.warning(f'Retry {attempt}/{retries} in {delay:.2f}s after error: {err}')
+            (sleep or time.sleep)(delay)
@@ -1,16 +1,20 @@
+import logging
 from http import HTTPStatus
 from typing import List
 
+import requests
 from flask import Blueprint, request
+from oandapyV20 import V20Error
 
 from src.account.account_manager import AccountManager
 from src.env import RUNNING_ENV
 from src.orders.order import OrderSide
 from src.orders.order_manager import OrderManager
-from src.pricer import get_spot_rate
+from src.pricing.spot_rate import SPOT_RATES
 from src.utils.common import has_special_instrument
 
 api = Blueprint('api', __name__)
+logger = logging.getLogger(__name__)
 
 SPECIAL_INSTRUMENTS = ('XAU', 'JPY', 'BCO')
 
@@ -44,6 +48,12 @@ def account(env: str, name: str) -> dict:
 @api.route('/<env>/account/<name>/orders', methods=['GET'])
 def order(env: str, name: str) -> dict:
     trades = get_trades(env, name)
+    # rates of all open trades in one request, without rates the trades are listed with no spot rate
+    try:
+        spot_rates = SPOT_RATES.rates({el['instrument'] for el in trades if el['state'] == 'OPEN'})
+    except (V20Error, ValueError, requests.RequestException) as err:
+        logger.error(f'Failed to get spot rates: {err}')
+        spot_rates = {}
     res = []
     for el in trades:
         state = el['state']
@@ -64,11 +74,14 @@ def order(env: str, name: str) -> dict:
             'closeTime': el['closeTime'][:19].replace("T", " ") if state == 'CLOSED' else None
         }
         if state == 'OPEN':
-            spot_rate = round(get_spot_rate(ccy_pair), 5)
+            spot_rate = round(spot_rates[ccy_pair], 5) if ccy_pair in spot_rates else None
             multiplier = 100 if has_special_instrument(ccy_pair) else 10000
+            pips = None
+            if spot_rate is not None:
+                pips = ((spot_rate - float(el['price'])) * multiplier) if float(el['initialUnits']) > 0 else ((float(el['price']) - spot_rate) * multiplier)
             common.update({
                 'spotRate': spot_rate,
-                'pips': ((spot_rate - float(el['price'])) * multiplier) if float(el['initialUnits']) > 0 else ((float(el['price']) - spot_rate) * multiplier)
+                'pips': pips
             })
         res.append(common)
     return {
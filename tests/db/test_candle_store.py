@@ -0,0 +1,58 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.db.candle_store import CandleStore, merge_ranges, subtract_ranges
+
+
+class TestCandleStore(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(os.path.join(self.tmp.name, 'candles.sqlite'))
+        self.df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_price.csv'), index_col='time', parse_dates=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ranges(self):
+        self.assertEqual([(0, 20), (30, 40)], merge_ranges([(30, 40), (10, 20), (0, 10), (5, 8)]))
+        self.assertEqual([(0, 10), (20, 30), (40, 50)], subtract_ranges(0, 50, [(10, 20), (30, 40)]))
+        self.assertEqual([], subtract_ranges(12, 18, [(10, 20)]))
+        self.assertEqual([(20, 25)], subtract_ranges(15, 25, [(10, 20), (30, 40)]))
+
+    def test_save_and_load(self):
+        first, second = self.df.iloc[:100], self.df.iloc[100:]
+        self.store.save('GBP_USD', 'H1', first, datetime(2020, 1, 1), second.index[0])
+        self.assertEqual([(second.index[0].to_pydatetime().replace(tzinfo=None), datetime(2021, 1, 1))],
+                         self.store.missing('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2021, 1, 1)))
+        self.store.save('GBP_USD', 'H1', second, second.index[0], datetime(2021, 1, 1))
+        self.assertEqual([], self.store.missing('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2021, 1, 1)))
+        self.assertEqual(1, len(self.store.coverage('GBP_USD', 'H1')))
+
+        loaded = self.store.load('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2021, 1, 1))
+        np.testing.assert_array_equal(self.df[['open', 'high', 'low', 'close']].to_numpy(), loaded.to_numpy())
+        self.assertTrue(loaded.index.equals(self.df.index))
+
+        # other keys are independent
+        self.assertEqual(0, len(self.store.load('GBP_USD', 'H4', datetime(2020, 1, 1))))
+        self.assertEqual(1, len(self.store.missing('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2021, 1, 1), component='B')))
+
+    def test_half_spread(self):
+        df = self.df.iloc[:10].assign(half_spread=np.float32(1e-4))
+        self.store.save('GBP_USD', 'H1', df, datetime(2020, 1, 1), datetime(2020, 1, 2), component='MBA')
+        self.store.save('GBP_USD', 'H1', self.df.iloc[:10], datetime(2020, 1, 1), datetime(2020, 1, 2))
+        loaded = self.store.load('GBP_USD', 'H1', datetime(2020, 1, 1), component='MBA')
+        self.assertEqual(np.float32, loaded['half_spread'].dtype)
+        np.testing.assert_array_equal(df['half_spread'], loaded['half_spread'])
+        self.assertNotIn('half_spread', self.store.load('GBP_USD', 'H1', datetime(2020, 1, 1)))
+
+    def test_save_replaces_candles(self):
+        self.store.save('GBP_USD', 'H1', self.df.iloc[:10], datetime(2020, 1, 1), datetime(2020, 1, 2))
+        self.store.save('GBP_USD', 'H1', self.df.iloc[:10] * 2, datetime(2020, 1, 1), datetime(2020, 1, 2))
+        loaded = self.store.load('GBP_USD', 'H1', datetime(2020, 1, 1))
+        self.assertEqual(10, len(loaded))
+        np.testing.assert_array_equal(self.df['close'].iloc[:10] * 2, loaded['close'])
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from unittest import TestCase, mock, skipIf
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pricer import random_candles
+from src.db import sinks
+from src.db.sinks import NpySink, ParquetSink, SqliteSink, consume
+from src.pricer import candles_to_df, iter_price_chunks, plan_windows
+
+
+class TestSinks(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.raw = random_candles(1000)
+        self.expected = candles_to_df(self.raw)
+        # windows of 300 candles overlapping by one candle
+        self.chunks = [candles_to_df(self.raw[max(0, i - 1):i + 300]) for i in range(0, 1000, 300)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def download(self, instrument, p):
+        # both ends included so consecutive windows share a candle
+        s, e = pd.Timestamp(p['from'], tz='UTC'), pd.Timestamp(p['to'], tz='UTC')
+        return [c for c in self.raw if s <= pd.Timestamp(c['time']) <= e]
+
+    @mock.patch('src.pricer.download_window')
+    def test_iter_price_chunks(self, download_window):
+        download_window.side_effect = self.download
+        start, end = datetime(2020, 1, 1), datetime(2020, 1, 1, 1, 23, 20)
+        chunks = list(iter_price_chunks('GBP_USD', 'S5', start, end, max_count=90, workers=3))
+        self.assertEqual(len(plan_windows('S5', start, end, max_count=90)), len(chunks))
+        pd.testing.assert_frame_equal(self.expected, pd.concat(chunks))
+
+    def test_sqlite_sink(self):
+        path = os.path.join(self.tmp.name, 'db.sqlite')
+        with SqliteSink(path, 'gbpusd_ohlc') as sink:
+            self.assertEqual(1000 + 3, consume(self.chunks, sink))
+        with sqlite3.connect(path) as conn:
+            df = pd.read_sql_query('SELECT * FROM gbpusd_ohlc ORDER BY time', conn)
+        self.assertEqual(list(self.expected.index.strftime('%Y-%m-%d %H:%M:%S')), list(df['time']))
+        np.testing.assert_array_equal(self.expected.to_numpy(), df[['open', 'high', 'low', 'close']].to_numpy())
+
+    def test_npy_sink(self):
+        with NpySink(self.tmp.name, dtype=np.float32) as sink:
+            consume([self.expected.iloc[:400], self.expected.iloc[400:]], sink)
+        close = np.load(os.path.join(self.tmp.name, 'close.npy'))
+        self.assertEqual(np.float32, close.dtype)
+        np.testing.assert_array_equal(self.expected['close'].to_numpy(dtype=np.float32), close)
+        times = np.load(os.path.join(self.tmp.name, 'time.npy'))
+        self.assertTrue(pd.to_datetime(times, unit='s', utc=True).equals(self.expected.index))
+        self.assertEqual(['close.npy', 'high.npy', 'low.npy', 'open.npy', 'time.npy'], sorted(os.listdir(self.tmp.name)))
+
+    @mock.patch('src.pricer.download_window')
+    def test_compact_chunks(self, download_window):
+        download_window.side_effect = self.download
+        path, directory = os.path.join(self.tmp.name, 'db.sqlite'), os.path.join(self.tmp.name, 'npy')
+        chunks = iter_price_chunks('GBP_USD', 'S5', datetime(2020, 1, 1), datetime(2020, 1, 1, 1, 23, 20), max_count=300, compact=True)
+        with SqliteSink(path, 'gbpusd_ohlc') as sqlite_sink, NpySink(directory, dtype=np.float32) as npy_sink:
+            consume(chunks, sqlite_sink, npy_sink)
+        with sqlite3.connect(path) as conn:
+            df = pd.read_sql_query('SELECT * FROM gbpusd_ohlc ORDER BY time', conn)
+        # epoch seconds are stored as times, not read as nanoseconds since 1970
+        self.assertEqual(list(self.expected.index.strftime('%Y-%m-%d %H:%M:%S')), list(df['time']))
+        np.testing.assert_array_equal(self.expected.to_numpy(dtype=np.float32), df[['open', 'high', 'low', 'close']].to_numpy())
+        times = np.load(os.path.join(directory, 'time.npy'))
+        self.assertTrue(pd.to_datetime(np.unique(times), unit='s', utc=True).equals(self.expected.index))
+
+    def test_half_spread(self):
+        spread = self.expected.assign(half_spread=np.float32(1e-4))
+        path = os.path.join(self.tmp.name, 'db.sqlite')
+        with SqliteSink(path, 'gbpusd_ohlc') as sink:
+            consume([self.expected.iloc[:400], spread.iloc[400:]], sink)
+        with sqlite3.connect(path) as conn:
+            df = pd.read_sql_query('SELECT * FROM gbpusd_ohlc ORDER BY time', conn)
+        self.assertEqual(['time', 'open', 'high', 'low', 'close', 'half_spread'], list(df.columns))
+        self.assertEqual(400, df['half_spread'].isna().sum())
+        np.testing.assert_allclose(1e-4, df['half_spread'].iloc[400:], rtol=1e-6)
+
+        directory = os.path.join(self.tmp.name, 'npy')
+        with NpySink(directory) as sink:
+            consume([spread.iloc[:400], spread.iloc[400:]], sink)
+            with self.assertRaises(ValueError):
+                sink.write(self.expected.iloc[:10])
+        half_spread = np.load(os.path.join(directory, 'half_spread.npy'))
+        self.assertEqual(np.float32, half_spread.dtype)
+        np.testing.assert_array_equal(spread['half_spread'], half_spread)
+
+        with self.assertRaises(ValueError), SqliteSink(path, 'gbpusd_ohlc') as sink:
+            sink.write(self.expected.assign(volume=1))
+
+    @skipIf(sinks.pq is None, 'pyarrow is not installed')
+    def test_parquet_sink(self):
+        path = os.path.join(self.tmp.name, 'prices.parquet')
+        with ParquetSink(path) as sink:
+            consume([self.expected.iloc[:400], self.expected.iloc[400:]], sink)
+        pd.testing.assert_frame_equal(self.expected, pd.read_parquet(path).set_index('time'))
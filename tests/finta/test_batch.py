@@ -0,0 +1,59 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.finta import batch
+from src.finta.ta import TA
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_price.csv'), index_col='time', parse_dates=True)
+        # three instruments trading on different bars
+        self.prices = {
+            'FULL': df,
+            'GAPPY': df.drop(df.index[[3, 40, 41, 42, 150, 300]]),
+            'LATE': df.iloc[60:] * 1.1,
+        }
+        self.high, self.low, self.close = (batch.to_wide(self.prices, col) for col in ('high', 'low', 'close'))
+
+    def assert_columns(self, values, expected):
+        """
+        :param values: time x instrument batch result
+        :param expected: function of an instrument's own price frame returning its indicator
+        """
+        self.assertEqual(values.shape, self.close.shape)
+        for col, (instrument, df) in enumerate(self.prices.items()):
+            exp = pd.Series(np.asarray(expected(df), dtype=float), index=df.index).reindex(self.close.index)
+            np.testing.assert_allclose(values[:, col], exp, rtol=1e-12, atol=1e-12, err_msg=instrument)
+
+    def test_to_wide(self):
+        self.assertEqual(list(self.close.columns), ['FULL', 'GAPPY', 'LATE'])
+        self.assertEqual(self.close['GAPPY'].isna().sum(), 6)
+        self.assertEqual(self.close['LATE'].isna().sum(), 60)
+
+    def test_moving_averages(self):
+        self.assert_columns(batch.ema(self.close, 20), lambda df: TA.EMA(df, 20))
+        self.assert_columns(batch.smma(self.close, 14), lambda df: TA.SMMA(df, 14))
+
+    def test_atr_rsi(self):
+        self.assert_columns(batch.atr(self.high, self.low, self.close, 14), lambda df: TA.ATR(df, 14))
+        self.assert_columns(batch.rsi(self.close, 14), lambda df: TA.RSI(df, 14))
+
+    def test_macd_bbands(self):
+        line, signal = batch.macd(self.close)
+        self.assert_columns(line, lambda df: TA.MACD(df)['MACD'])
+        self.assert_columns(signal, lambda df: TA.MACD(df)['SIGNAL'])
+        upper, middle, lower = batch.bbands(self.close, 20)
+        self.assert_columns(upper, lambda df: TA.BBANDS(df, 20)['BB_UPPER'])
+        self.assert_columns(lower, lambda df: TA.BBANDS(df, 20)['BB_LOWER'])
+
+    def test_rolling_extremes(self):
+        self.assert_columns(batch.rolling_max(self.high, 20), lambda df: df['high'].rolling(20).max())
+        self.assert_columns(batch.rolling_min(self.low, 20), lambda df: df['low'].rolling(20).min())
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            batch.atr(self.high, self.low.iloc[1:], self.close)
@@ -0,0 +1,49 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src import indicators
+from src.finta import core
+from src.finta.ta import TA
+
+
+class TestCore(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_price.csv'), index_col='time', parse_dates=True)
+        self.high, self.low, self.close = (self.df[c].to_numpy() for c in ['high', 'low', 'close'])
+
+    def test_atr_methods(self):
+        np.testing.assert_array_equal(TA.ATR(self.df, 14).to_numpy(), core.atr(self.high, self.low, self.close, 14, method='sma'))
+        np.testing.assert_array_equal(indicators.average_true_range(self.df, 14).to_numpy(), core.atr(self.high, self.low, self.close, 14, method='ema'))
+        np.testing.assert_array_equal(indicators.atr(self.df, 14).to_numpy(), core.atr(self.high, self.low, self.close, 14, method='wilder'))
+        with self.assertRaises(ValueError):
+            core.atr(self.high, self.low, self.close, 14, method='median')
+
+    def test_dtype(self):
+        rsi = core.rsi(self.close, 14, dtype=np.float32)
+        self.assertEqual(np.float32, rsi.dtype)
+        np.testing.assert_allclose(core.rsi(self.close, 14), rsi, rtol=1e-6)
+        upper, middle, lower = core.bbands(self.close.astype(np.float32), 20, dtype=np.float32)
+        self.assertEqual({np.dtype(np.float32)}, {upper.dtype, middle.dtype, lower.dtype})
+
+    def test_compact_dtype_preserved(self):
+        compact = self.df.astype(np.float32)
+        self.assertEqual(np.float32, core.atr(compact['high'], compact['low'], compact['close'], 14).dtype)
+        self.assertEqual(np.float32, TA.RSI(compact, 14).dtype)
+        self.assertEqual(np.float32, TA.ADX(compact, 14).dtype)
+        self.assertEqual(np.float64, core.sma(self.close, 20).dtype)
+        self.assertEqual(np.float64, core.sma(np.arange(30), 20).dtype)
+        # calculations run in float64, only outputs are rounded
+        np.testing.assert_allclose(TA.MACD(self.df).to_numpy(), TA.MACD(compact).to_numpy(), atol=1e-6)
+
+    def test_inputs_untouched(self):
+        high, low, close = self.high.copy(), self.low.copy(), self.close.copy()
+        core.adx(self.high, self.low, self.close, 14)
+        core.macd(self.close)
+        core.wma(self.close, 9)
+        np.testing.assert_array_equal(high, self.high)
+        np.testing.assert_array_equal(low, self.low)
+        np.testing.assert_array_equal(close, self.close)
+        self.assertIs(self.close, core.as_array(self.close))
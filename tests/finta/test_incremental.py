@@ -0,0 +1,59 @@
+import json
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.finta import incremental
+from src.finta.ta import TA
+from src.strategy import HistoricalEngine
+
+
+class TestIncremental(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_price.csv'), index_col='time', parse_dates=True)
+        self.bars = list(HistoricalEngine.bars(self.df))
+
+    def run_indicator(self, indicator, bars=None):
+        return np.array([indicator.update(bar) for bar in (self.bars if bars is None else bars)], dtype=float)
+
+    def assert_parity(self, indicator, expected):
+        np.testing.assert_allclose(self.run_indicator(indicator), np.asarray(expected, dtype=float).reshape(len(self.bars), -1).squeeze(), rtol=1e-9, atol=1e-12)
+
+    def test_moving_averages(self):
+        self.assert_parity(incremental.EMA(20), TA.EMA(self.df, 20))
+        self.assert_parity(incremental.SMMA(14), TA.SMMA(self.df, 14))
+        self.assert_parity(incremental.SMMA(14, adjust=False), TA.SMMA(self.df, 14, adjust=False))
+
+    def test_volatility(self):
+        self.assert_parity(incremental.TR(), TA.TR(self.df))
+        self.assert_parity(incremental.ATR(14), TA.ATR(self.df, 14))
+        self.assert_parity(incremental.BBANDS(20), TA.BBANDS(self.df, 20))
+
+    def test_momentum(self):
+        self.assert_parity(incremental.RSI(14), TA.RSI(self.df, 14))
+        self.assert_parity(incremental.MACD(), TA.MACD(self.df))
+        self.assert_parity(incremental.DMI(14), TA.DMI(self.df.copy(), 14))
+        self.assert_parity(incremental.ADX(14), TA.ADX(self.df.copy(), 14))
+        self.assert_parity(incremental.ADX(14, adjust=False), TA.ADX(self.df.copy(), 14, adjust=False))
+
+    def test_rolling_extremes(self):
+        self.assert_parity(incremental.RollingMax(20), self.df['high'].rolling(20).max())
+        self.assert_parity(incremental.RollingMin(20), self.df['low'].rolling(20).min())
+
+    def test_rolling_extremes_with_missing_values(self):
+        df = self.df.copy()
+        df.iloc[[30, 31, 100], df.columns.get_loc('high')] = np.nan
+        bars = list(HistoricalEngine.bars(df))
+        np.testing.assert_array_equal(self.run_indicator(incremental.RollingMax(5), bars), df['high'].rolling(5).max())
+
+    def test_state_round_trip(self):
+        half = len(self.bars) // 2
+        for indicator in [incremental.ATR(14), incremental.RSI(14), incremental.MACD(), incremental.BBANDS(20),
+                          incremental.ADX(14), incremental.RollingMax(20), incremental.RollingMin(20)]:
+            expected = self.run_indicator(type(indicator).from_state(indicator.state()))
+            self.run_indicator(indicator, self.bars[:half])
+            restored = incremental.Indicator.from_state(json.loads(json.dumps(indicator.state())))
+            self.assertIsInstance(restored, type(indicator))
+            np.testing.assert_array_equal(expected[half:], self.run_indicator(restored, self.bars[half:]))
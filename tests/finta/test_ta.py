@@ -0,0 +1,74 @@
+import os
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from benchmarks import legacy_ta
+from src.finta import kernels
+from src.finta.ta import TA
+
+
+class TestTA(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_price.csv'), index_col='time', parse_dates=True)
+
+    def test_dmi(self):
+        original = self.df.copy()
+        assert_frame_equal(legacy_ta.DMI(self.df, 14), TA.DMI(self.df, 14))
+        assert_frame_equal(legacy_ta.DMI(self.df, 10, adjust=False), TA.DMI(self.df, 10, adjust=False))
+        assert_frame_equal(original, self.df)
+
+    def test_adx(self):
+        original = self.df.copy()
+        assert_series_equal(legacy_ta.ADX(self.df, 14), TA.ADX(self.df, 14))
+        assert_series_equal(legacy_ta.ADX(self.df, 10, adjust=False), TA.ADX(self.df, 10, adjust=False))
+        assert_frame_equal(original, self.df)
+
+    def test_volume_indicators(self):
+        rng = np.random.default_rng(7)
+        df = self.df.copy()
+        df['volume'] = rng.integers(1, 5000, len(df)).astype(float)
+        df.iloc[rng.choice(len(df), 20, replace=False), df.columns.get_loc('volume')] = 0
+        original = df.copy()
+        assert_series_equal(legacy_ta.MFI(df), TA.MFI(df))
+        assert_series_equal(legacy_ta.SQZMI(df), TA.SQZMI(df))
+        assert_series_equal(legacy_ta.FVE(df), TA.FVE(df))
+        assert_series_equal(legacy_ta.FVE(df, factor=0.01), TA.FVE(df, factor=0.01))
+        assert_series_equal(legacy_ta.VFI(df, period=40), TA.VFI(df, period=40))
+        assert_series_equal(legacy_ta.VFI(df, period=40, vfactor=0.5), TA.VFI(df, period=40, vfactor=0.5))
+        assert_frame_equal(original, df)
+
+    def test_recursive_indicators(self):
+        assert_series_equal(legacy_ta.KAMA(self.df), TA.KAMA(self.df))
+        assert_series_equal(legacy_ta.KAMA(self.df, er=30, period=10), TA.KAMA(self.df, er=30, period=10))
+        assert_series_equal(legacy_ta.SAR(self.df), TA.SAR(self.df))
+        assert_series_equal(legacy_ta.SAR(self.df, af=0.05, amax=0.3), TA.SAR(self.df, af=0.05, amax=0.3))
+        assert_series_equal(legacy_ta.UO(self.df), TA.UO(self.df))
+
+    def test_kernels_without_jit(self):
+        # the undecorated python kernels on arrays, whichever version TA uses when numba is installed or not
+        self.assertIsNot(kernels.sar, kernels.sar.py_func)
+        with mock.patch.object(kernels, 'kama', kernels.kama.py_func), mock.patch.object(kernels, 'sar', kernels.sar.py_func):
+            assert_series_equal(legacy_ta.KAMA(self.df), TA.KAMA(self.df))
+            assert_series_equal(legacy_ta.SAR(self.df, af=0.05, amax=0.3), TA.SAR(self.df, af=0.05, amax=0.3))
+
+    def test_weighted_moving_averages(self):
+        def reference_wma(values, period):
+            weights = np.arange(1, period + 1) / (period * (period + 1) / 2)
+            return pd.Series([np.nan] * (period - 1) + [np.dot(values[i - period + 1:i + 1], weights) for i in range(period - 1, len(values))],
+                             index=self.df.index)
+
+        original = self.df.copy()
+        close = self.df['close'].to_numpy()
+        assert_series_equal(reference_wma(close, 9), TA.WMA(self.df), check_names=False)
+        assert_series_equal(reference_wma(close, 20), TA.WMA(self.df, period=20), check_names=False)
+        assert_series_equal(reference_wma(self.df['open'].to_numpy(), 9), TA.WMA(self.df, column='open'), check_names=False)
+
+        # HMA is the WMA of 2 * WMA(period / 2) - WMA(period) over sqrt(period) bars
+        delta = 2 * reference_wma(close, 8) - reference_wma(close, 16)
+        assert_series_equal(reference_wma(delta.to_numpy(), 4), TA.HMA(self.df, 16), check_names=False)
+
+        assert_series_equal(legacy_ta.IFT_RSI(self.df), TA.IFT_RSI(self.df))
+        assert_frame_equal(original, self.df)
@@ -0,0 +1,73 @@
+from unittest import TestCase, mock
+
+import oandapyV20.endpoints.pricing as pricing
+
+from src.pricing.spot_rate import SpotRateService
+
+QUOTES = {'GBP_USD': (1.2499, 1.2501), 'USD_SGD': (1.3599, 1.3601), 'EUR_USD': (1.0999, 1.1001), 'USD_JPY': (149.99, 150.01)}
+
+
+class TestSpotRateService(TestCase):
+    def setUp(self):
+        self.now = 0.
+        self.service = SpotRateService(ttl=5, ttls={'USD_JPY': 1}, clock=lambda: self.now)
+        self.patcher = mock.patch('src.pricing.spot_rate.RUNNING_ENV')
+        env = self.patcher.start()
+        env.env = 'practice'
+        self.request = env.api.request
+        self.request.side_effect = self.respond
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    @staticmethod
+    def respond(r):
+        if isinstance(r, pricing.PricingInfo):
+            return {'prices': [{'instrument': i, 'bids': [{'price': str(QUOTES[i][0])}], 'asks': [{'price': str(QUOTES[i][1])}]}
+                               for i in r.params['instruments'].split(',')]}
+        return {'instruments': [{'name': i} for i in QUOTES]}
+
+    def pricing_requests(self):
+        return [c[0][0].params['instruments'] for c in self.request.call_args_list if isinstance(c[0][0], pricing.PricingInfo)]
+
+    def test_rates(self):
+        rates = self.service.rates(['GBP_USD', 'USD_GBP', 'GBP_SGD', 'EUR_JPY', 'GBP_GBP', 'GBP_USD'])
+        self.assertAlmostEqual(1.25, rates['GBP_USD'])
+        self.assertAlmostEqual(0.8, rates['USD_GBP'])
+        self.assertAlmostEqual(1.25 * 1.36, rates['GBP_SGD'])
+        self.assertAlmostEqual(1.1 * 150, rates['EUR_JPY'])
+        self.assertEqual(1.0, rates['GBP_GBP'])
+        # one pricing request for all the legs
+        self.assertEqual(['EUR_USD,GBP_USD,USD_JPY,USD_SGD'], self.pricing_requests())
+        with self.assertRaises(ValueError):
+            self.service.rate('GBP_XYZ')
+
+    def test_request_outside_lock(self):
+        locked = []
+
+        def respond(r):
+            # another thread can read cached rates while prices are requested
+            acquired = self.service._lock.acquire(blocking=False)
+            if acquired:
+                self.service._lock.release()
+            locked.append(not acquired)
+            return self.respond(r)
+
+        self.request.side_effect = respond
+        self.service.rates(['GBP_USD'])
+        self.assertEqual([False, False], locked)
+
+    def test_missing_price(self):
+        self.request.side_effect = lambda r: {'prices': []} if isinstance(r, pricing.PricingInfo) else self.respond(r)
+        with self.assertRaisesRegex(ValueError, 'GBP_USD'):
+            self.service.rate('GBP_USD')
+
+    def test_ttl(self):
+        self.service.rates(['GBP_USD', 'USD_JPY'])
+        self.now = 2
+        self.service.rates(['GBP_USD', 'USD_JPY'])
+        self.now = 6
+        self.service.rates(['GBP_USD', 'USD_JPY'])
+        # only the expired instruments are requested again
+        self.assertEqual(['GBP_USD,USD_JPY', 'USD_JPY', 'GBP_USD,USD_JPY'], self.pricing_requests())
+        self.assertEqual(1, len([c for c in self.request.call_args_list if not isinstance(c[0][0], pricing.PricingInfo)]))
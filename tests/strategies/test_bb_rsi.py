@@ -0,0 +1,51 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.finta.ta import TA
+from src.strategies.bb_rsi import backtest, compute_indicators, profit_target, to_wide
+
+
+class TestBbRsi(TestCase):
+    def setUp(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'sample_price.csv'), index_col='time', parse_dates=True)
+        inverted = pd.DataFrame({'open': 1 / df['open'], 'high': 1 / df['low'], 'low': 1 / df['high'], 'close': 1 / df['close']})
+        self.prices = {'GBP_USD': df, 'USD_GBP': inverted}
+
+    def test_indicators_match_ta(self):
+        close = to_wide(self.prices, 'close')
+        ind = compute_indicators(close)
+        for inst, df in self.prices.items():
+            rsi = TA.RSI(df, period=11)
+            rsi_bb = TA.BBANDS(pd.DataFrame({'close': rsi}), period=20)
+            bb = TA.BBANDS(df, period=20)
+            np.testing.assert_allclose(rsi.to_numpy(), ind['rsi'][inst].to_numpy())
+            np.testing.assert_allclose(rsi_bb['BB_UPPER'].to_numpy(), ind['rsi_upper'][inst].to_numpy())
+            np.testing.assert_allclose(rsi_bb['BB_LOWER'].to_numpy(), ind['rsi_lower'][inst].to_numpy())
+            np.testing.assert_allclose(bb['BB_UPPER'].to_numpy(), ind['upper'][inst].to_numpy())
+            np.testing.assert_allclose(bb['BB_LOWER'].to_numpy(), ind['lower'][inst].to_numpy())
+
+    def test_missing_bars_are_skipped(self):
+        gappy = self.prices['GBP_USD'].drop(self.prices['GBP_USD'].index[[50, 51, 400]])
+        ind = compute_indicators(to_wide({'GBP_USD': self.prices['GBP_USD'], 'GAPPY': gappy}, 'close'))
+        rsi = TA.RSI(gappy, period=11)
+        np.testing.assert_allclose(rsi.to_numpy(), ind['rsi']['GAPPY'].reindex(gappy.index).to_numpy())
+        np.testing.assert_allclose(TA.BBANDS(pd.DataFrame({'close': rsi}), period=20)['BB_UPPER'].to_numpy(),
+                                   ind['rsi_upper']['GAPPY'].reindex(gappy.index).to_numpy())
+        np.testing.assert_allclose(TA.BBANDS(gappy, period=20)['BB_LOWER'].to_numpy(), ind['lower']['GAPPY'].reindex(gappy.index).to_numpy())
+        self.assertTrue(ind['rsi']['GAPPY'].iloc[[50, 51, 400]].isna().all())
+
+    def test_backtest(self):
+        trades = backtest(self.prices, 'H4')
+        self.assertTrue(len(trades) > 0)
+        self.assertEqual({'GBP_USD', 'USD_GBP'}, set(trades['instrument']))
+        self.assertEqual(70, profit_target('GBP_USD', 'H4'))
+        self.assertEqual(60, profit_target('USD_GBP', 'H4'))
+        closed = trades[trades['outcome'] != 'open']
+        self.assertTrue((closed['close_time'] > closed['time']).all())
+        for inst, target in (('GBP_USD', 70), ('USD_GBP', 60)):
+            trades_inst = trades[trades['instrument'] == inst]
+            np.testing.assert_allclose((trades_inst['tp'] - trades_inst['entry']).abs().to_numpy(), target / 10000)
+            np.testing.assert_allclose(trades_inst[trades_inst['outcome'] == 'win']['pips'].to_numpy(), target)
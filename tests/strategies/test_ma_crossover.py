@@ -0,0 +1,45 @@
+import os
+import queue
+import threading
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import average_true_range, exponential_moving_average
+from src.strategies.ma_crossover import MaTrader, OHLC, iter_price_arrays
+
+
+class TestMaTrader(TestCase):
+    def setUp(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'sample_price.csv'))
+        df['time'] = df['time'].str[:19]
+        signals = df.copy()
+        signals['ema_short'] = exponential_moving_average(signals, 16)
+        signals['ema_long'] = exponential_moving_average(signals, 64)
+        signals['atr'] = average_true_range(signals, 14)
+        signals['positions'] = np.where(signals['ema_short'] > signals['ema_long'], 1.0, 0.0)
+        signals['positions'] = signals['positions'].diff()
+        self.signals = signals[signals.positions.isin([-1, 1])].to_dict('records')
+        self.df = df
+
+    def test_replay_matches_threaded_run(self):
+        events = queue.Queue()
+        threaded = MaTrader(instrument='GBP_USD', price_events=events, signals=self.signals, running=True)
+        for row in self.df.itertuples(index=False):
+            events.put(OHLC(row.time, row.open, row.high, row.low, row.close))
+        thread = threading.Thread(target=threaded.run)
+        thread.start()
+        events.join()
+        threaded.running = False
+        thread.join()
+
+        replayed = MaTrader(instrument='GBP_USD', signals=self.signals)
+        stats = replayed.replay(iter_price_arrays(self.df['time'], self.df['open'], self.df['high'], self.df['low'], self.df['close']))
+
+        self.assertEqual(len(self.df), stats['bars'])
+        self.assertTrue(len(replayed.orders) > 0)
+        self.assertEqual(
+            [(o.order_date, o.side, o.entry, o.tp, o.status, o.pnl, o.last_update) for o in threaded.orders],
+            [(o.order_date, o.side, o.entry, o.tp, o.status, o.pnl, o.last_update) for o in replayed.orders]
+        )
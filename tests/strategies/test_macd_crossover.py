@@ -0,0 +1,58 @@
+import os
+from datetime import timedelta
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.backtester import BackTester
+from src.finta.ta import TA
+from src.orders.order import Order, OrderSide, OrderStatus
+from src.strategies.macd_crossover import generate_orders, sweep
+
+
+class TestMacdCrossover(TestCase):
+    def setUp(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'sample_price.csv'))
+        df[['macd', 'signal']] = TA.MACD(df)
+        df['ema_200'] = TA.EMA(df, period=50)
+        df['atr'] = TA.ATR(df)
+        df['time'] = pd.to_datetime(df['time'])
+        self.price_df = df
+
+    def test_generate_orders(self):
+        for max_orders in (1, 2, 4):
+            expected = loop_orders('GBP_USD', self.price_df.copy(), max_orders)
+            actual = generate_orders('GBP_USD', self.price_df, max_orders)
+            self.assertTrue(len(expected) > 0)
+            self.assertEqual(
+                [(o.order_date, o.side, o.entry, o.sl, o.tp) for o in expected],
+                [(o.order_date, o.side, o.entry, o.sl, o.tp) for o in actual]
+            )
+
+    def test_sweep(self):
+        orders = generate_orders('GBP_USD', self.price_df, 2)
+        BackTester().run_vectorized(self.price_df.set_index('time'), orders, print_stats=False)
+        stats = sweep(self.price_df, [12], [26], [9], 2).iloc[0]
+        self.assertEqual(len(orders), stats['orders'])
+        self.assertEqual(len([o for o in orders if o.outcome == 'win']), stats['wins'])
+        self.assertEqual(len([o for o in orders if o.outcome == 'loss']), stats['losses'])
+        self.assertAlmostEqual(round(sum(o.pnl for o in orders) * 10000, 4), stats['total pnl'])
+
+
+def loop_orders(instrument, price_df, maximum_order_size_in_one_side):
+    """ Row by row implementation the vectorized version replaces """
+    price_df['comparison'] = np.where(price_df['macd'] > price_df['signal'], 1, 0)
+    price_df['cross'] = price_df['comparison'].diff()
+    price_df['next_open'] = price_df['open'].shift(-1)
+    orders = []
+    for ohlc in price_df.to_dict('records'):
+        last = orders[-maximum_order_size_in_one_side:]
+        is_all_long = len(orders) >= maximum_order_size_in_one_side and not any([o.is_short for o in last])
+        is_all_short = len(orders) >= maximum_order_size_in_one_side and not any([o.is_long for o in last])
+        entry, atr = ohlc['next_open'], ohlc['atr']
+        if ohlc['cross'] == 1 and ohlc['close'] > ohlc['ema_200'] and ohlc['macd'] < 0 and not is_all_long:
+            orders.append(Order(ohlc['time'] + timedelta(hours=1), OrderSide.LONG, instrument, entry, entry - atr, entry + atr * 1.5, status=OrderStatus.PENDING))
+        if ohlc['cross'] == -1 and ohlc['close'] < ohlc['ema_200'] and ohlc['macd'] > 0 and not is_all_short:
+            orders.append(Order(ohlc['time'] + timedelta(hours=1), OrderSide.SHORT, instrument, entry, entry + atr, entry - atr * 1.5, status=OrderStatus.PENDING))
+    return orders
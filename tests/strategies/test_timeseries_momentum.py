@@ -0,0 +1,35 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.timeseries_momentum import momentum_backtest
+
+
+class TestTimeseriesMomentum(TestCase):
+    def setUp(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'sample_price.csv'))
+        close = df['close'].to_numpy()
+        # three instruments: the sample feed, an inverted copy and one with a few missing bars
+        gappy = close * 1.1
+        gappy[[100, 101, 700]] = np.nan
+        self.close = np.column_stack([close, 1 / close, gappy])
+        self.lookbacks = [15, 30, 60, 120]
+
+    def test_matches_rolling_mean(self):
+        positions, strategy = momentum_backtest(self.close, self.lookbacks, chunk_size=2)
+        self.assertEqual((len(self.lookbacks), self.close.shape[0], self.close.shape[1]), positions.shape)
+        for i in range(self.close.shape[1]):
+            df = pd.DataFrame({'close': self.close[:, i]})
+            df['returns'] = np.log(df['close'] / df['close'].shift(1))
+            for k, momentum in enumerate(self.lookbacks):
+                expected_pos = np.sign(df['returns'].rolling(momentum).mean())
+                expected_strat = expected_pos.shift(1) * df['returns']
+                np.testing.assert_array_equal(expected_pos.to_numpy(), positions[k, :, i])
+                np.testing.assert_allclose(expected_strat.to_numpy(), strategy[k, :, i])
+
+    def test_window_longer_than_history(self):
+        positions, strategy = momentum_backtest(self.close[:10], [20])
+        self.assertTrue(np.isnan(positions).all())
+        self.assertTrue(np.isnan(strategy).all())
@@ -20,6 +20,39 @@ class TestBackTester(TestCase):
         self.assertAlmostEqual(39, len([o for o in orders if o.outcome == 'win']))
         self.assertAlmostEqual(68, len([o for o in orders if o.outcome == 'loss']))
 
+    def test_run_vectorized(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv')).set_index('time')
+        orders = create_dummy_orders(df)
+        # same orders, but pending and with entries away from the close so that the fill logic is exercised too
+        pending = [Order(o.order_date, o.side, o.instrument, o.entry + (0.005 if o.is_long else -0.005), sl=o.sl, tp=o.tp) for o in orders]
+        vectorized = [Order(o.order_date, o.side, o.instrument, o.entry, sl=o.sl, tp=o.tp, status=o.status) for o in orders + pending]
+        back_tester = BackTester()
+        expected = back_tester.run(df, orders + pending, print_stats=False)
+        actual = back_tester.run_vectorized(df, vectorized, print_stats=False)
+
+        pd.testing.assert_frame_equal(expected, actual, check_exact=False)
+        for o, v in zip(orders + pending, vectorized):
+            self.assertEqual((o.status, o.last_update, o.outcome), (v.status, v.last_update, v.outcome))
+            self.assertAlmostEqual(o.pnl, v.pnl)
+
+    def test_run_with_spread(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv')).set_index('time')
+        orders = create_dummy_orders(df)
+        pending = [Order(o.order_date, o.side, o.instrument, o.entry + (0.005 if o.is_long else -0.005), sl=o.sl, tp=o.tp) for o in orders]
+        mid = [Order(o.order_date, o.side, o.instrument, o.entry, sl=o.sl, tp=o.tp, status=o.status) for o in orders + pending]
+        vectorized = [Order(o.order_date, o.side, o.instrument, o.entry, sl=o.sl, tp=o.tp, status=o.status) for o in orders + pending]
+        back_tester = BackTester()
+        back_tester.run(df, mid, print_stats=False)
+        df['half_spread'] = 0.001
+        expected = back_tester.run(df, orders + pending, print_stats=False)
+        actual = back_tester.run_vectorized(df, vectorized, print_stats=False)
+
+        pd.testing.assert_frame_equal(expected, actual, check_exact=False)
+        for o, v in zip(orders + pending, vectorized):
+            self.assertEqual((o.status, o.last_update, o.outcome), (v.status, v.last_update, v.outcome))
+        # paying the spread hits more stop losses than trading at mid
+        self.assertGreater(len([o for o in orders + pending if o.outcome == 'loss']), len([o for o in mid if o.outcome == 'loss']))
+
 
 def create_dummy_orders(df):
     df['ma_12'] = df.close.rolling(12).mean()
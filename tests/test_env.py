@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from src.env import Env
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEnv(TestCase):
+    def setUp(self):
+        self.env = Env()
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_client_shared(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: self.env.api, range(32)))
+        self.assertTrue(all(c is clients[0] for c in clients))
+
+        self.env.config['oanda']['access_token'] = 'another-token'
+        self.assertIsNot(clients[0], self.env.api)
+
+    def test_pool_size(self):
+        self.env.config['oanda']['pool_size'] = '3'
+        adapter = self.env.api.client.get_adapter('https://')
+        self.assertEqual(3, adapter._pool_maxsize)
+
+    def test_connection_metrics(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/'
+            for _ in range(3):
+                self.env.api.client.get(url).close()
+            self.assertEqual({'requests': 3, 'opened': 1, 'reused': 2}, self.env.connection_metrics())
+        finally:
+            self.env.close()
+            server.shutdown()
+            server.server_close()
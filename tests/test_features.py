@@ -0,0 +1,98 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from src.features import FeatureEngine, clear_engines, compute_features, feature_engine
+from src.finta.ta import TA
+
+
+class TestFeatures(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+
+    def test_matches_ta(self):
+        engine = FeatureEngine(self.df)
+        np.testing.assert_array_equal(TA.ATR(self.df, 14), engine.get('atr_14'))
+        np.testing.assert_array_equal(TA.ADX(self.df, 14), engine.get('adx_14'))
+        np.testing.assert_array_equal(TA.DMI(self.df, 14)['DI-'], engine.get('di_minus_14'))
+        np.testing.assert_array_equal(TA.RSI(self.df, 14), engine.get('rsi_14'))
+        np.testing.assert_array_equal(TA.EMA(self.df, 55), engine.get('ema_55'))
+        np.testing.assert_array_equal(TA.MACD(self.df).to_numpy(), engine.frame(['macd_12_26', 'macd_signal_12_26_9']).to_numpy())
+        np.testing.assert_array_equal(TA.BBANDS(self.df, 20)['BB_UPPER'], engine.get('bb_upper_20'))
+        np.testing.assert_array_equal(self.df['high'].rolling(20).max(), engine.get('last_20_high'))
+        np.testing.assert_array_equal(self.df['low'].rolling(10).min(), engine.get('last_10_low'))
+
+    def test_each_node_computed_once(self):
+        engine = FeatureEngine(self.df)
+        engine.frame(['adx_14', 'atr_14', 'di_plus_14', 'rsi_14', 'rsi_14', 'atr_20'])
+        self.assertEqual(['dm_plus', 'tr', 'atr_14', 'di_plus_14', 'dm_minus', 'di_minus_14', 'adx_14', 'rsi_14', 'atr_20'], engine.computed)
+
+    def test_enrich(self):
+        enriched = FeatureEngine(self.df).enrich(['atr_14', 'last_20_high'], columns={'atr_14': 'atr'})
+        self.assertEqual(list(self.df.columns) + ['atr', 'last_20_high'], list(enriched.columns))
+        self.assertTrue(enriched.index.equals(self.df.index))
+        self.assertNotIn('atr', self.df.columns)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            expected = FeatureEngine(self.df, cache_dir=cache_dir).get('adx_14')
+            engine = FeatureEngine(self.df, cache_dir=cache_dir)
+            np.testing.assert_array_equal(expected, engine.get('adx_14'))
+            self.assertEqual([], engine.computed)
+
+            # persisted values of another price range are ignored
+            shorter = FeatureEngine(self.df.iloc[:100], cache_dir=cache_dir)
+            np.testing.assert_array_equal(TA.ADX(self.df.iloc[:100], 14), shorter.get('adx_14'))
+
+            # so are the ones of revised prices with the same range
+            revised = self.df.copy()
+            revised.iloc[500, revised.columns.get_loc('close')] += 0.01
+            engine = FeatureEngine(revised, cache_dir=cache_dir)
+            np.testing.assert_array_equal(TA.ADX(revised, 14), engine.get('adx_14'))
+            self.assertIn('adx_14', engine.computed)
+
+    @mock.patch('src.features.read_price_df')
+    def test_feature_engine_cache(self, read_price_df):
+        read_price_df.return_value = self.df
+        clear_engines()
+        with mock.patch('src.features.MAX_ENGINES', 2):
+            first = feature_engine('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2020, 2, 1))
+            self.assertIs(first, feature_engine('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2020, 2, 1)))
+            feature_engine('EUR_USD', 'H1', datetime(2020, 1, 1), datetime(2020, 2, 1))
+            feature_engine('USD_JPY', 'H1', datetime(2020, 1, 1), datetime(2020, 2, 1))
+            # the least recently used engine is dropped
+            self.assertIsNot(first, feature_engine('GBP_USD', 'H1', datetime(2020, 1, 1), datetime(2020, 2, 1)))
+            # open ended ranges are read again
+            latest = feature_engine('GBP_USD', 'H1', datetime(2020, 1, 1))
+            self.assertIsNot(latest, feature_engine('GBP_USD', 'H1', datetime(2020, 1, 1)))
+        self.assertEqual(6, read_price_df.call_count)
+        clear_engines()
+
+    def test_dtype_and_unknown_feature(self):
+        engine = FeatureEngine(self.df, dtype=np.float32)
+        self.assertEqual(np.float32, engine.get('atr_14').dtype)
+        with self.assertRaises(ValueError):
+            engine.get('foo_14')
+
+    def test_compute_features(self):
+        prices = {'GBP_USD': self.df, 'EUR_USD': self.df.iloc[100:] * 1.1}
+        names = ['atr_14', 'rsi_14', 'adx_14']
+        for mode in ('thread', 'process'):
+            frames, timings = compute_features(prices, names, columns={'atr_14': 'atr'}, workers=2, mode=mode)
+            self.assertEqual(list(prices), list(frames))
+            self.assertEqual(set(prices), set(timings))
+            for inst, df in prices.items():
+                pd.testing.assert_frame_equal(FeatureEngine(df).frame(names, columns={'atr_14': 'atr'}), frames[inst])
+        with self.assertRaises(ValueError):
+            compute_features(prices, names, mode='fiber')
+
+    def test_compact_prices(self):
+        engine = FeatureEngine(self.df.astype(np.float32))
+        self.assertEqual(np.float32, engine.dtype)
+        self.assertEqual(np.float32, engine.get('adx_14').dtype)
+        # ranges lose relative precision to cancellation but stay within 0.01 pip
+        np.testing.assert_allclose(TA.ATR(self.df, 14), engine.get('atr_14'), rtol=0, atol=1e-6)
@@ -0,0 +1,57 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_series_equal
+
+from benchmarks import legacy_indicators
+from src import indicators
+
+
+class TestIndicators(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+        self.df['volume'] = np.random.default_rng(3).integers(1, 5000, len(self.df)).astype(float)
+        # the loop versions only work with a RangeIndex and capitalized columns
+        self.legacy_df = self.df.reset_index(drop=True).rename(columns=str.capitalize)
+
+    def assert_parity(self, name, *args):
+        expected = getattr(legacy_indicators, name)(self.legacy_df, *args).iloc[:, -1]
+        actual = getattr(indicators, name)(self.df, *args)
+        self.assertIsInstance(actual, pd.Series)
+        self.assertTrue(actual.index.equals(self.df.index))
+        assert_series_equal(expected, actual.reset_index(drop=True))
+
+    def test_loops_parity(self):
+        self.assert_parity('trix', 15)
+        self.assert_parity('vortex_indicator', 14)
+        self.assert_parity('relative_strength_index', 14)
+        self.assert_parity('money_flow_index', 14)
+        self.assert_parity('on_balance_volume', 10)
+        self.assert_parity('ultimate_oscillator')
+
+    def test_average_directional_movement_index(self):
+        # the directional moves of a bar are the moves into that bar, not out of it
+        high, low, close = self.df['high'], self.df['low'], self.df['close']
+        up, do = high.diff(), -low.diff()
+        plus = up.where((up > do) & (up > 0), 0)
+        minus = do.where((do > up) & (do > 0), 0)
+        tr = pd.concat([high, close.shift()], axis=1).max(axis=1) - pd.concat([low, close.shift()], axis=1).min(axis=1)
+        atr = tr.fillna(0).ewm(span=14, min_periods=14).mean()
+        pos = plus.ewm(span=14, min_periods=14).mean() / atr
+        neg = minus.ewm(span=14, min_periods=14).mean() / atr
+        expected = ((pos - neg).abs() / (pos + neg)).ewm(span=20, min_periods=20).mean()
+        assert_series_equal(expected, indicators.average_directional_movement_index(self.df, 14, 20), check_names=False)
+
+    def test_donchian_channel(self):
+        expected = self.df['high'].rolling(20).max() - self.df['low'].rolling(20).min()
+        assert_series_equal(expected, indicators.donchian_channel(self.df, 20), check_names=False)
+
+    def test_aligned_to_input(self):
+        for result in [indicators.momentum(self.df, 10), indicators.kst_oscillator(self.df, 10, 15, 20, 30, 10, 10, 10, 15),
+                       indicators.true_strength_index(self.df, 25, 13), indicators.bollinger_bands(self.df, 20),
+                       indicators.macd(self.df, 12, 26), indicators.keltner_channel(self.df, 20)]:
+            self.assertTrue(result.index.equals(self.df.index))
+        assert_series_equal(indicators.kst_oscillator(self.df, 10, 15, 20, 30, 10, 10, 10, 15),
+                            indicators.kst_oscillator(self.legacy_df, 10, 15, 20, 30, 10, 10, 10, 15).set_axis(self.df.index))
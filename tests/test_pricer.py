@@ -1,8 +1,20 @@
-from unittest import TestCase
+import os
+import tempfile
+from unittest import TestCase, mock
 
 from datetime import datetime, timedelta
 
-from src.pricer import get_candlesticks, build_params
+import numpy as np
+import pandas as pd
+
+from oandapyV20 import V20Error
+
+from benchmarks import legacy_pricer
+from benchmarks.bench_pricer import random_candles
+from src.db.candle_store import CandleStore
+from src.pricer import (PriceDownloadError, build_params, candles_to_df, compact_prices, get_candlesticks, plan_windows, read_price_data,
+                        read_price_df, stack_prices)
+from src.utils import fx_calendar
 
 
 class TestPricer(TestCase):
@@ -124,6 +136,147 @@ class TestPricer(TestCase):
             }
         ], build_params(granularity='M30', start=start, end=end, max_count=10)))
 
+    def test_compact_prices(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+        compact = compact_prices(df)
+        self.assertTrue((compact.dtypes == np.float32).all())
+        self.assertEqual(np.int64, compact.index.dtype)
+        self.assertTrue(pd.to_datetime(compact.index, unit='s', utc=True).equals(df.index))
+        self.assertLess(compact.memory_usage().sum(), df.memory_usage().sum() * 0.65)
+        # well within 0.01 pip
+        self.assertLess(np.abs(compact['close'].to_numpy(dtype=np.float64) - df['close']).max(), 1e-6)
+
+    def test_stack_prices(self):
+        df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+        stacked = stack_prices({'GBP_USD': df, 'EUR_USD': df.iloc[:10]})
+        self.assertEqual(len(df) + 10, len(stacked))
+        self.assertEqual(['GBP_USD', 'EUR_USD'], list(stacked['instrument'].cat.categories))
+        self.assertEqual(np.int8, stacked['instrument'].cat.codes.dtype)
+        self.assertEqual(['EUR_USD'] * 10, list(stacked['instrument'].iloc[-10:]))
+        self.assertTrue(stacked['time'].iloc[-10:].reset_index(drop=True).equals(df.index[:10].to_series().reset_index(drop=True)))
+
+    @mock.patch('src.utils.rate_limit.time.sleep')
+    @mock.patch('src.pricer.api_request')
+    def test_read_price_data(self, api_request, _):
+        # M5 candles of a week from Wednesday to Wednesday, none while the market is closed at the weekend
+        start, end = datetime(2020, 1, 1), datetime(2020, 1, 8)
+        times = [t for t in pd.date_range(start, end, freq='5min')[:-1] if fx_calendar.trading_seconds(t, t + timedelta(minutes=5))]
+        stamps = [t.strftime('%Y-%m-%dT%H:%M:%S.000000000Z') for t in times]
+        failures = []
+
+        def respond(instrument, p):
+            # one transient failure per window
+            if p['from'] not in failures:
+                failures.append(p['from'])
+                raise V20Error(503, 'unavailable')
+            first = [t[:19] >= p['from'][:19] for t in stamps].index(True)
+            if not p.get('includeFirst', True) and stamps[first] == p['from']:
+                first += 1
+            return {'candles': [{'time': t} for t in stamps[first:first + p['count']]]}
+
+        api_request.side_effect = respond
+        candles = read_price_data('GBP_USD', 'M5', start, end, max_count=500, workers=4)
+        self.assertEqual(stamps, [c['time'] for c in candles])
+        # 5 trading days of 288 candles fit in 3 requests of 500, plus one retry each
+        self.assertEqual(3, len(plan_windows('M5', start, end, max_count=500)))
+        self.assertEqual(6, api_request.call_count)
+        self.assertGreater(len(build_params('M5', start, end, max_count=500)), 3)
+
+    @mock.patch('src.pricer.api_request')
+    def test_read_price_data_error(self, api_request):
+        api_request.side_effect = V20Error(400, 'bad request')
+        with self.assertRaises(PriceDownloadError):
+            read_price_data('GBP_USD', 'M5', datetime(2020, 1, 1), datetime(2020, 1, 2), max_count=50)
+        self.assertEqual(len(plan_windows('M5', datetime(2020, 1, 1), datetime(2020, 1, 2), max_count=50)), api_request.call_count)
+
+    def test_plan_windows(self):
+        # Friday 12:00 to Monday 12:00 UTC: the market is open 10 hours until 22:00 on Friday and 14 hours from Sunday 22:00
+        windows = plan_windows('H1', datetime(2020, 1, 10, 12), datetime(2020, 1, 13, 12))
+        self.assertEqual([{'from': '2020-01-10T12:00:00', 'to': '2020-01-13T12:00:00', 'count': 24, 'granularity': 'H1'}], windows)
+        # windows entirely in the weekend close are skipped
+        self.assertEqual([], plan_windows('M1', datetime(2020, 1, 11), datetime(2020, 1, 12)))
+        # each window holds max_count candles of open market time
+        windows = plan_windows('M1', datetime(2020, 1, 10, 12), datetime(2020, 1, 13, 12), max_count=600)
+        self.assertEqual(['2020-01-10T12:00:00', '2020-01-10T22:00:00', '2020-01-13T08:00:00'], [w['from'] for w in windows])
+        self.assertEqual([600, 600, 240], [w['count'] for w in windows])
+        self.assertEqual(13, plan_windows('M', datetime(2019, 1, 1), datetime(2020, 1, 1))[0]['count'])
+
+    def test_candles_to_df(self):
+        raw = random_candles(500)
+        # overlapping windows repeat candles, the last copy wins
+        updated = dict(raw[10], mid=dict(raw[10]['mid'], c='9.99999'))
+        shuffled = raw[250:] + raw[:260] + [updated]
+        df = candles_to_df(shuffled)
+        expected = legacy_pricer.to_df(raw)
+        expected.iloc[10, expected.columns.get_loc('close')] = 9.99999
+        self.assertTrue(df.index.is_monotonic_increasing)
+        np.testing.assert_array_equal(expected.to_numpy(), df.to_numpy())
+        self.assertTrue((expected.index == df.index).all())
+        self.assertEqual('UTC', str(df.index.tz))
+        self.assertEqual(0, len(candles_to_df([])))
+
+    @mock.patch('src.pricer.api_request')
+    def test_read_price_df_bid_ask(self, api_request):
+        raw = random_candles(100)
+        for el in raw:
+            el['bid'] = {k: f'{float(v) - 1e-4:.5f}' for k, v in el['mid'].items()}
+            el['ask'] = {k: f'{float(v) + 1e-4:.5f}' for k, v in el['mid'].items()}
+        raw[5]['ask'] = dict(raw[5]['ask'], h=f"{float(raw[5]['mid']['h']) + 5e-4:.5f}")
+        api_request.return_value = {'candles': raw}
+
+        df = read_price_df('GBP_USD', 'S5', datetime(2020, 1, 1), datetime(2020, 1, 1, 0, 8, 20), price='MBA')
+        # bid and ask come with the mid prices in one request
+        self.assertEqual(1, api_request.call_count)
+        self.assertEqual('MBA', api_request.call_args[0][1]['price'])
+        self.assertEqual(['open', 'high', 'low', 'close', 'half_spread'], list(df.columns))
+        self.assertEqual(np.float32, df['half_spread'].dtype)
+        np.testing.assert_array_equal(candles_to_df(raw).to_numpy(), df[['open', 'high', 'low', 'close']].to_numpy())
+        np.testing.assert_allclose(np.where(np.arange(100) == 5, 3e-4, 1e-4), df['half_spread'], rtol=1e-3)
+
+        # without mid prices the mid is the average of bid and ask
+        ba = candles_to_df([{k: v for k, v in el.items() if k != 'mid'} for el in raw], price='BA')
+        np.testing.assert_allclose(df['close'], ba['close'])
+        self.assertEqual(float(raw[0]['bid']['l']), candles_to_df(raw, price='B')['low'].iloc[0])
+        with self.assertRaises(ValueError):
+            read_price_df('GBP_USD', 'S5', datetime(2020, 1, 1), datetime(2020, 1, 2), price='X')
+
+    @mock.patch('src.pricer.read_price_data')
+    def test_read_through_store(self, read_price_data):
+        raw = random_candles(2000)
+        raw[-1] = dict(raw[-1], complete=False)
+
+        def download(instrument, granularity, start, end, max_count, price='M'):
+            s, e = pd.Timestamp(start, tz='UTC'), pd.Timestamp(end, tz='UTC')
+            return [c for c in raw if s <= pd.Timestamp(c['time']) < e]
+
+        read_price_data.side_effect = download
+        start, middle, end = datetime(2020, 1, 1), datetime(2020, 1, 1, 1), datetime(2020, 1, 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CandleStore(os.path.join(tmp, 'candles.sqlite'))
+            head = read_price_df('GBP_USD', 'S5', middle, end, store=store)
+            self.assertEqual(1, read_price_data.call_count)
+            full = read_price_df('GBP_USD', 'S5', start, end, store=store)
+            # only the range before the first read and from the incomplete candle on are downloaded
+            self.assertEqual([(start, middle), (pd.Timestamp(raw[-1]['time']).tz_convert(None).to_pydatetime(), end)],
+                             [c[0][2:4] for c in read_price_data.call_args_list[1:]])
+            pd.testing.assert_frame_equal(candles_to_df(raw), full)
+            pd.testing.assert_frame_equal(full.loc[head.index[0]:], head)
+
+    @mock.patch('src.pricer.read_price_data')
+    def test_read_through_store_future_end(self, read_price_data):
+        raw = random_candles(100)
+        read_price_data.return_value = raw
+        start, end = datetime(2020, 1, 1), datetime.utcnow() + timedelta(days=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CandleStore(os.path.join(tmp, 'candles.sqlite'))
+            df = read_price_df('GBP_USD', 'S5', start, end, store=store)
+            now = datetime.utcnow()
+            # the range after now is neither requested nor marked as downloaded
+            self.assertLessEqual(read_price_data.call_args[0][3], now)
+            self.assertLessEqual(store.coverage('GBP_USD', 'S5')[-1][1], pd.Timestamp(now, tz='UTC').timestamp())
+            self.assertLessEqual(store.missing('GBP_USD', 'S5', start, end)[-1][0], now)
+            pd.testing.assert_frame_equal(candles_to_df(raw), df)
+
 
 def equal_ignore_order(a, b):
     """ Use only when elements are neither hashable nor sortable! """
@@ -0,0 +1,59 @@
+import os
+import queue
+from datetime import timedelta
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.event import TickEvent
+from src.finta.ta import TA
+from src.strategies.ma_crossover import MaCrossoverStrategy
+from src.strategy import HistoricalEngine, LiveEngine
+
+
+class TestStrategy(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+
+    def test_historical_engine_matches_batch_signals(self):
+        strategy = MaCrossoverStrategy('GBP_USD')
+        stats = HistoricalEngine(strategy).run(HistoricalEngine.bars(self.df))
+        self.assertEqual(len(self.df), stats['bars'])
+
+        df = self.df.copy()
+        df['ema_short'] = TA.EMA(df, period=16)
+        df['ema_long'] = TA.EMA(df, period=64)
+        df['atr'] = TA.ATR(df, 14)
+        df['signal'] = 0.0
+        df.iloc[16:, df.columns.get_loc('signal')] = np.where(df['ema_short'][16:] > df['ema_long'][16:], 1.0, 0.0)
+        df['position'] = df['signal'].diff()
+        crossovers = df[df['position'].isin([-1, 1])]
+
+        self.assertEqual(list(crossovers.index), [o.order_date for o in strategy.orders])
+        self.assertEqual(['long' if p == 1 else 'short' for p in crossovers['position']], [o.side for o in strategy.orders])
+        np.testing.assert_allclose((crossovers['close'] + crossovers['atr'] * 5 * crossovers['position']).to_numpy(), [o.tp for o in strategy.orders])
+        # every order but the last one is closed, either by take profit or by the next crossover
+        self.assertTrue(all(not o.is_open for o in strategy.orders[:-1]))
+
+    def test_live_engine_matches_historical_engine(self):
+        historical = MaCrossoverStrategy('GBP_USD')
+        HistoricalEngine(historical).run(HistoricalEngine.bars(self.df))
+
+        live = MaCrossoverStrategy('GBP_USD')
+        engine = LiveEngine(live, queue.Queue(), granularity='H1')
+        engine.warm_up(HistoricalEngine.bars(self.df.iloc[:100]))
+        for t, bar in self.df.iloc[100:].iterrows():
+            # open, high, low and close ticks within the hour, with a 2 pips spread around the mid price
+            for seconds, price in zip((0, 600, 1200, 3599), (bar.open, bar.high, bar.low, bar.close)):
+                engine.on_tick(TickEvent('GBP_USD', (t + timedelta(seconds=seconds)).isoformat(), price - 0.0001, price + 0.0001))
+        engine.flush()
+
+        expected = [o for o in historical.orders if o.order_date >= self.df.index[100]]
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual(len(expected), len(live.orders))
+        for e, a in zip(expected, live.orders):
+            self.assertEqual((e.order_date, e.side, e.status, e.last_update), (a.order_date, a.side, a.status, a.last_update))
+            self.assertAlmostEqual(e.entry, a.entry)
+            self.assertAlmostEqual(e.tp, a.tp)
+            self.assertAlmostEqual(e.pnl, a.pnl)
@@ -0,0 +1,63 @@
+import os
+from datetime import datetime
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from src.timeframes import TimeframePyramid, bar_labels, read_pyramid
+
+
+class TestTimeframes(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'sample_price.csv'), index_col='time', parse_dates=True)
+
+    def test_bar_labels(self):
+        times = pd.DatetimeIndex(['2020-01-06 21:59', '2020-01-06 22:00', '2020-07-06 20:59', '2020-07-06 21:00'])
+        # daily bars open at 17:00 New York time, 22:00 UTC in winter and 21:00 UTC in summer
+        self.assertEqual(pd.DatetimeIndex(['2020-01-05 22:00', '2020-01-06 22:00', '2020-07-05 21:00', '2020-07-06 21:00'], tz='UTC').tolist(),
+                         bar_labels(times, 'D').tolist())
+        self.assertEqual(pd.DatetimeIndex(['2020-01-06 18:00', '2020-01-06 22:00', '2020-07-06 17:00', '2020-07-06 21:00'], tz='UTC').tolist(),
+                         bar_labels(times, 'H4').tolist())
+        self.assertEqual(pd.DatetimeIndex(['2020-01-06 21:45', '2020-01-06 22:00', '2020-07-06 20:45', '2020-07-06 21:00'], tz='UTC').tolist(),
+                         bar_labels(times, 'M15').tolist())
+        self.assertEqual(pd.Timestamp('2020-01-05 22:00', tz='UTC'), bar_labels(pd.DatetimeIndex(['2020-01-10 21:00']), 'W')[0])
+
+    def test_derived_levels(self):
+        pyramid = TimeframePyramid('H1', self.df)
+        daily = pyramid.get('D')
+        self.assertIs(daily, pyramid.get('D'))
+        first_day = self.df.loc['2020-01-01 22:00':'2020-01-02 21:00']
+        self.assertEqual([first_day['open'][0], first_day['high'].max(), first_day['low'].min(), first_day['close'][-1]],
+                         daily.iloc[0].tolist())
+        # daylight saving time starts on 8 March 2020 in New York
+        self.assertEqual({22}, set(daily.index[daily.index < '2020-03-08'].hour))
+        self.assertEqual({21}, set(daily.index[daily.index > '2020-03-08'].hour))
+        self.assertNotIn(5, daily.index.weekday)
+        self.assertEqual(len(self.df), len(pyramid.levels(['H1'])['H1']))
+        self.assertEqual(['H1', 'H4', 'D'], list(pyramid.levels()))
+        with self.assertRaises(ValueError):
+            pyramid.get('M15')
+
+    def test_append(self):
+        full = TimeframePyramid('H1', self.df)
+        pyramid = TimeframePyramid('H1', self.df.iloc[:1000])
+        levels = pyramid.levels(['H4', 'D', 'W'])
+        for start in range(1000, len(self.df), 7):
+            pyramid.append(self.df.iloc[start:start + 7])
+        # a revised candle replaces the stored one
+        revised = self.df.iloc[[-30]] * 1.01
+        pyramid.append(revised)
+        full.append(revised)
+        for granularity in levels:
+            pd.testing.assert_frame_equal(full.get(granularity), pyramid.get(granularity))
+        pd.testing.assert_frame_equal(full.get('H1'), pyramid.get('H1'))
+
+    @mock.patch('src.timeframes.read_price_df')
+    def test_read_pyramid(self, read_price_df):
+        read_price_df.side_effect = lambda instrument, granularity, start, end, max_count, store: \
+            self.df.loc[pd.Timestamp(start, tz='UTC'):pd.Timestamp(end, tz='UTC')]
+        pyramid = read_pyramid('GBP_USD', 'H1', datetime(2020, 1, 6), datetime(2020, 3, 1))
+        # the range starts with the daily bar holding the requested start, so the first daily bar is complete
+        self.assertEqual(datetime(2020, 1, 5, 22), read_price_df.call_args[1]['start'])
+        self.assertEqual(pd.Timestamp('2020-01-05 22:00', tz='UTC'), pyramid.get('D').index[0])
+        self.assertEqual(pyramid.get('H1').loc['2020-01-05 22:00':'2020-01-06 21:00', 'high'].max(), pyramid.get('D')['high'].iloc[0])
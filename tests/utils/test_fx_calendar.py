@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from src.utils import fx_calendar
+
+
+class TestFxCalendar(TestCase):
+    def test_week_open(self):
+        # Sunday 17:00 New York is 22:00 UTC in winter and 21:00 UTC in summer
+        self.assertEqual(datetime(2020, 1, 5, 17), fx_calendar.week_open(datetime(2020, 1, 8)))
+        self.assertEqual(datetime(2020, 1, 5, 17), fx_calendar.week_open(datetime(2020, 1, 5, 22)))
+        self.assertEqual(datetime(2019, 12, 29, 17), fx_calendar.week_open(datetime(2020, 1, 5, 21, 59)))
+
+    def test_trading_seconds(self):
+        day = timedelta(days=1).total_seconds()
+        self.assertEqual(5 * day, fx_calendar.trading_seconds(datetime(2020, 1, 1), datetime(2020, 1, 8)))
+        self.assertEqual(0, fx_calendar.trading_seconds(datetime(2020, 1, 11), datetime(2020, 1, 12)))
+        # daylight saving time starts on 8 March 2020, the week still has 5 trading days
+        self.assertEqual(5 * day, fx_calendar.trading_seconds(datetime(2020, 3, 6, 22), datetime(2020, 3, 13, 21)))
+        self.assertEqual([(datetime(2020, 3, 8, 21), datetime(2020, 3, 13, 21))],
+                         list(fx_calendar.trading_sessions(datetime(2020, 3, 7), datetime(2020, 3, 14))))
+
+    def test_add_trading_seconds(self):
+        # from Friday 20:00 UTC, 2 hours before the close, to 1 hour after the Sunday open
+        self.assertEqual(datetime(2020, 1, 12, 23), fx_calendar.add_trading_seconds(datetime(2020, 1, 10, 20), 3 * 3600))
+        self.assertEqual(datetime(2020, 1, 12, 22), fx_calendar.add_trading_seconds(datetime(2020, 1, 11), 0))
+        start = datetime(2020, 1, 1, 5)
+        end = fx_calendar.add_trading_seconds(start, 10 * 86400)
+        self.assertEqual(10 * 86400, fx_calendar.trading_seconds(start, end))
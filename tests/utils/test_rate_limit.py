@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from src.utils.rate_limit import RateLimiter, retry
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimit(TestCase):
+    def test_rate_limiter(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(2):
+            limiter.acquire()
+        self.assertEqual([], clock.sleeps)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertAlmostEqual(0.3, clock.now)
+        clock.now += 10
+        limiter.acquire()
+        self.assertEqual(3, len(clock.sleeps))
+
+    def test_retry(self):
+        clock = FakeClock()
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError('reset')
+            return 'ok'
+
+        self.assertEqual('ok', retry(flaky, backoff=1, sleep=clock.sleep))
+        self.assertEqual(2, len(clock.sleeps))
+        self.assertTrue(0.5 <= clock.sleeps[0] <= 1 and 1 <= clock.sleeps[1] <= 2)
+
+    def test_retry_gives_up(self):
+        clock = FakeClock()
+        with self.assertRaises(ConnectionError):
+            retry(lambda: (_ for _ in ()).throw(ConnectionError('reset')), retries=3, sleep=clock.sleep)
+        self.assertEqual(3, len(clock.sleeps))
+        with self.assertRaises(ValueError):
+            retry(lambda: int('x'), retry_on=lambda err: not isinstance(err, ValueError), sleep=clock.sleep)
+        self.assertEqual(3, len(clock.sleeps))